@@ -0,0 +1,147 @@
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple, TYPE_CHECKING
+from enums import Priority, Status
+from registry import Registry, RegistryListener
+
+if TYPE_CHECKING:
+    from user import User
+    from project import Project
+    from task import Task
+
+
+# (status, priority, task type)
+Key = Tuple[Status, Priority, str]
+
+
+class Aggregates(RegistryListener):
+    """
+    Task counts by status x priority x type, per project, per user and overall.
+
+    Every hook adjusts a handful of counters, so a summary never walks the tasks.
+    The counters only see registered tasks; lazy storage registers a subset, so
+    ``core.summary`` and ``core.check_summary`` raise there instead of undercounting.
+    """
+    by_project: Dict[int, Counter] = {}
+    by_user: Dict[int, Counter] = {}
+    overall: Counter = Counter()
+
+    @classmethod
+    def on_clear(cls) -> None:
+        cls.by_project = {}
+        cls.by_user = {}
+        cls.overall = Counter()
+
+    @classmethod
+    def on_rebuild(cls) -> None:
+        cls.on_clear()
+        for task, project in Registry.tasks.values():
+            cls._count(_key(task), project.id, +1)
+
+    @classmethod
+    def on_task_added(cls, task: "Task", project: "Project") -> None:
+        cls._count(_key(task), project.id, +1)
+
+    @classmethod
+    def on_task_removed(cls, task: "Task", project: "Project") -> None:
+        cls._count(_key(task), project.id, -1)
+
+    @classmethod
+    def on_task_changed(cls, task: "Task", old_status: Status, old_priority: Priority) -> None:
+        old_key = (old_status, old_priority, task._type)
+        new_key = _key(task)
+        if old_key == new_key:
+            return
+        project = Registry.tasks[task.id][1]
+        cls._count(old_key, project.id, -1)
+        cls._count(new_key, project.id, +1)
+
+    @classmethod
+    def project_counts(cls, project_id: int) -> Counter:
+        return cls.by_project.get(project_id, Counter())
+
+    @classmethod
+    def user_counts(cls, user_id: int) -> Counter:
+        return cls.by_user.get(user_id, Counter())
+
+    @classmethod
+    def verify(cls, users: Iterable["User"]) -> List[str]:
+        """
+        Recount every task of ``users`` and return the counters that disagree.
+        """
+        by_project: Dict[int, Counter] = {}
+        by_user: Dict[int, Counter] = {}
+        for user in users:
+            for project in user.projects:
+                for task in project.tasks:
+                    by_project.setdefault(project.id, Counter())[_key(task)] += 1
+                    by_user.setdefault(user.id, Counter())[_key(task)] += 1
+        overall = sum(by_user.values(), Counter())
+
+        problems: List[str] = []
+        for label, expected, actual in (("project", by_project, cls.by_project), ("user", by_user, cls.by_user)):
+            for entity_id in sorted(set(expected) | set(actual)):
+                cls._compare(f"{label} {entity_id}", expected.get(entity_id, Counter()),
+                             actual.get(entity_id, Counter()), problems)
+        cls._compare("overall", overall, cls.overall, problems)
+        return problems
+
+    @classmethod
+    def _count(cls, key: Key, project_id: int, delta: int) -> None:
+        entry = Registry.projects.get(project_id)
+        cls._adjust(cls.overall, key, delta)
+        cls._adjust(cls.by_project.setdefault(project_id, Counter()), key, delta)
+        if not cls.by_project[project_id]:
+            del cls.by_project[project_id]
+        if entry is not None:
+            user_id = entry[1].id
+            cls._adjust(cls.by_user.setdefault(user_id, Counter()), key, delta)
+            if not cls.by_user[user_id]:
+                del cls.by_user[user_id]
+
+    @staticmethod
+    def _adjust(counter: Counter, key: Key, delta: int) -> None:
+        counter[key] += delta
+        if not counter[key]:
+            del counter[key]
+
+    @staticmethod
+    def _compare(label: str, expected: Counter, actual: Counter, problems: List[str]) -> None:
+        for key in sorted(set(expected) | set(actual), key=str):
+            if expected[key] != actual[key]:
+                status, priority, task_type = key
+                problems.append(
+                    f"{label}: {task_type} {status}/{priority} counted {actual[key]}, recount found {expected[key]}"
+                )
+
+
+def summarize(counts: Counter) -> Dict[str, Any]:
+    """
+    Totals by status, by priority and by type, plus the completion percentage, of one set of counters.
+    """
+    total = sum(counts.values())
+    by_status = {status.value: 0 for status in Status}
+    by_priority = {priority.value: 0 for priority in Priority}
+    by_type: Dict[str, int] = {}
+    for (status, priority, task_type), count in counts.items():
+        by_status[status.value] += count
+        by_priority[priority.value] += count
+        by_type[task_type] = by_type.get(task_type, 0) + count
+    completed = by_status[Status.COMPLETED.value]
+    return {
+        "total": total,
+        "completion": round(100 * completed / total, 1) if total else 0.0,
+        "by_status": by_status,
+        "by_priority": by_priority,
+        "by_type": dict(sorted(by_type.items())),
+        "counts": [
+            {"status": status.value, "priority": priority.value, "type": task_type, "count": count}
+            for (status, priority, task_type), count in sorted(counts.items(), key=str)
+        ]
+    }
+
+
+def _key(task: "Task") -> Key:
+    return task.status, task.priority, task._type
+
+
+Registry.subscribe(Aggregates)
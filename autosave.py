@@ -0,0 +1,138 @@
+"""
+Background autosave for the interactive CLI.
+
+Every change is already durable in the journal. Autosave keeps the journal short,
+so a crash loses nothing and a restart has little to replay. A daemon thread
+checks the policy every ``poll_interval`` seconds. A save is due when the journal
+holds ``max_changes`` records, or when changes have waited ``interval`` seconds.
+A save then folds the journal into ``users.json`` while the prompt stays live:
+
+1. Pre-copy: users changed since they were last encoded are re-encoded into
+   ``Users.fragments``, ``slice_size`` users at a time.
+2. Capture: with the model locked, the fragment of every user is collected and
+   the journal is rotated. Only users changed since step 1 are encoded here.
+   Fragments are immutable bytes, so later changes never reach the captured copy.
+3. Write: with the model unlocked, the fragments are joined and written
+   atomically as the new snapshot, and the rotated records are deleted.
+
+The CLI holds ``Autosave.lock`` while a menu action runs. Steps 1 and 2 therefore
+only run while the CLI waits at a prompt. A prompt answered meanwhile waits for
+at most one slice or the capture, never for the write.
+"""
+import sys
+import threading
+import time
+from typing import List, Optional
+from journal import Journal
+from stats import Stats
+from storage import Storage
+from user import User, Users
+
+
+class Autosave:
+    interval: float = 30.0
+    max_changes: int = 500
+    poll_interval: float = 1.0
+    slice_size: int = 256
+    # Held by the CLI while it changes the model, and by autosave while it reads it
+    lock = threading.Lock()
+
+    saves: int = 0
+    last_save: float = 0.0
+    last_error: Optional[str] = None
+    _thread: Optional[threading.Thread] = None
+    _stop = threading.Event()
+    _autocompact: bool = True
+
+    @classmethod
+    def start(cls) -> bool:
+        """
+        Start the autosave thread, unless ``interval`` is 0 or the storage backend has no journal to fold.
+        """
+        if cls._thread is not None or cls.interval <= 0 or not Storage.backend.autosave:
+            return False
+        # Saves keep the journal short, so the CLI never stops for a compaction.
+        cls._autocompact, Journal.autocompact = Journal.autocompact, False
+        cls.last_save = time.monotonic()
+        cls._stop.clear()
+        cls._thread = threading.Thread(target=cls._run, name="autosave", daemon=True)
+        cls._thread.start()
+        return True
+
+    @classmethod
+    def stop(cls) -> None:
+        """
+        Wait for a save in progress, then stop the thread.
+
+        If the session autosaved, finish with a full compaction, so the binary
+        snapshot and search postings match ``users.json`` again on the next start-up.
+        """
+        if cls._thread is None:
+            return
+        cls._stop.set()
+        cls._thread.join()
+        cls._thread = None
+        Journal.autocompact = cls._autocompact
+        if cls.saves:
+            Storage.save()
+
+    @classmethod
+    def due(cls) -> bool:
+        pending = Journal.record_count
+        if not pending:
+            return False
+        return (0 < cls.max_changes <= pending) or time.monotonic() - cls.last_save >= cls.interval
+
+    @classmethod
+    def save(cls) -> bool:
+        """
+        Fold the journal into the snapshot now.
+
+        Returns False if nothing changed, if ``stop`` interrupted the pre-copy, or if
+        a compaction wrote a newer snapshot first.
+        """
+        cls._precopy()
+        if cls._stop.is_set():
+            return False
+        with cls.lock, Stats.timer("autosave.capture"):
+            if not Journal.record_count:
+                return False
+            parts = [Users.fragment(user) for user in Users.users]
+            generation = Journal.rotate()
+        with Stats.timer("autosave.write"):
+            saved = Journal.write_checkpoint(Users.join_fragments(parts), generation)
+        cls.last_save = time.monotonic()
+        cls.saves += saved
+        return saved
+
+    @classmethod
+    def _precopy(cls) -> None:
+        with cls.lock:
+            users: List[User] = [user for user in Users.users if user._dirty or user.id not in Users.fragments]
+        for start in range(0, len(users), cls.slice_size):
+            if cls._stop.is_set():
+                return
+            with cls.lock:
+                for user in users[start:start + cls.slice_size]:
+                    # Skip users removed since the list was taken
+                    if user in Users.users:
+                        Users.fragment(user)
+
+    @classmethod
+    def _run(cls) -> None:
+        try:
+            while not cls._stop.wait(cls.poll_interval):
+                if not cls.due():
+                    continue
+                try:
+                    cls.save()
+                    cls.last_error = None
+                except Exception as e:
+                    # The rotated records are kept, so the next save covers them too.
+                    cls.last_save = time.monotonic()
+                    if cls.last_error is None:
+                        print(f"\nAutosave failed: {type(e).__name__}: {e}", file=sys.stderr)
+                    cls.last_error = f"{type(e).__name__}: {e}"
+        finally:
+            # Should the thread end anyway, the journal is compacted as usual again.
+            Journal.autocompact = cls._autocompact
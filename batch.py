@@ -0,0 +1,161 @@
+"""
+Non-interactive batch mode: run a file of commands against the in-memory model.
+
+Each non-blank line is one command, either a JSON object such as
+``{"cmd": "create_user", "name": "Ada", "surname": "Lovelace", "email": "ada@example.com"}``
+or a script line such as ``change_task_status task_id=12 status="In Progress"``.
+Lines starting with ``#`` are comments. Data is loaded once before the first
+command and saved once after the last, and every command prints one JSON result line.
+"""
+import json
+import shlex
+import sys
+from typing import Any, Callable, Dict, Optional, TextIO, Tuple
+import bulk
+import core
+from enums import Priority, Status
+from project import Project
+from stats import Stats
+from storage import Storage
+from task import Task
+from user import User
+
+
+def filter_tasks(
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    limit: Optional[int | str] = None,
+    offset: int | str = 0
+) -> Dict[str, Any]:
+    """
+    Filter by status or priority, given either as a value ("In Progress") or an enum name ("IN_PROGRESS").
+    """
+    if status is not None:
+        return core.filter_tasks_by_status(_enum_name(Status, status), limit, offset)
+    if priority is not None:
+        return core.filter_tasks_by_priority(_enum_name(Priority, priority), limit, offset)
+    raise ValueError("filter needs a status or a priority")
+
+
+def _enum_name(enum, text: str) -> str:
+    try:
+        return enum(text).name
+    except ValueError:
+        return enum[text.replace(" ", "_").upper()].name
+
+
+COMMANDS: Dict[str, Callable[..., Any]] = {
+    "get_user": core.get_user,
+    "get_project": core.get_project,
+    "get_task": core.get_task,
+    "create_user": core.create_user,
+    "update_user": core.update_user,
+    "remove_user": core.remove_user,
+    "list_users": core.list_users,
+    "create_project": core.create_project,
+    "update_project": core.update_project,
+    "remove_project": core.remove_project,
+    "list_projects": core.list_projects,
+    "create_task": core.create_task,
+    "update_task": core.update_task,
+    "remove_task": core.remove_task,
+    "list_tasks": core.list_tasks,
+    "change_task_status": core.change_task_status,
+    "filter": filter_tasks,
+    "overdue": core.overdue_projects,
+    "due_between": core.projects_due_between,
+    "due_within": core.projects_due_within,
+    "next_deadlines": core.next_deadlines,
+    "search": core.search,
+    "summary": core.summary,
+    "check_summary": core.check_summary,
+    "interning": core.interning_report,
+    "import": bulk.import_file,
+    "export": bulk.export_file,
+}
+
+
+def parse_command(line: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Split one command line into the command name and its keyword arguments.
+    """
+    if line.startswith("{"):
+        args = json.loads(line)
+        return args.pop("cmd"), args
+    name, *tokens = shlex.split(line)
+    args: Dict[str, Any] = {}
+    for token in tokens:
+        key, separator, value = token.partition("=")
+        if not separator:
+            raise ValueError(f"Expected key=value, got {token!r}")
+        args[key] = int(value) if key.endswith("id") and value.lstrip("-").isdigit() else value
+    return name, args
+
+
+def to_json(result: Any) -> Any:
+    """
+    Convert a command result into JSON-serializable data.
+    """
+    if isinstance(result, User):
+        return {"id": result.id, "name": result.name, "surname": result.surname, "email": result.email}
+    if isinstance(result, Project):
+        return {
+            "id": result.id,
+            "name": result.name,
+            "description": result.description,
+            "deadline": result.deadline.strftime('%Y-%m-%d') if result.deadline else None,
+            "tasks": len(result.tasks)
+        }
+    if isinstance(result, Task):
+        return result.to_dict()
+    if isinstance(result, dict):
+        return {str(key): to_json(value) for key, value in result.items()}
+    if isinstance(result, (list, tuple, set)):
+        return [to_json(value) for value in result]
+    return result
+
+
+def run_command(name: str, args: Dict[str, Any]) -> Any:
+    command = COMMANDS.get(name)
+    if command is None:
+        raise ValueError(f"Unknown command: {name}")
+    with Stats.timer(f"command.{name}"):
+        return to_json(command(**args))
+
+
+def run_lines(lines, out: TextIO = sys.stdout) -> int:
+    """
+    Run every command in ``lines`` and write one JSON result per command to ``out``.
+
+    Returns the number of failed commands; a failure does not stop the batch.
+    """
+    failures = 0
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        name = None
+        try:
+            name, args = parse_command(line)
+            result = {"line": number, "cmd": name, "ok": True, "result": run_command(name, args)}
+        except Exception as e:
+            failures += 1
+            result = {"line": number, "cmd": name, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        out.write(json.dumps(result) + "\n")
+    return failures
+
+
+def run_batch(path: str, out: TextIO = sys.stdout) -> int:
+    """
+    Load once, run the command file at ``path``, then save once. Returns the number of failed commands.
+    """
+    Storage.load()
+    Storage.recording = False
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            failures = run_lines(file, out)
+    finally:
+        Storage.recording = True
+        Storage.save()
+        Storage.close()
+    return failures
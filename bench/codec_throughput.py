@@ -0,0 +1,130 @@
+"""
+Compare the precompiled codecs (codec.py) with the previous dict-based path, in both directions.
+
+The previous path is reproduced here for reference: ``to_dict()`` trees passed to ``json.dumps``
+for encoding, and ``pop``/``if``-``elif`` dispatch into ``Task.__init__`` for decoding. Decoding is
+timed from already-parsed dicts, since ``json.loads`` is shared by both paths.
+
+Usage: python bench/codec_throughput.py [tasks] [--repeat N]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import codec  # noqa: E402
+import sequencer  # noqa: E402
+from bench.generate import generate  # noqa: E402
+from project import Project  # noqa: E402
+from task import DevTask, QATask, DocTask  # noqa: E402
+from user import User, Users  # noqa: E402
+
+
+def legacy_encode(users: List[User], compact: bool) -> bytes:
+    if compact:
+        return json.dumps([user.to_dict() for user in users], separators=(",", ":")).encode("ascii")
+    parts = ["    " + json.dumps(user.to_dict(), indent=4).replace("\n", "\n    ") for user in users]
+    return ("[\n" + ",\n".join(parts) + "\n]").encode("ascii")
+
+
+def legacy_task(data: Dict[str, Any]) -> Any:
+    task_type = data.pop('_type', None)
+    priority_map = {1: "Low", 2: "Medium", 3: "High", 4: "Critical"}
+    data['priority'] = priority_map.get(data.get("priority", 2), "Medium")
+    if task_type == 'DevTask':
+        return DevTask(**data)
+    elif task_type == 'QATask':
+        return QATask(**data)
+    elif task_type == 'DocTask':
+        return DocTask(**data)
+    raise ValueError(f"Unknown task type: {task_type}")
+
+
+def legacy_decode(data: List[Dict[str, Any]]) -> List[User]:
+    users = []
+    for user in data:
+        projects = set()
+        for project in user["projects"]:
+            tasks = {legacy_task(task) for task in project["tasks"]}
+            projects.add(Project(project["id"], project["name"], project["description"], tasks, project["deadline"]))
+        users.append(User(user["id"], user["name"], user["surname"], user["email"], projects))
+    return users
+
+
+def codec_decode(data: List[Dict[str, Any]]) -> List[User]:
+    decode_task = codec.decode_task
+    users = []
+    for user in data:
+        projects = set()
+        for project in user["projects"]:
+            tasks = {decode_task(task) for task in project["tasks"]}
+            projects.add(Project(project["id"], project["name"], project["description"], tasks, project["deadline"]))
+        users.append(User(user["id"], user["name"], user["surname"], user["email"], projects))
+    return users
+
+
+def timed(function: Callable[[], Any], repeat: int, setup: Callable[[], Any] = lambda: None) -> float:
+    """
+    Return the best wall-clock time of ``repeat`` calls, in seconds; ``setup`` runs untimed before each.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        setup()
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark codec.py against the dict-based JSON path")
+    parser.add_argument("tasks", type=int, nargs="?", default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "users.json")
+        generate(path, args.tasks)
+        with open(path, 'rb') as file:
+            raw = file.read()
+        users = list(sequencer.deserialize_from_file(path))
+
+    assert codec.encode_users(users) == legacy_encode(users, False)
+    assert codec.encode_users(users, True) == legacy_encode(users, True)
+    print(f"{args.tasks} tasks, {len(raw) / 1e6:.1f} MB")
+    print(f"{'':<22}{'legacy s':>10}{'codec s':>10}{'speed-up':>10}")
+
+    def report(label: str, legacy: float, new: float) -> None:
+        print(f"{label:<22}{legacy:>10.3f}{new:>10.3f}{legacy / new:>9.1f}x")
+
+    for compact in (False, True):
+        label = "encode compact" if compact else "encode indented"
+        report(label, timed(lambda: legacy_encode(users, compact), args.repeat),
+               timed(lambda: codec.encode_users(users, compact), args.repeat))
+    # Users.encode_users as save_to_file calls it, with every user dirty (the fragment cache empty)
+    report("save (all dirty)", timed(lambda: legacy_encode(users, False), args.repeat),
+           timed(lambda: Users.encode_users(users), args.repeat, lambda: setattr(Users, "fragments", {})))
+
+    # The legacy decoder pops from its input, so every run gets a freshly parsed tree.
+    parsed: Dict[str, Any] = {}
+    setup = lambda: parsed.update(data=json.loads(raw))  # noqa: E731
+    report("decode", timed(lambda: legacy_decode(parsed["data"]), args.repeat, setup),
+           timed(lambda: codec_decode(parsed["data"]), args.repeat, setup))
+    # Tasks alone, without the Project and User construction both paths share
+    tasks: List[Dict[str, Any]] = []
+    setup = lambda: tasks.__setitem__(  # noqa: E731
+        slice(None), [task for user in json.loads(raw) for project in user["projects"] for task in project["tasks"]]
+    )
+    report("decode tasks", timed(lambda: [legacy_task(task) for task in tasks], args.repeat, setup),
+           timed(lambda: list(map(codec.decode_task, tasks)), args.repeat, setup))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Deterministic generator of synthetic users.json files.
+
+The output has the same shape and formatting as ``Users.save_to_file``: users own
+projects, projects own a mix of DevTask/QATask/DocTask tasks, and statuses and
+priorities follow fixed, realistic weights. The same arguments and seed always
+produce the same file.
+
+Usage: python bench/generate.py OUTPUT --tasks N [--tasks-per-project 10] [--projects-per-user 5] [--seed 0]
+"""
+import argparse
+import json
+import os
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, List, Tuple
+
+STATUS_WEIGHTS: List[Tuple[str, int]] = [("Not Started", 50), ("In Progress", 30), ("Completed", 20)]
+# Priorities are stored as 1..4 (Low..Critical), as Task.to_dict writes them.
+PRIORITY_WEIGHTS: List[Tuple[int, int]] = [(1, 30), (2, 40), (3, 20), (4, 10)]
+TYPE_WEIGHTS: List[Tuple[str, int]] = [("DevTask", 50), ("QATask", 30), ("DocTask", 20)]
+DETAILS: Dict[str, Tuple[str, List[str]]] = {
+    "DevTask": ("language", ["Python", "Java", "Go", "TypeScript", "Rust", "C++"]),
+    "QATask": ("test_type", ["Automated", "Manual", "Regression", "Smoke testing", "Load"]),
+    "DocTask": ("document", ["Markdown", "Wiki", "PDF", "Docstring"]),
+}
+VERBS = ["Implement", "Fix", "Refactor", "Review", "Test", "Document", "Investigate", "Optimize"]
+NOUNS = ["login flow", "checkout", "search index", "payment API", "user profile", "report export",
+         "cache layer", "notification service", "admin panel", "data import"]
+FIRST_NAMES = ["John", "Alice", "Maria", "Andrei", "Chen", "Fatima", "Lucas", "Ana", "Omar", "Ioana"]
+SURNAMES = ["Doe", "Popescu", "Smith", "Garcia", "Ionescu", "Kim", "Müller", "Rossi", "Novak", "Silva"]
+
+
+def _choices(rng: random.Random, weighted: List[Tuple[Any, int]], count: int) -> List[Any]:
+    values, weights = zip(*weighted)
+    return rng.choices(values, weights, k=count)
+
+
+def generate_user(rng: random.Random, user_id: int, next_ids: Dict[str, int],
+                  projects_per_user: int, tasks_per_project: int) -> Dict[str, Any]:
+    """
+    Build one user dict; ``next_ids`` holds the next project and task IDs and is advanced in place.
+    """
+    projects = []
+    for _ in range(projects_per_user):
+        project_id = next_ids["project"]
+        next_ids["project"] += 1
+        statuses = _choices(rng, STATUS_WEIGHTS, tasks_per_project)
+        priorities = _choices(rng, PRIORITY_WEIGHTS, tasks_per_project)
+        types = _choices(rng, TYPE_WEIGHTS, tasks_per_project)
+        tasks = []
+        for status, priority, task_type in zip(statuses, priorities, types):
+            task_id = next_ids["task"]
+            next_ids["task"] += 1
+            field, values = DETAILS[task_type]
+            noun = rng.choice(NOUNS)
+            tasks.append({
+                "id": task_id,
+                "name": f"{rng.choice(VERBS)} {noun} #{task_id}",
+                "description": f"{rng.choice(VERBS)} the {noun} for project {project_id}",
+                "status": status,
+                "_type": task_type,
+                "priority": priority,
+                field: rng.choice(values)
+            })
+        deadline = date(2025, 1, 1) + timedelta(days=rng.randrange(730))
+        projects.append({
+            "id": project_id,
+            "name": f"Project {project_id}",
+            "description": f"{rng.choice(NOUNS).capitalize()} work stream {project_id}",
+            "tasks": tasks,
+            "deadline": deadline.isoformat()
+        })
+    name, surname = rng.choice(FIRST_NAMES), rng.choice(SURNAMES)
+    return {
+        "id": user_id,
+        "name": name,
+        "surname": surname,
+        "email": f"{name.lower()}.{surname.lower()}{user_id}@example.com",
+        "projects": projects
+    }
+
+
+def generate(path: str, tasks: int, tasks_per_project: int = 10, projects_per_user: int = 5, seed: int = 0) -> Dict[str, int]:
+    """
+    Write a synthetic users.json to ``path`` one user at a time and return the entity counts.
+
+    The task count is rounded up to a whole number of users.
+    """
+    rng = random.Random(seed)
+    tasks_per_user = tasks_per_project * projects_per_user
+    user_count = max(1, -(-tasks // tasks_per_user))
+    # Users, projects and tasks get disjoint ID ranges, as IDManager would hand them out.
+    next_ids = {"project": user_count + 1, "task": user_count + user_count * projects_per_user + 1}
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as file:
+        file.write("[\n")
+        for user_id in range(1, user_count + 1):
+            if user_id > 1:
+                file.write(",\n")
+            user = generate_user(rng, user_id, next_ids, projects_per_user, tasks_per_project)
+            file.write("    " + json.dumps(user, indent=4).replace("\n", "\n    "))
+        file.write("\n]")
+    return {
+        "users": user_count,
+        "projects": user_count * projects_per_user,
+        "tasks": user_count * tasks_per_user
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output")
+    parser.add_argument("--tasks", type=int, required=True)
+    parser.add_argument("--tasks-per-project", type=int, default=10)
+    parser.add_argument("--projects-per-user", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    counts = generate(args.output, args.tasks, args.tasks_per_project, args.projects_per_user, args.seed)
+    print(f"Wrote {counts['users']} users, {counts['projects']} projects, {counts['tasks']} tasks to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
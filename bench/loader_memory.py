@@ -0,0 +1,40 @@
+"""
+Compare peak Python heap usage of the streaming and eager JSON loaders.
+
+Usage: python bench/loader_memory.py [path/to/users.json]
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sequencer  # noqa: E402
+
+
+def measure(filename: str, streaming: bool) -> tuple[float, int, int]:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    users = sequencer.deserialize_from_file(filename, streaming=streaming)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(users)
+    del users
+    return elapsed, peak, count
+
+
+def main() -> None:
+    filename = sys.argv[1] if len(sys.argv) > 1 else "data/users.json"
+    size = os.path.getsize(filename)
+    print(f"{filename}: {size / 2**20:.1f} MiB")
+    for label, streaming in (("eager (json.load)", False), ("streaming", True)):
+        elapsed, peak, count = measure(filename, streaming)
+        print(f"{label:<20} users={count:<8} time={elapsed:8.3f}s peak={peak / 2**20:10.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
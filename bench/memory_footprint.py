@@ -0,0 +1,81 @@
+"""
+Report the memory footprint of the entity classes for synthetic datasets.
+
+Each dataset size runs in a fresh subprocess so the reported peak RSS is not
+polluted by earlier runs. Per-entity figures come from tracemalloc and include
+the entity's own strings (names, descriptions, ...) and containers.
+
+Usage: python bench/memory_footprint.py [task_count ...]
+"""
+import gc
+import os
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from project import Project  # noqa: E402
+from task import DevTask, DocTask, QATask  # noqa: E402
+from user import User  # noqa: E402
+
+TASKS_PER_PROJECT = 10
+PROJECTS_PER_USER = 10
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def make_task(n: int):
+    kind = n % 3
+    if kind == 0:
+        return DevTask(n, f"Task {n}", f"Implement feature {n}", "Medium", "Python")
+    if kind == 1:
+        return QATask(n, f"Task {n}", f"Verify feature {n}", "High", "Regression")
+    return DocTask(n, f"Task {n}", f"Document feature {n}", "Low", "Markdown")
+
+
+def measure(task_count: int) -> None:
+    gc.collect()
+    tracemalloc.start()
+
+    tasks = [make_task(n) for n in range(task_count)]
+    after_tasks = tracemalloc.get_traced_memory()[0]
+
+    projects = []
+    for start in range(0, task_count, TASKS_PER_PROJECT):
+        n = start // TASKS_PER_PROJECT
+        projects.append(Project(n, f"Project {n}", f"Project number {n}",
+                                set(tasks[start:start + TASKS_PER_PROJECT]), "2030-01-01"))
+    after_projects = tracemalloc.get_traced_memory()[0]
+
+    users = []
+    for start in range(0, len(projects), PROJECTS_PER_USER):
+        n = start // PROJECTS_PER_USER
+        users.append(User(n, f"User {n}", "Bench", f"user{n}@example.com",
+                          set(projects[start:start + PROJECTS_PER_USER])))
+    after_users = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # The lists holding the entities are benchmark scaffolding, not part of the footprint.
+    scaffolding = sys.getsizeof(tasks) + sys.getsizeof(projects) + sys.getsizeof(users)
+    rss_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"{task_count:>9} tasks | "
+        f"{(after_tasks - sys.getsizeof(tasks)) / len(tasks):7.1f} B/task | "
+        f"{(after_projects - after_tasks - sys.getsizeof(projects)) / len(projects):8.1f} B/project | "
+        f"{(after_users - after_projects - sys.getsizeof(users)) / len(users):8.1f} B/user | "
+        f"total {(after_users - scaffolding) / 2**20:8.1f} MiB | peak RSS {rss_mib:8.1f} MiB"
+    )
+
+
+def main() -> None:
+    if len(sys.argv) > 2 and sys.argv[1] == "--size":
+        measure(int(sys.argv[2]))
+        return
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--size", str(size)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Benchmark suite for the load, save, filter and lookup paths.
+
+For every requested size a synthetic users.json is generated (see generate.py),
+then each operation is timed as the CLI performs it. Results are written as
+JSON so runs can be compared; pass --baseline to print the ratio against an
+earlier results file.
+
+Usage: python bench/run.py [--sizes 1000 10000 100000 1000000] [--output bench/results.json] [--baseline old.json]
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core  # noqa: E402
+import render  # noqa: E402
+import sequencer  # noqa: E402
+import snapshot  # noqa: E402
+from columnar import ColumnarTasks  # noqa: E402
+from bench.generate import generate  # noqa: E402
+from enums import Priority, Status  # noqa: E402
+from registry import Registry  # noqa: E402
+from user import Users  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+LOOKUP_SAMPLES = 10_000
+
+
+def timed(function: Callable[[], Any], repeat: int = 1) -> float:
+    """
+    Return the best wall-clock time of ``repeat`` calls, in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_size(tasks: int, directory: str, repeat: int) -> Dict[str, Any]:
+    path = os.path.join(directory, f"users-{tasks}.json")
+    counts = generate(path, tasks)
+    result: Dict[str, Any] = {"counts": counts, "file_bytes": os.path.getsize(path), "seconds": {}}
+    seconds = result["seconds"]
+
+    loaded: Dict[str, Any] = {}
+    seconds["deserialize_from_file"] = timed(
+        lambda: loaded.update(users=sequencer.deserialize_from_file(path)), repeat
+    )
+    seconds["registry_rebuild"] = timed(lambda: Users.set_users(loaded["users"]), repeat)
+
+    # Freshly loaded users are all dirty, so the first save encodes everything.
+    save_path = os.path.join(directory, "saved.json")
+    seconds["save_to_file_cold"] = timed(lambda: Users.save_to_file(save_path))
+    seconds["save_to_file_clean"] = timed(lambda: Users.save_to_file(save_path), repeat)
+
+    binary_path = os.path.join(directory, "saved.bin")
+    seconds["write_binary_snapshot"] = timed(lambda: snapshot.write_snapshot(binary_path, Users.users), repeat)
+    seconds["read_binary_snapshot"] = timed(lambda: snapshot.read_snapshot(binary_path), repeat)
+    os.remove(binary_path)
+
+    for status in Status:
+        seconds[f"filter_by_status[{status.name}]"] = timed(lambda: core.filter_tasks_by_status(status.name), repeat)
+    for priority in Priority:
+        seconds[f"filter_by_priority[{priority.name}]"] = timed(
+            lambda: core.filter_tasks_by_priority(priority.name), repeat
+        )
+
+    seconds["summary"] = timed(core.summary, repeat)
+    # The same filters and summary answered from the columnar mirror instead of the indexes
+    seconds["columnar_enable"] = timed(lambda: (ColumnarTasks.disable(), ColumnarTasks.enable()), repeat)
+    seconds["filter_by_status_columnar[IN_PROGRESS]"] = timed(lambda: core.filter_tasks_by_status("IN_PROGRESS"), repeat)
+    seconds["filter_by_priority_columnar[HIGH]"] = timed(lambda: core.filter_tasks_by_priority("HIGH"), repeat)
+    seconds["summary_columnar"] = timed(core.summary, repeat)
+    ColumnarTasks.disable()
+
+    # Display State into an in-memory stream: the whole state, and only the first interactive page.
+    seconds["render_state"] = timed(lambda: render.write_lines(render.state_lines(Users.users), io.StringIO()), repeat)
+    seconds["render_first_page"] = timed(
+        lambda: render.Pager(render.state_lines(Users.users)).run(io.StringIO(), prompt=lambda _: "q"), repeat
+    )
+
+    # The chained user -> project -> task lookups every main.py action performs.
+    rng = random.Random(0)
+    samples = [Registry.locate_task(task_id) for task_id in rng.choices(list(Registry.tasks), k=LOOKUP_SAMPLES)]
+    keys = [(user.id, project.id, task.id) for user, project, task in samples]
+
+    def lookups() -> None:
+        for user_id, project_id, task_id in keys:
+            user = Registry.get_user(user_id)
+            project = Registry.get_project(project_id, owner=user)
+            Registry.get_task(task_id, owner=project)
+
+    seconds["lookup_chain_per_op"] = timed(lookups, repeat) / len(keys)
+
+    Users.set_users(set())
+    loaded.clear()
+    os.remove(path)
+    return result
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    for size, current in results["sizes"].items():
+        previous = baseline.get("sizes", {}).get(size)
+        if not previous:
+            continue
+        print(f"\n{size} tasks vs baseline:")
+        for name, value in current["seconds"].items():
+            before = previous["seconds"].get(name)
+            if before:
+                print(f"  {name:<34} {value / before:6.2f}x")
+
+
+def main_cli(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark load/save/filter/lookup paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="task counts to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions per measurement (best is kept)")
+    parser.add_argument("--output", default="bench/results.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Any] = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": {}
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            result = run_size(size, directory, args.repeat)
+            results["sizes"][str(size)] = result
+            print(f"\n{size} tasks ({result['file_bytes'] / 2**20:.1f} MiB):")
+            for name, value in result["seconds"].items():
+                print(f"  {name:<34} {value * 1000:12.3f} ms")
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=4)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            compare(results, json.load(file))
+
+
+if __name__ == "__main__":
+    main_cli()
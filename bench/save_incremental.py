@@ -0,0 +1,66 @@
+"""
+Time Users.save_to_file after modifying a fraction of tasks, with and without
+the per-user fragment cache.
+
+Usage: python bench/save_incremental.py [users] [projects_per_user] [tasks_per_project] [fraction]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enums import Status  # noqa: E402
+from project import Project  # noqa: E402
+from registry import Registry  # noqa: E402
+from task import DevTask  # noqa: E402
+from user import User, Users  # noqa: E402
+
+
+def build(users: int, projects: int, tasks: int) -> None:
+    population = set()
+    for u in range(users):
+        user = User(None, f"User {u}", "Bench", f"user{u}@example.com")
+        for p in range(projects):
+            project = Project(None, f"Project {u}-{p}", "Benchmark project", None, "2030-01-01")
+            for t in range(tasks):
+                project.add_task(DevTask(None, f"Task {t}", "Benchmark task", "Medium", "Python"))
+            user.add_project(project)
+        population.add(user)
+    Users.set_users(population)
+
+
+def timed_save(filename: str) -> float:
+    start = time.perf_counter()
+    Users.save_to_file(filename)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    users, projects, tasks = (int(arg) for arg in sys.argv[1:4]) if len(sys.argv) > 3 else (10000, 2, 5)
+    fraction = float(sys.argv[4]) if len(sys.argv) > 4 else 0.01
+    build(users, projects, tasks)
+    all_tasks = [task for task, _ in Registry.tasks.values()]
+    print(f"{len(Users.users)} users, {len(all_tasks)} tasks, modifying {fraction:.1%}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "users.json")
+        print(f"cold save (everything dirty):  {timed_save(filename):8.3f}s")
+
+        random.seed(0)
+        for task in random.sample(all_tasks, max(1, int(len(all_tasks) * fraction))):
+            task.change_status(Status.IN_PROGRESS)
+        dirty = sum(1 for user in Users.users if user._dirty)
+        print(f"dirty users: {dirty} of {len(Users.users)}")
+        print(f"incremental save:              {timed_save(filename):8.3f}s")
+
+        for task in random.sample(all_tasks, max(1, int(len(all_tasks) * fraction))):
+            task.change_status(Status.COMPLETED)
+        Users.fragments = {}
+        print(f"full re-encode (cache dropped): {timed_save(filename):7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
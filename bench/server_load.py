@@ -0,0 +1,131 @@
+"""
+Load generator for server mode (``python main.py --serve``): measures requests/sec and latency percentiles.
+
+Each connection keeps up to ``--pipeline`` requests in flight. The request mix is
+mostly reads (``get_task``) with a share of ``change_task_status`` writes. A
+request's latency runs from writing it to reading its response.
+
+By default a server is started on a Unix socket in a temporary directory holding
+a generated data set. Pass ``--address`` to load an already running server instead;
+it should serve the data set generate.py writes for the same ``--tasks``.
+
+Usage: python bench/server_load.py [--tasks 10000] [--connections 4] [--requests 20000] [--pipeline 16] [--writes 0.2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.generate import generate  # noqa: E402
+from server import parse_address  # noqa: E402
+
+STATUSES = ["Not Started", "In Progress", "Completed"]
+
+
+async def connect(address: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    host, port, path = parse_address(address)
+    if path is not None:
+        return await asyncio.open_unix_connection(path)
+    return await asyncio.open_connection(host, port)
+
+
+async def client(address: str, task_ids: List[int], requests: int, pipeline: int, writes: float,
+                 seed: int, latencies: List[float]) -> int:
+    """
+    Send ``requests`` requests over one connection and return how many failed.
+    """
+    rng = random.Random(seed)
+    reader, writer = await connect(address)
+    sent_at: List[float] = []
+    failures = 0
+
+    async def receive(count: int) -> None:
+        nonlocal failures
+        for _ in range(count):
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - sent_at[response["id"]])
+            failures += not response["ok"]
+
+    in_flight = 0
+    for request_id in range(requests):
+        task_id = rng.choice(task_ids)
+        if rng.random() < writes:
+            request = {"id": request_id, "cmd": "change_task_status", "task_id": task_id, "status": rng.choice(STATUSES)}
+        else:
+            request = {"id": request_id, "cmd": "get_task", "task_id": task_id}
+        sent_at.append(time.perf_counter())
+        writer.write(json.dumps(request).encode("utf-8") + b"\n")
+        in_flight += 1
+        if in_flight >= pipeline:
+            await writer.drain()
+            # Wait for the oldest half before sending more, so the pipeline stays full.
+            await receive(in_flight // 2)
+            in_flight -= in_flight // 2
+    await writer.drain()
+    await receive(in_flight)
+    writer.close()
+    return failures
+
+
+async def run(address: str, task_ids: List[int], args: argparse.Namespace) -> None:
+    latencies: List[float] = []
+    per_connection = args.requests // args.connections
+    start = time.perf_counter()
+    failures = await asyncio.gather(*(
+        client(address, task_ids, per_connection, args.pipeline, args.writes, seed, latencies)
+        for seed in range(args.connections)
+    ))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    def percentile(fraction: float) -> float:
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+
+    print(f"{len(latencies)} requests over {args.connections} connections, pipeline {args.pipeline}, "
+          f"{args.writes:.0%} writes")
+    print(f"{len(latencies) / elapsed:,.0f} requests/s, "
+          f"p50 {percentile(0.50):.2f} ms, p95 {percentile(0.95):.2f} ms, p99 {percentile(0.99):.2f} ms")
+    if sum(failures):
+        print(f"{sum(failures)} requests failed")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure server-mode throughput and latency")
+    parser.add_argument("--address", help="address of a running server; by default one is started")
+    parser.add_argument("--tasks", type=int, default=10_000, help="size of the generated data set")
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=20_000, help="total requests over all connections")
+    parser.add_argument("--pipeline", type=int, default=16, help="requests in flight per connection")
+    parser.add_argument("--writes", type=float, default=0.2, help="fraction of requests that change a task")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        counts = generate(os.path.join(directory, "data", "users.json"), args.tasks)
+        task_ids = list(range(counts["users"] + counts["projects"] + 1,
+                              counts["users"] + counts["projects"] + counts["tasks"] + 1))
+        if args.address:
+            asyncio.run(run(args.address, task_ids, args))
+            return
+
+        address = os.path.join(directory, "server.sock")
+        process = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py"), "--serve", address],
+                                   cwd=directory, stdout=subprocess.PIPE, text=True)
+        try:
+            process.stdout.readline()  # "Serving on ..."
+            asyncio.run(run(address, task_ids, args))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compare cold-start load time of users.json (sequencer.deserialize_from_file) with the binary
+snapshot, and with reading a single user from the memory-mapped snapshot.
+
+Each load runs in a fresh subprocess so neither path benefits from a warm heap.
+
+Usage: python bench/snapshot_load.py [tasks]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import sequencer  # noqa: E402
+import snapshot  # noqa: E402
+from bench.generate import generate  # noqa: E402
+
+LOADERS = {
+    "json": "sequencer.deserialize_from_file({path!r})",
+    "binary": "snapshot.read_snapshot({path!r})",
+    # One user with all projects and tasks, without loading anything else
+    "mapped": "snapshot.MappedSnapshot({path!r}).get_user(1)",
+}
+
+
+def cold_load(kind: str, path: str) -> float:
+    """
+    Time one load of ``path`` in a new interpreter, excluding interpreter start-up and imports.
+    """
+    code = (
+        f"import sys, time; sys.path.insert(0, {ROOT!r}); import sequencer, snapshot; "
+        f"start = time.perf_counter(); {LOADERS[kind].format(path=path)}; print(time.perf_counter() - start)"
+    )
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return float(output)
+
+
+def main() -> None:
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "users.json")
+        binary_path = os.path.join(directory, "users.bin")
+        counts = generate(json_path, tasks)
+        users = sequencer.deserialize_from_file(json_path)
+        start = time.perf_counter()
+        snapshot.write_snapshot(binary_path, users)
+        write_seconds = time.perf_counter() - start
+        del users
+
+        print(f"{counts['users']} users, {counts['projects']} projects, {counts['tasks']} tasks")
+        print(f"users.json: {os.path.getsize(json_path) / 2**20:8.1f} MiB")
+        print(f"users.bin:  {os.path.getsize(binary_path) / 2**20:8.1f} MiB  (written in {write_seconds:.2f}s)")
+        json_seconds = cold_load("json", json_path)
+        binary_seconds = cold_load("binary", binary_path)
+        print(f"deserialize_from_file: {json_seconds:8.2f}s")
+        print(f"read_snapshot:         {binary_seconds:8.2f}s  ({json_seconds / binary_seconds:.1f}x faster)")
+        print(f"MappedSnapshot, 1 user: {cold_load('mapped', binary_path) * 1000:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Streaming bulk import and export of users, projects and tasks as CSV or JSONL.
+
+Both formats hold one flat row per task, with its user and project repeated:
+``COLUMNS`` lists the fields. A row may also stop after the user or project columns
+to create a user with no projects or a project with no tasks. Export writes such
+rows for users and projects without tasks, so an export can be imported again.
+
+On import, users are matched by email and projects by name within their user.
+Either is created when no match exists. Every task row creates a task. The ID
+columns are written for reference only and are ignored on import. Rows are read
+and committed ``chunk_size`` at a time, so neither side holds the whole file.
+Within a chunk, every row is first parsed into entities by their constructors,
+which validate priority, status and deadline. Then the chunk's new IDs are
+reserved from ``IDManager`` in one call per entity type. Last, the rows are
+applied and committed together through ``Storage.chunk``. A row that fails is
+reported with its line number and skipped; the other rows are still imported.
+"""
+import csv
+import json
+import os
+import time
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from core import TASK_TYPES
+from id_manager import IDManager
+from interning import DETAIL_FIELDS
+from project import Project
+from registry import Registry
+from storage import Storage
+from task import Task
+from user import User, Users
+
+
+COLUMNS: List[str] = [
+    "user_id", "name", "surname", "email",
+    "project_id", "project", "project_description", "deadline",
+    "task_id", "type", "task", "task_description", "priority", "status", "detail",
+]
+CHUNK_SIZE: int = 1000
+
+# (line number, row), or the error that made the line unreadable
+Row = Tuple[int, Dict[str, Any] | ValueError]
+
+
+def detect_format(path: str, format: Optional[str] = None) -> str:
+    """
+    ``format`` if given, else "csv" or "jsonl" from the file extension.
+    """
+    format = format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    if format not in ("csv", "jsonl"):
+        raise ValueError(f"Unknown format: {format} (expected csv or jsonl)")
+    return format
+
+
+def read_rows(path: str, format: Optional[str] = None) -> Iterator[Row]:
+    """
+    Stream the rows of ``path`` with their line numbers; blank JSONL lines are skipped.
+
+    A JSONL line that is not valid JSON is yielded as its ValueError, so it fails on its own.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        if detect_format(path, format) == "csv":
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield number, json.loads(line)
+                except ValueError as e:
+                    yield number, e
+
+
+class Importer:
+    """
+    Applies rows in chunks, keeping the email and project-name lookups across chunks.
+    """
+    def __init__(self) -> None:
+        self.users: Dict[str, User] = {}
+        for user in sorted(Users.users, key=lambda user: user.id):
+            self.users.setdefault(user.email, user)
+        # Projects by (email, name), indexed per user on first use so untouched users stay unloaded
+        self.projects: Dict[Tuple[str, str], Project] = {}
+        self.indexed: Set[str] = set()
+        self.created = {"users": 0, "projects": 0, "tasks": 0}
+        self.errors: List[Tuple[int, str]] = []
+
+    def import_chunk(self, rows: List[Row]) -> None:
+        plans: List[Tuple[int, Optional[User], Optional[Project], Optional[Task]]] = []
+        new_users: List[User] = []
+        new_projects: List[Project] = []
+        new_tasks: List[Task] = []
+        for number, row in rows:
+            try:
+                if isinstance(row, ValueError):
+                    raise row
+                plans.append((number, *self._parse(row, new_users, new_projects, new_tasks)))
+            except (ValueError, KeyError, TypeError) as e:
+                self.errors.append((number, f"{type(e).__name__}: {e}"))
+
+        for entity, entities in (("user", new_users), ("project", new_projects), ("task", new_tasks)):
+            if entities:
+                for entity_object, new_id in zip(entities, IDManager.reserve(entity, len(entities))):
+                    entity_object.id = new_id
+
+        with Storage.chunk():
+            for number, user, project, task in plans:
+                try:
+                    self._apply(user, project, task)
+                except (ValueError, KeyError, TypeError) as e:
+                    self.errors.append((number, f"{type(e).__name__}: {e}"))
+
+    def _parse(
+        self,
+        row: Dict[str, Any],
+        new_users: List[User],
+        new_projects: List[Project],
+        new_tasks: List[Task]
+    ) -> Tuple[User, Optional[Project], Optional[Task]]:
+        """
+        Resolve or build the row's user, project and task; new entities get their IDs later.
+        """
+        if not isinstance(row, dict):
+            raise ValueError("A row must be a JSON object")
+        email = _text(row, "email")
+        if not email:
+            raise ValueError("email is required")
+        user = self.users.get(email)
+        if user is None:
+            name, surname = _text(row, "name"), _text(row, "surname")
+            if not name or not surname:
+                raise ValueError(f"name and surname are required for new user {email}")
+            user = self.users[email] = User(0, name, surname, email)
+            new_users.append(user)
+
+        project_name = _text(row, "project")
+        task_name = _text(row, "task")
+        if not project_name:
+            if task_name:
+                raise ValueError("a task needs a project")
+            return user, None, None
+        if email not in self.indexed:
+            self.indexed.add(email)
+            for project in user.projects:
+                self.projects.setdefault((email, project.name), project)
+        project = self.projects.get((email, project_name))
+        if project is None:
+            deadline = _text(row, "deadline")
+            project = Project(0, project_name, _text(row, "project_description"), None, deadline or None)
+            self.projects[(email, project_name)] = project
+            new_projects.append(project)
+
+        if not task_name:
+            return user, project, None
+        task_type = _text(row, "type")
+        task_class = TASK_TYPES.get(task_type)
+        if task_class is None:
+            raise ValueError(f"Invalid task type: {task_type!r}")
+        task = task_class(
+            0, task_name, _text(row, "task_description"), _text(row, "priority") or "Medium",
+            **{DETAIL_FIELDS[task_type]: _text(row, "detail")},
+            status=_text(row, "status") or "Not Started"
+        )
+        new_tasks.append(task)
+        return user, project, task
+
+    def _apply(self, user: User, project: Optional[Project], task: Optional[Task]) -> None:
+        """
+        Register whichever of the row's entities are still new, recording each like the matching core function.
+        """
+        if not Registry.is_user_registered(user):
+            Users.add_user(user)
+            Storage.record("create_user", user=user.to_dict())
+            self.created["users"] += 1
+        if project is not None and not Registry.is_project_registered(project):
+            user.add_project(project)
+            Storage.record("create_project", user_id=user.id, project=project.to_dict())
+            self.created["projects"] += 1
+        if task is not None:
+            project.add_task(task)
+            Storage.record("create_task", project_id=project.id, task=task.to_dict())
+            self.created["tasks"] += 1
+
+
+def import_file(path: str, format: Optional[str] = None, chunk_size: int | str = CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Import every row of ``path``, committing every ``chunk_size`` rows.
+
+    Returns the row count, the entities created, the per-row errors and the throughput.
+    """
+    chunk_size = int(chunk_size)
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    importer = Importer()
+    rows = read_rows(path, format)
+    count = 0
+    start = time.perf_counter()
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        importer.import_chunk(chunk)
+        count += len(chunk)
+    seconds = time.perf_counter() - start
+    return {
+        "rows": count,
+        "created": importer.created,
+        "errors": [{"line": number, "error": error} for number, error in importer.errors],
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(count / seconds) if seconds else 0
+    }
+
+
+def iter_export_rows(users: Iterable[User]) -> Iterator[Dict[str, Any]]:
+    """
+    One row per task, or per user or project without any, in ID order.
+    """
+    for user in sorted(users, key=lambda user: user.id):
+        user_columns = {"user_id": user.id, "name": user.name, "surname": user.surname, "email": user.email}
+        if not user.projects:
+            yield user_columns
+        for project in sorted(user.projects, key=lambda project: project.id):
+            project_columns = {
+                **user_columns,
+                "project_id": project.id,
+                "project": project.name,
+                "project_description": project.description,
+                "deadline": project.deadline.strftime('%Y-%m-%d') if project.deadline else ""
+            }
+            if not project.tasks:
+                yield project_columns
+            for task in sorted(project.tasks, key=lambda task: task.id):
+                yield {
+                    **project_columns,
+                    "task_id": task.id,
+                    "type": task._type,
+                    "task": task.name,
+                    "task_description": task.description,
+                    "priority": task.priority.value,
+                    "status": task.status.value,
+                    "detail": getattr(task, DETAIL_FIELDS[task._type])
+                }
+
+
+def export_file(path: str, format: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write every user, project and task to ``path`` row by row. Returns the row count and the throughput.
+    """
+    format = detect_format(path, format)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    count = 0
+    start = time.perf_counter()
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        rows = iter_export_rows(Users.users)
+        if format == "csv":
+            writer = csv.DictWriter(file, COLUMNS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                file.write(json.dumps(row) + "\n")
+                count += 1
+    seconds = time.perf_counter() - start
+    return {"rows": count, "seconds": round(seconds, 3), "rows_per_sec": round(count / seconds) if seconds else 0}
+
+
+def _text(row: Dict[str, Any], column: str) -> str:
+    value = row.get(column)
+    return "" if value is None else str(value).strip()
@@ -0,0 +1,231 @@
+"""
+Precompiled JSON codecs for users, projects and tasks.
+
+Every task class is registered with a ``TaskCodec`` naming its type tag and
+type-specific detail field. Encoders are compiled once per nesting level and
+output mode into closures with all keys, separators and enum values already
+rendered, and append string fragments to a caller-supplied list instead of
+building intermediate dicts. Indented output is byte-for-byte what
+``json.dumps(obj.to_dict(), indent=4)`` produces at that level; compact output
+matches ``separators=(",", ":")``.
+
+Decoders build tasks straight from a parsed dict without going through
+``__init__`` and without mutating the dict.
+"""
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii as encode_string
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Type
+from enums import Priority, Status
+from interning import Interning
+from task import Task, DevTask, QATask, DocTask, PRIORITY_CODES, PRIORITIES_BY_CODE
+
+
+INDENT: int = 4
+
+# Appends the JSON text of one object to a list of fragments
+Encoder = Callable[[Any, List[str]], None]
+
+STATUSES: Dict[str, Status] = {status.value: status for status in Status}
+
+
+class Layout:
+    """
+    Pre-rendered whitespace for the members of a container nested ``level`` deep.
+    """
+    __slots__ = ('open', 'item', 'close', 'colon')
+
+    def __init__(self, level: int, compact: bool):
+        if compact:
+            self.open, self.item, self.close, self.colon = "", ",", "", ":"
+        else:
+            self.open = "\n" + " " * (INDENT * (level + 1))
+            self.item = "," + self.open
+            self.close = "\n" + " " * (INDENT * level)
+            self.colon = ": "
+
+    def keys(self, names: List[str]) -> List[str]:
+        """
+        Render the text in front of each member of an object with the given keys, in order.
+        """
+        first, *rest = names
+        return ["{" + self.open + encode_string(first) + self.colon] + [
+            self.item + encode_string(name) + self.colon for name in rest
+        ]
+
+    def array(self, items: Iterable[Any], encode: Encoder, out: List[str]) -> None:
+        """
+        Append the members of a JSON array, each encoded by ``encode``.
+        """
+        start = len(out)
+        for item in items:
+            out.append(self.item)
+            encode(item, out)
+        if len(out) == start:
+            out.append("[]")
+        else:
+            out[start] = "[" + self.open
+            out.append(self.close + "]")
+
+
+class TaskCodec:
+    """
+    Encoder and decoder for one task class.
+    """
+    def __init__(self, cls: Type[Task], field: str):
+        self.cls = cls
+        self.type: str = cls._type
+        self.field = field
+        self.decode: Callable[[Dict[str, Any]], Task] = self._compile_decoder()
+
+    @lru_cache(maxsize=None)
+    def encoder(self, level: int, compact: bool) -> Encoder:
+        """
+        Return an encoder for tasks of this class nested ``level`` deep.
+        """
+        layout = Layout(level, compact)
+        id_key, name_key, description_key, status_key, type_key, priority_key, detail_key = layout.keys(
+            ["id", "name", "description", "status", "_type", "priority", self.field]
+        )
+        # Status, type tag and priority only take a few values, so render them together with their keys.
+        type_text = type_key + encode_string(self.type) + priority_key
+        statuses = {status: status_key + encode_string(status.value) + type_text for status in Status}
+        priorities = {priority: str(code) + detail_key for priority, code in PRIORITY_CODES.items()}
+        close = layout.close + "}"
+        detail = attrgetter(self.field)
+
+        def encode(task: Task, out: List[str]) -> None:
+            out += (
+                id_key, str(task.id), name_key, encode_string(task.name), description_key,
+                encode_string(task.description), statuses[task.status], priorities[task.priority],
+                encode_string(detail(task)), close
+            )
+        return encode
+
+    def _compile_decoder(self) -> Callable[[Dict[str, Any]], Task]:
+        new = object.__new__
+        cls = self.cls
+        fields = itemgetter("id", "name", "description", self.field)
+        # The slot descriptor of the detail field, to skip a setattr name lookup per task
+        set_detail = getattr(cls, self.field).__set__
+        # Detail values are low-cardinality, so every task shares the pooled instance.
+        pool = Interning.table(self.field)
+        shared, intern = pool.shared.get, pool.intern
+        medium = Priority.MEDIUM
+
+        def decode(data: Dict[str, Any]) -> Task:
+            status = STATUSES.get(data.get("status", Status.NOT_STARTED.value))
+            if status is None:
+                raise ValueError(f"Invalid status value: {data['status']}")
+            task = new(cls)
+            task.id, task.name, task.description, detail = fields(data)
+            set_detail(task, shared(detail) or intern(detail))
+            task.status = status
+            task.priority = PRIORITIES_BY_CODE.get(data.get("priority", 2), medium)
+            task._dirty = True
+            return task
+        return decode
+
+
+TASK_CODECS: Dict[str, TaskCodec] = {}
+CODECS_BY_CLASS: Dict[Type[Task], TaskCodec] = {}
+
+
+def register_task_codec(cls: Type[Task], field: str) -> TaskCodec:
+    """
+    Register ``cls`` for (de)serialization; ``field`` is its type-specific detail attribute.
+    """
+    codec = TaskCodec(cls, field)
+    TASK_CODECS[codec.type] = codec
+    CODECS_BY_CLASS[cls] = codec
+    project_encoder.cache_clear()
+    user_encoder.cache_clear()
+    return codec
+
+
+def task_encoder(cls: Type[Task], level: int = 0, compact: bool = False) -> Encoder:
+    codec = CODECS_BY_CLASS.get(cls)
+    if codec is None:
+        raise ValueError(f"Unknown task type: {cls.__name__}")
+    return codec.encoder(level, compact)
+
+
+def decode_task(data: Dict[str, Any]) -> Task:
+    """
+    Build the task described by ``data``, dispatching on its ``_type`` tag.
+    """
+    codec = TASK_CODECS.get(data.get("_type"))
+    if codec is None:
+        raise ValueError(f"Unknown task type: {data.get('_type')}")
+    return codec.decode(data)
+
+
+@lru_cache(maxsize=None)
+def project_encoder(level: int = 0, compact: bool = False) -> Encoder:
+    """
+    Return an encoder for projects nested ``level`` deep, including their tasks.
+    """
+    layout = Layout(level, compact)
+    tasks_layout = Layout(level + 1, compact)
+    id_key, name_key, description_key, tasks_key, deadline_key = layout.keys(
+        ["id", "name", "description", "tasks", "deadline"]
+    )
+    close = layout.close + "}"
+    encoders = {cls: codec.encoder(level + 2, compact) for cls, codec in CODECS_BY_CLASS.items()}
+
+    def encode_task(task: Task, out: List[str]) -> None:
+        encoder = encoders.get(task.__class__)
+        if encoder is None:
+            encoder = encoders[task.__class__] = task_encoder(task.__class__, level + 2, compact)
+        encoder(task, out)
+
+    def encode(project: Any, out: List[str]) -> None:
+        out += (id_key, str(project.id), name_key, encode_string(project.name), description_key,
+                encode_string(project.description), tasks_key)
+        tasks_layout.array(project.tasks, encode_task, out)
+        deadline = project.deadline
+        out += (deadline_key, encode_string(deadline.strftime('%Y-%m-%d')) if deadline else "null", close)
+    return encode
+
+
+@lru_cache(maxsize=None)
+def user_encoder(level: int = 0, compact: bool = False) -> Encoder:
+    """
+    Return an encoder for users nested ``level`` deep, including their projects and tasks.
+    """
+    layout = Layout(level, compact)
+    projects_layout = Layout(level + 1, compact)
+    id_key, name_key, surname_key, email_key, projects_key = layout.keys(
+        ["id", "name", "surname", "email", "projects"]
+    )
+    close = layout.close + "}"
+    encode_project = project_encoder(level + 2, compact)
+
+    def encode(user: Any, out: List[str]) -> None:
+        out += (id_key, str(user.id), name_key, encode_string(user.name), surname_key, encode_string(user.surname),
+                email_key, encode_string(user.email), projects_key)
+        projects_layout.array(user.projects, encode_project, out)
+        out.append(close)
+    return encode
+
+
+def encode_array(items: Iterable[Any], encoder: Callable[[int, bool], Encoder], compact: bool = False) -> bytes:
+    """
+    Encode ``items`` as a top-level JSON array, using ``encoder`` (e.g. ``user_encoder``) for its members.
+    """
+    out: List[str] = []
+    Layout(0, compact).array(items, encoder(1, compact), out)
+    return "".join(out).encode("ascii")
+
+
+def encode_users(users: Iterable[Any], compact: bool = False) -> bytes:
+    return encode_array(users, user_encoder, compact)
+
+
+def encode_projects(projects: Iterable[Any], compact: bool = False) -> bytes:
+    return encode_array(projects, project_encoder, compact)
+
+
+register_task_codec(DevTask, "language")
+register_task_codec(QATask, "test_type")
+register_task_codec(DocTask, "document")
@@ -0,0 +1,220 @@
+"""
+Optional column-oriented mirror of every task, answering filters and summaries from arrays.
+
+Enabled with ``--columnar`` (or ``ColumnarTasks.enable()``), it replaces the task
+index for status and priority filters and the maintained counters for Summary.
+"""
+from array import array
+from collections import Counter
+from itertools import compress
+from operator import and_
+from typing import Dict, Iterable, List, Optional, TYPE_CHECKING
+from enums import Priority, Status
+from interning import DETAIL_FIELDS, Interning, InternTable
+from registry import Registry, RegistryListener
+from task import PRIORITY_CODES, STATUS_CODES, TYPE_CODES
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if TYPE_CHECKING:
+    from project import Project
+    from task import Task
+
+
+# Name of the type-specific attribute, and of its string table, for each type code.
+CODE_FIELDS: List[str] = list(DETAIL_FIELDS.values())
+STATUSES: List[Status] = list(STATUS_CODES)
+PRIORITIES_BY_CODE: Dict[int, Priority] = {code: priority for priority, code in PRIORITY_CODES.items()}
+TYPES: List[str] = list(TYPE_CODES)
+
+
+class ColumnarTasks(RegistryListener):
+    """
+    Optional column-oriented mirror of every registered task, for whole-dataset analytics.
+
+    Each task is one row across parallel arrays: ``array('i')`` for task, project and
+    user IDs and for string references, and ``array('b')`` for the status, priority and
+    type codes, which fit in a byte and can then be counted with ``bytes.count``.
+    Deleting a row moves the last row into its slot, so row order is arbitrary.
+    Filters run as batched passes over the arrays, or as NumPy operations when NumPy
+    is installed. Call ``enable()`` to start mirroring.
+    """
+    ids: array = array('i')
+    project_ids: array = array('i')
+    user_ids: array = array('i')
+    status: array = array('b')
+    priority: array = array('b')
+    task_type: array = array('b')
+    name: array = array('i')
+    description: array = array('i')
+    detail: array = array('i')
+    rows: Dict[int, int] = {}
+    strings: Dict[str, InternTable] = {}
+
+    @classmethod
+    def enable(cls) -> None:
+        Registry.subscribe(cls)
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls in Registry.listeners
+
+    @classmethod
+    def disable(cls) -> None:
+        Registry.unsubscribe(cls)
+        cls.on_clear()
+
+    @classmethod
+    def columns(cls) -> List[array]:
+        return [cls.ids, cls.project_ids, cls.user_ids, cls.status, cls.priority, cls.task_type,
+                cls.name, cls.description, cls.detail]
+
+    @classmethod
+    def on_clear(cls) -> None:
+        for attr, typecode in (("ids", 'i'), ("project_ids", 'i'), ("user_ids", 'i'), ("status", 'b'),
+                               ("priority", 'b'), ("task_type", 'b'), ("name", 'i'), ("description", 'i'),
+                               ("detail", 'i')):
+            setattr(cls, attr, array(typecode))
+        cls.rows = {}
+        cls.strings = {field: InternTable() for field in ["name", "description"]}
+        # Detail values use the process-wide pools, whose references never change
+        cls.strings.update((field, Interning.table(field)) for field in CODE_FIELDS)
+
+    @classmethod
+    def on_rebuild(cls) -> None:
+        """
+        Build all columns in one pass over the Registry instead of appending row by row.
+        """
+        cls.on_clear()
+        entries = list(Registry.tasks.values())
+        owners = Registry.projects
+        names, descriptions = cls.strings["name"], cls.strings["description"]
+        details = [cls.strings[field] for field in CODE_FIELDS]
+        cls.ids = array('i', [task.id for task, _ in entries])
+        cls.project_ids = array('i', [project.id for _, project in entries])
+        cls.user_ids = array('i', [owners[project.id][1].id for _, project in entries])
+        cls.status = array('b', [STATUS_CODES[task.status] for task, _ in entries])
+        cls.priority = array('b', [PRIORITY_CODES[task.priority] for task, _ in entries])
+        cls.task_type = array('b', [TYPE_CODES[task._type] for task, _ in entries])
+        cls.name = array('i', [names.ref(task.name) for task, _ in entries])
+        cls.description = array('i', [descriptions.ref(task.description) for task, _ in entries])
+        cls.detail = array('i', [
+            details[code].ref(getattr(task, CODE_FIELDS[code]))
+            for code, (task, _) in zip(cls.task_type, entries)
+        ])
+        cls.rows = {task_id: row for row, task_id in enumerate(cls.ids)}
+
+    @classmethod
+    def on_task_added(cls, task: "Task", project: "Project") -> None:
+        type_code = TYPE_CODES[task._type]
+        cls.rows[task.id] = len(cls.ids)
+        cls.ids.append(task.id)
+        cls.project_ids.append(project.id)
+        cls.user_ids.append(Registry.get_project_owner(project.id).id)
+        cls.status.append(STATUS_CODES[task.status])
+        cls.priority.append(PRIORITY_CODES[task.priority])
+        cls.task_type.append(type_code)
+        cls.name.append(cls.strings["name"].ref(task.name))
+        cls.description.append(cls.strings["description"].ref(task.description))
+        cls.detail.append(cls._detail_ref(task, type_code))
+
+    @classmethod
+    def on_task_removed(cls, task: "Task", project: "Project") -> None:
+        row = cls.rows.pop(task.id, None)
+        if row is None:
+            return
+        last = len(cls.ids) - 1
+        for column in cls.columns():
+            if row != last:
+                column[row] = column[last]
+            del column[last]
+        if row != last:
+            cls.rows[cls.ids[row]] = row
+
+    @classmethod
+    def on_task_changed(cls, task: "Task", old_status: Status, old_priority: Priority) -> None:
+        row = cls.rows.get(task.id)
+        if row is None:
+            return
+        cls.status[row] = STATUS_CODES[task.status]
+        cls.priority[row] = PRIORITY_CODES[task.priority]
+        cls.name[row] = cls.strings["name"].ref(task.name)
+        cls.description[row] = cls.strings["description"].ref(task.description)
+        cls.detail[row] = cls._detail_ref(task, cls.task_type[row])
+
+    @classmethod
+    def _detail_ref(cls, task: "Task", type_code: int) -> int:
+        field = CODE_FIELDS[type_code]
+        return cls.strings[field].ref(getattr(task, field))
+
+    @classmethod
+    def count_by_status(cls) -> Dict[Status, int]:
+        return cls._count(cls.status, STATUS_CODES)
+
+    @classmethod
+    def count_by_priority(cls) -> Dict[Priority, int]:
+        return cls._count(cls.priority, PRIORITY_CODES)
+
+    @classmethod
+    def count_by_type(cls) -> Dict[str, int]:
+        return cls._count(cls.task_type, TYPE_CODES)
+
+    @staticmethod
+    def _count(column: array, codes: Dict) -> Dict:
+        raw = column.tobytes()
+        return {key: raw.count(bytes((code,))) for key, code in codes.items()}
+
+    @classmethod
+    def counts(cls, user_id: Optional[int] = None, project_id: Optional[int] = None) -> Counter:
+        """
+        Task counts by (status, priority, type), the keys of ``Aggregates``, for one project, one user or all tasks.
+        """
+        rows = [cls.status, cls.priority, cls.task_type]
+        owner = (cls.project_ids, project_id) if project_id is not None else (cls.user_ids, user_id)
+        if numpy is not None:
+            status, priority, task_type = (numpy.frombuffer(column, dtype=numpy.int8) for column in rows)
+            # One number per (status, priority, type): priority codes are below 8 and type codes below 4
+            keys = status.astype(numpy.intc) * 32 + priority.astype(numpy.intc) * 4 + task_type
+            if owner[1] is not None:
+                keys = keys[numpy.frombuffer(owner[0], dtype=numpy.intc) == owner[1]]
+            found = numpy.bincount(keys)
+            return Counter({
+                (STATUSES[key >> 5], PRIORITIES_BY_CODE[(key >> 2) & 7], TYPES[key & 3]): int(found[key])
+                for key in numpy.flatnonzero(found).tolist()
+            })
+        if owner[1] is not None:
+            rows = [list(compress(column, map(owner[1].__eq__, owner[0]))) for column in rows]
+        return Counter({
+            (STATUSES[status], PRIORITIES_BY_CODE[priority], TYPES[task_type]): count
+            for (status, priority, task_type), count in Counter(zip(*rows)).items()
+        })
+
+    @classmethod
+    def select_ids(
+        cls,
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None,
+        task_type: Optional[str] = None
+    ) -> List[int]:
+        """
+        Return the IDs of tasks matching every given filter.
+        """
+        filters = [(column, code) for column, code in (
+            (cls.status, STATUS_CODES[status] if status is not None else None),
+            (cls.priority, PRIORITY_CODES[priority] if priority is not None else None),
+            (cls.task_type, TYPE_CODES[task_type] if task_type is not None else None),
+        ) if code is not None]
+        if not filters:
+            return cls.ids.tolist()
+        if numpy is not None:
+            mask = numpy.ones(len(cls.ids), dtype=bool)
+            for column, code in filters:
+                mask &= numpy.frombuffer(column, dtype=numpy.int8) == code
+            return numpy.frombuffer(cls.ids, dtype=numpy.intc)[mask].tolist()
+        selectors: Iterable = map(filters[0][1].__eq__, filters[0][0])
+        for column, code in filters[1:]:
+            selectors = map(and_, selectors, map(code.__eq__, column))
+        return list(compress(cls.ids, selectors))
@@ -0,0 +1,407 @@
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+from datetime import datetime, timedelta
+from aggregates import Aggregates, summarize
+from columnar import ColumnarTasks
+from deadline_index import DeadlineIndex
+from enums import Priority, Status
+from interning import Interning
+from project import Project
+from registry import Registry
+from search_index import SearchIndex
+from stats import timed
+from storage import Storage
+from task import Task, DevTask, QATask, DocTask
+from task_index import TaskIndex
+from user import User, Users
+
+
+TASK_TYPES: Dict[str, Type[Task]] = {"DevTask": DevTask, "QATask": QATask, "DocTask": DocTask}
+
+
+class NotFoundError(ValueError):
+    """
+    Raised when an ID does not resolve to an entity (or not under the given owner).
+    """
+
+
+class UnavailableError(ValueError):
+    """
+    Raised for a query the storage backend cannot answer correctly, e.g. one needing every entity registered.
+    """
+
+
+def get_user(user_id: int) -> User:
+    user = Registry.get_user(user_id)
+    if not user:
+        raise NotFoundError("User not found.")
+    return user
+
+
+def get_project(user_id: int, project_id: int) -> Project:
+    project = Registry.get_project(project_id, owner=get_user(user_id))
+    if not project:
+        raise NotFoundError("Project not found.")
+    return project
+
+
+def get_task(task_id: int, user_id: Optional[int] = None, project_id: Optional[int] = None) -> Task:
+    """
+    Resolve a task, checking its owners only when their IDs are given.
+    """
+    owner = get_project(user_id, project_id) if user_id is not None and project_id is not None else None
+    task = Registry.get_task(task_id, owner=owner)
+    if not task:
+        raise NotFoundError("Task not found.")
+    return task
+
+
+def create_user(name: str, surname: str, email: str) -> User:
+    user = User(None, name, surname, email)
+    Users.add_user(user)
+    Storage.record("create_user", user=user.to_dict())
+    return user
+
+
+def update_user(user_id: int, name: Optional[str] = None, surname: Optional[str] = None, email: Optional[str] = None) -> User:
+    user = get_user(user_id)
+    user.update_user(name, surname, email)
+    Storage.record("update_user", id=user.id, name=user.name, surname=user.surname, email=user.email)
+    return user
+
+
+def remove_user(user_id: int) -> User:
+    user = get_user(user_id)
+    Users.remove_user(user)
+    Storage.record("remove_user", id=user.id)
+    return user
+
+
+def create_project(user_id: int, name: str, description: str, deadline: Optional[str | datetime] = None) -> Project:
+    user = get_user(user_id)
+    project = Project(None, name, description, None, deadline)
+    user.add_project(project)
+    Storage.record("create_project", user_id=user.id, project=project.to_dict())
+    return project
+
+
+def update_project(
+    user_id: int,
+    project_id: int,
+    name: Optional[str] = None,
+    description: Optional[str] = None,
+    deadline: Optional[str | datetime] = None
+) -> Project:
+    project = get_project(user_id, project_id)
+    project.update_project(name, description, deadline)
+    Storage.record(
+        "update_project",
+        id=project.id,
+        name=project.name,
+        description=project.description,
+        deadline=project.deadline.isoformat() if project.deadline else None
+    )
+    return project
+
+
+def remove_project(user_id: int, project_id: int) -> Project:
+    project = get_project(user_id, project_id)
+    get_user(user_id).remove_project(project)
+    Storage.record("remove_project", id=project.id)
+    return project
+
+
+def create_task(
+    user_id: int,
+    project_id: int,
+    task_type: str,
+    name: str,
+    description: str,
+    priority: Priority | str,
+    **details: Any
+) -> Task:
+    """
+    Create a task of ``task_type``; ``details`` carries the type-specific field
+    (``language``, ``test_type`` or ``document``).
+    """
+    project = get_project(user_id, project_id)
+    task_class = TASK_TYPES.get(task_type)
+    if task_class is None:
+        raise ValueError("Invalid task type.")
+    task = task_class(None, name, description, priority, **details)
+    project.add_task(task)
+    Storage.record("create_task", project_id=project.id, task=task.to_dict())
+    return task
+
+
+def update_task(
+    task_id: int,
+    name: Optional[str] = None,
+    description: Optional[str] = None,
+    priority: Optional[Priority | str] = None,
+    user_id: Optional[int] = None,
+    project_id: Optional[int] = None
+) -> Task:
+    task = get_task(task_id, user_id, project_id)
+    task.update_task(name=name, description=description, priority=priority)
+    Storage.record("update_task", id=task.id, name=task.name, description=task.description, priority=task.priority.value)
+    return task
+
+
+def remove_task(task_id: int, user_id: Optional[int] = None, project_id: Optional[int] = None) -> Task:
+    task = get_task(task_id, user_id, project_id)
+    Registry.get_task_owner(task.id).remove_task(task)
+    Storage.record("remove_task", id=task.id)
+    return task
+
+
+def change_task_status(
+    task_id: int,
+    status: Status | str,
+    user_id: Optional[int] = None,
+    project_id: Optional[int] = None
+) -> Task:
+    task = get_task(task_id, user_id, project_id)
+    task.change_status(status)
+    Storage.record("change_task_status", id=task.id, status=task.status.value)
+    return task
+
+
+def list_users(limit: Optional[int | str] = None, offset: int | str = 0) -> List[User]:
+    return _page(Users.users, limit, offset)
+
+
+def list_projects(user_id: int, limit: Optional[int | str] = None, offset: int | str = 0) -> List[Project]:
+    return _page(get_user(user_id).projects, limit, offset)
+
+
+def list_tasks(user_id: int, project_id: int, limit: Optional[int | str] = None, offset: int | str = 0) -> List[Task]:
+    return _page(get_project(user_id, project_id).tasks, limit, offset)
+
+
+def _page_bounds(limit: Optional[int | str], offset: int | str) -> Tuple[Optional[int], int]:
+    limit = None if limit is None else int(limit)
+    offset = int(offset)
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("limit and offset must not be negative")
+    return limit, offset
+
+
+def _page(items: Iterable[Any], limit: Optional[int | str], offset: int | str) -> List[Any]:
+    """
+    The ``limit`` items after the first ``offset``, pulling no further than that.
+    """
+    limit, offset = _page_bounds(limit, offset)
+    return list(islice(items, offset, None if limit is None else offset + limit))
+
+
+def _parse_date(value: Optional[str | datetime], end_of_day: bool = False) -> Optional[datetime]:
+    """
+    Parse an ISO date or datetime; a bare ``YYYY-MM-DD`` with ``end_of_day`` means the last moment of that day.
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value.strip()) == 10:
+        parsed += timedelta(days=1, microseconds=-1)
+    return parsed
+
+
+def _require_complete(feature: str) -> None:
+    if Storage.backend.partial:
+        raise UnavailableError(f"{feature} cannot run with lazy storage, which keeps only part of the data in memory.")
+
+
+def overdue_projects(now: Optional[str | datetime] = None) -> List[Project]:
+    """
+    Projects whose deadline has passed (as of ``now``, default the current time), earliest first.
+    """
+    _require_complete("Deadline queries")
+    return DeadlineIndex.overdue(_parse_date(now))
+
+
+def projects_due_between(start: str | datetime, end: str | datetime) -> List[Project]:
+    """
+    Projects due from ``start`` to ``end`` inclusive, earliest first; a date-only ``end`` includes that whole day.
+    """
+    _require_complete("Deadline queries")
+    return DeadlineIndex.due_between(_parse_date(start), _parse_date(end, end_of_day=True))
+
+
+def projects_due_within(days: int | str) -> List[Project]:
+    """
+    Projects due from now until ``days`` days from now, earliest first.
+    """
+    _require_complete("Deadline queries")
+    now = datetime.now()
+    return DeadlineIndex.due_between(now, now + timedelta(days=int(days)))
+
+
+def next_deadlines(count: int | str = 5, now: Optional[str | datetime] = None) -> List[Project]:
+    """
+    The ``count`` projects due soonest that are not yet overdue.
+    """
+    _require_complete("Deadline queries")
+    return DeadlineIndex.next_due(int(count), _parse_date(now))
+
+
+def search(query: str) -> Dict[str, List[Task] | List[Project]]:
+    """
+    Full-text search over task and project names, descriptions and task detail fields.
+
+    Terms separated by spaces must all match, ``OR`` separates alternatives and
+    ``term*`` matches any word starting with ``term``.
+    """
+    _require_complete("Search")
+    tasks, projects = SearchIndex.search(query)
+    return {"projects": projects, "tasks": tasks}
+
+
+def summary(user_id: Optional[int] = None, project_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Task counts and completion percentage of one project (``user_id`` and ``project_id``), one user, or everything.
+    """
+    _require_complete("Summary")
+    if project_id is not None:
+        project_id = get_project(user_id, project_id).id
+        user_id = None
+    elif user_id is not None:
+        user_id = get_user(user_id).id
+    if ColumnarTasks.enabled():
+        return summarize(ColumnarTasks.counts(user_id, project_id))
+    if project_id is not None:
+        counts = Aggregates.project_counts(project_id)
+    elif user_id is not None:
+        counts = Aggregates.user_counts(user_id)
+    else:
+        counts = Aggregates.overall
+    return summarize(counts)
+
+
+def check_summary() -> List[str]:
+    """
+    Recount every task and return where the maintained counters disagree (empty when consistent).
+    """
+    _require_complete("Summary")
+    return Aggregates.verify(Users.users)
+
+
+def interning_report() -> Dict[str, Dict[str, int]]:
+    """
+    How many references to the interned task details and deadlines share an object, and the bytes that saves.
+    """
+    return Interning.report((task for task, _ in Registry.tasks.values()),
+                            (project for project, _ in Registry.projects.values()))
+
+
+def _iter_groups(matches: Iterable[Task], sort: bool = False) -> Iterator[Tuple[str, List[Task]]]:
+    """
+    Bucket ``matches`` by project in one pass, then yield ("user - project", tasks) pairs as they are consumed.
+
+    A group's label is formatted, and with ``sort`` its tasks ordered by priority, only when it is reached.
+    """
+    projects: Dict[int, Project] = {}
+    groups: Dict[int, List[Task]] = {}
+    for task in matches:
+        project = Registry.get_task_owner(task.id)
+        group = groups.get(project.id)
+        if group is None:
+            projects[project.id] = project
+            group = groups[project.id] = []
+        group.append(task)
+    for project_id, tasks in groups.items():
+        project = projects[project_id]
+        if sort:
+            tasks.sort(key=lambda x: x.priority.value)
+        yield f"{Registry.get_project_owner(project_id).name} - {project.name}", tasks
+
+
+def _collect_groups(
+    groups: Iterable[Tuple[str, List[Task]]],
+    limit: Optional[int | str] = None,
+    offset: int | str = 0
+) -> Dict[str, List[Task]]:
+    """
+    Gather grouped tasks into a dict, keeping only ``limit`` tasks after the first ``offset``.
+    """
+    limit, offset = _page_bounds(limit, offset)
+    tasks: Dict[str, List[Task]] = {}
+    for label, group in groups:
+        if limit == 0:
+            break
+        if offset >= len(group):
+            offset -= len(group)
+            continue
+        group = group[offset:offset + limit if limit is not None else None]
+        offset = 0
+        if limit is not None:
+            limit -= len(group)
+        tasks.setdefault(label, []).extend(group)
+    return tasks
+
+
+def _verify_task_index() -> None:
+    for problem in TaskIndex.verify(Users.users):
+        print(f"Index mismatch: {problem}")
+
+
+def _pushed_down(task_ids) -> List[Task]:
+    return [task for task in map(Registry.get_task, task_ids) if task]
+
+
+def _matching_tasks(status: Optional[Status] = None, priority: Optional[Priority] = None) -> Iterable[Task]:
+    if TaskIndex.verify_mode:
+        _verify_task_index()
+    task_ids = Storage.query_task_ids(status=status, priority=priority)
+    if task_ids is None and ColumnarTasks.enabled():
+        task_ids = ColumnarTasks.select_ids(status=status, priority=priority)
+    if task_ids is not None:
+        return _pushed_down(task_ids)
+    return TaskIndex.tasks_with_status(status) if status is not None else TaskIndex.tasks_with_priority(priority)
+
+
+def _matching_groups(
+    status: Optional[Status] = None,
+    priority: Optional[Priority] = None,
+    sort: bool = False
+) -> Iterator[Tuple[str, List[Task]]]:
+    groups = Storage.query_task_groups(status=status, priority=priority)
+    if groups is None:
+        return _iter_groups(_matching_tasks(status, priority), sort)
+    if sort:
+        return ((label, sorted(tasks, key=lambda x: x.priority.value)) for label, tasks in groups)
+    return groups
+
+
+def iter_tasks_by_status(status: str) -> Iterator[Tuple[str, List[Task]]]:
+    """
+    Lazy form of ``filter_tasks_by_status``: yield the (label, tasks) groups one at a time.
+    """
+    return _matching_groups(status=Status[status], sort=True)
+
+
+def iter_tasks_by_priority(priority: str) -> Iterator[Tuple[str, List[Task]]]:
+    """
+    Lazy form of ``filter_tasks_by_priority``: yield the (label, tasks) groups one at a time.
+    """
+    return _matching_groups(priority=Priority[priority])
+
+
+@timed("core.filter_tasks_by_status")
+def filter_tasks_by_status(status: str, limit: Optional[int | str] = None, offset: int | str = 0) -> Dict[str, List[Task]]:
+    """
+    Group tasks with the given status (an enum name such as ``IN_PROGRESS``) by user and project.
+
+    ``limit`` and ``offset`` count tasks across the groups.
+    """
+    return _collect_groups(iter_tasks_by_status(status), limit, offset)
+
+
+@timed("core.filter_tasks_by_priority")
+def filter_tasks_by_priority(priority: str, limit: Optional[int | str] = None, offset: int | str = 0) -> Dict[str, List[Task]]:
+    """
+    Group tasks with the given priority (an enum name such as ``HIGH``) by user and project.
+
+    ``limit`` and ``offset`` count tasks across the groups.
+    """
+    return _collect_groups(iter_tasks_by_priority(priority), limit, offset)
@@ -0,0 +1,120 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+from registry import Registry, RegistryListener
+
+if TYPE_CHECKING:
+    from user import User
+    from project import Project
+
+
+_deadline = itemgetter(0)
+
+
+class DeadlineIndex(RegistryListener):
+    """
+    Registered projects sorted by deadline, for overdue / due-between / next-K queries.
+
+    ``entries`` holds ``(deadline, project id)`` pairs in order, so every query is
+    a bisect followed by a slice. Projects without a deadline are not indexed.
+    Lazy storage registers only the users in its cache, so ``core`` refuses
+    deadline queries there.
+    """
+    entries: List[Tuple[datetime, int]] = []
+    # Deadline each project was indexed under, so a stale entry can be found after an in-place change
+    deadlines: Dict[int, datetime] = {}
+
+    @classmethod
+    def on_clear(cls) -> None:
+        cls.entries = []
+        cls.deadlines = {}
+
+    @classmethod
+    def on_rebuild(cls) -> None:
+        cls.on_clear()
+        cls.deadlines = {
+            project.id: project.deadline for project, _ in Registry.projects.values() if project.deadline is not None
+        }
+        cls.entries = sorted((deadline, project_id) for project_id, deadline in cls.deadlines.items())
+
+    @classmethod
+    def on_project_added(cls, project: "Project", user: "User") -> None:
+        cls._add(project.id, project.deadline)
+
+    @classmethod
+    def on_project_removed(cls, project: "Project", user: "User") -> None:
+        cls._remove(project.id)
+
+    @classmethod
+    def on_project_changed(cls, project: "Project", old_deadline: Optional[datetime]) -> None:
+        if cls.deadlines.get(project.id) == project.deadline:
+            return
+        cls._remove(project.id)
+        cls._add(project.id, project.deadline)
+
+    @classmethod
+    def overdue(cls, now: Optional[datetime] = None) -> List["Project"]:
+        """
+        Projects whose deadline is before ``now``, earliest first.
+        """
+        end = bisect_left(cls.entries, now or datetime.now(), key=_deadline)
+        return cls._projects(cls.entries[:end])
+
+    @classmethod
+    def due_between(cls, start: datetime, end: datetime) -> List["Project"]:
+        """
+        Projects due from ``start`` to ``end`` inclusive, earliest first.
+        """
+        lo = bisect_left(cls.entries, start, key=_deadline)
+        hi = bisect_right(cls.entries, end, key=_deadline)
+        return cls._projects(cls.entries[lo:hi])
+
+    @classmethod
+    def next_due(cls, count: int, now: Optional[datetime] = None) -> List["Project"]:
+        """
+        The ``count`` projects due soonest at or after ``now``.
+        """
+        start = bisect_left(cls.entries, now or datetime.now(), key=_deadline)
+        return cls._projects(cls.entries[start:start + count])
+
+    @classmethod
+    def verify(cls, users: Iterable["User"]) -> List[str]:
+        """
+        Compare the index against a brute-force scan of ``users`` and return any mismatches.
+        """
+        expected = sorted(
+            (project.deadline, project.id) for user in users for project in user.projects
+            if project.deadline is not None
+        )
+        problems: List[str] = []
+        if cls.entries != sorted(cls.entries):
+            problems.append("deadline entries are out of order")
+        for deadline, project_id in sorted(set(expected) - set(cls.entries)):
+            problems.append(f"project {project_id} due {deadline} missing from index")
+        for deadline, project_id in sorted(set(cls.entries) - set(expected)):
+            problems.append(f"project {project_id} due {deadline} indexed but not found by scan")
+        return problems
+
+    @classmethod
+    def _add(cls, project_id: int, deadline: Optional[datetime]) -> None:
+        if deadline is None:
+            return
+        insort(cls.entries, (deadline, project_id))
+        cls.deadlines[project_id] = deadline
+
+    @classmethod
+    def _remove(cls, project_id: int) -> None:
+        deadline = cls.deadlines.pop(project_id, None)
+        if deadline is None:
+            return
+        index = bisect_left(cls.entries, (deadline, project_id))
+        if index < len(cls.entries) and cls.entries[index] == (deadline, project_id):
+            del cls.entries[index]
+
+    @staticmethod
+    def _projects(entries: List[Tuple[datetime, int]]) -> List["Project"]:
+        return [Registry.projects[project_id][0] for _, project_id in entries]
+
+
+Registry.subscribe(DeadlineIndex)
@@ -0,0 +1,36 @@
+import os
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """
+    Replace ``path`` with ``data`` so readers see either the old or the new file, never a partial one.
+
+    The data goes to a temporary file next to ``path``, is fsynced, and is then renamed over it.
+    """
+    with atomic_open(path) as file:
+        file.write(data)
+
+
+@contextmanager
+def atomic_open(path: str) -> Iterator[BinaryIO]:
+    """
+    Like ``atomic_write``, for output that is streamed in pieces: yield the temporary file, then rename it over ``path``.
+
+    If the block raises, ``path`` is left untouched and the temporary file is removed.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'wb') as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
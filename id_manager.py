@@ -1,43 +1,136 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, TextIO
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
 class IDManager:
     """
     A utility class to manage unique IDs for users, projects, and tasks.
+
+    Allocation is guarded by a lock, so threads can create entities concurrently.
+    When ``hwm_path`` is set (see ``use_file``), each process reserves IDs in blocks
+    of ``block_size`` from a shared high-water-mark file under an exclusive file
+    lock, so several processes can allocate without collisions, and the next free
+    ID is known without scanning the data.
     """
     last_user_id: int = 0
     last_project_id: int = 0
     last_task_id: int = 0
 
+    hwm_path: Optional[str] = None
+    block_size: int = 100
+    # Per entity: next ID to hand out and last ID of the block reserved by this process
+    _blocks: Dict[str, List[int]] = {}
+    _lock = threading.RLock()
+
+    @classmethod
+    def use_file(cls, path: str, block_size: Optional[int] = None) -> None:
+        """
+        Reserve IDs from the high-water-mark file at ``path`` from now on.
+        """
+        with cls._lock:
+            cls.hwm_path = path
+            if block_size is not None:
+                cls.block_size = block_size
+            cls._blocks = {}
+
     @classmethod
     def get_new_user_id(cls) -> int:
         """
         Generate a new unique ID for a user.
         """
-        cls.last_user_id += 1
-        return cls.last_user_id
+        return cls._next_id("user")
 
     @classmethod
     def get_new_project_id(cls) -> int:
         """
         Generate a new unique ID for a project.
         """
-        cls.last_project_id += 1
-        return cls.last_project_id
+        return cls._next_id("project")
 
     @classmethod
     def get_new_task_id(cls) -> int:
         """
         Generate a new unique ID for a task.
         """
-        cls.last_task_id += 1
-        return cls.last_task_id
+        return cls._next_id("task")
+
+    @classmethod
+    def reserve(cls, entity: str, count: int) -> range:
+        """
+        Allocate ``count`` consecutive IDs for ``entity`` ("user", "project" or "task") at once.
+        """
+        with cls._lock:
+            attribute = f"last_{entity}_id"
+            if cls.hwm_path is None:
+                start = getattr(cls, attribute) + 1
+            else:
+                start = cls._reserve_from_file(entity, count)
+            setattr(cls, attribute, start + count - 1)
+            return range(start, start + count)
+
+    @classmethod
+    def _next_id(cls, entity: str) -> int:
+        with cls._lock:
+            attribute = f"last_{entity}_id"
+            if cls.hwm_path is None:
+                new_id = getattr(cls, attribute) + 1
+            else:
+                block = cls._blocks.get(entity)
+                if block is None or block[0] > block[1]:
+                    start = cls._reserve_from_file(entity, cls.block_size)
+                    block = cls._blocks[entity] = [start, start + cls.block_size - 1]
+                new_id = block[0]
+                block[0] += 1
+            setattr(cls, attribute, new_id)
+            return new_id
+
+    @classmethod
+    def _reserve_from_file(cls, entity: str, count: int) -> int:
+        """
+        Advance the shared high-water mark for ``entity`` by ``count`` and return the first reserved ID.
+        """
+        directory = os.path.dirname(cls.hwm_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(cls.hwm_path, 'a+', encoding='utf-8') as file, _exclusive_lock(file):
+            file.seek(0)
+            content = file.read()
+            marks: Dict[str, int] = json.loads(content) if content.strip() else {}
+            start = max(marks.get(entity, 0), getattr(cls, f"last_{entity}_id")) + 1
+            marks[entity] = start + count - 1
+            file.seek(0)
+            file.truncate()
+            file.write(json.dumps(marks))
+            file.flush()
+            os.fsync(file.fileno())
+        return start
 
     @classmethod
     def validate_id(cls, id_name: str, new_id: int) -> None:
         """
         Validate and update the last ID for a given entity if the new ID is greater.
         """
-        current_id: int = getattr(cls, id_name, 0)
-        if new_id > current_id:
-            setattr(cls, id_name, new_id)
+        with cls._lock:
+            current_id: int = getattr(cls, id_name, 0)
+            if new_id > current_id:
+                setattr(cls, id_name, new_id)
+            # An ID seen in the data that falls inside our unused block makes the rest of it unsafe.
+            block = cls._blocks.get(id_name[len("last_"):-len("_id")])
+            if block is not None and new_id >= block[0]:
+                block[0] = block[1] + 1
 
     @classmethod
     def validate_last_user_id(cls, new_id: int) -> None:
@@ -59,3 +152,26 @@ class IDManager:
         Validate and update the last task ID.
         """
         cls.validate_id('last_task_id', new_id)
+
+
+@contextmanager
+def _exclusive_lock(file: TextIO) -> Iterator[None]:
+    """
+    Hold an exclusive lock on ``file`` across processes where the platform supports it.
+    """
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        yield
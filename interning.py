@@ -0,0 +1,128 @@
+"""
+Flyweight pools for the low-cardinality task and project fields.
+
+A dataset has only a handful of distinct languages, test types, document kinds
+and deadlines, yet every decoded task would otherwise own its own copy of them.
+The decoders and constructors route those values through ``Interning`` so equal
+values share one instance. Each pool also numbers its values in order of first
+use, so compact formats can store a small integer reference instead of the value.
+"""
+import sys
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterable, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from project import Project
+    from task import Task
+
+
+# Interned task attribute for each task type
+DETAIL_FIELDS: Dict[str, str] = {"DevTask": "language", "QATask": "test_type", "DocTask": "document"}
+
+
+class InternTable:
+    """
+    One shared instance per distinct value, addressed by a small integer reference.
+    """
+    __slots__ = ('shared', 'values', 'refs')
+
+    def __init__(self) -> None:
+        self.shared: Dict[Hashable, Any] = {}
+        self.values: List[Any] = []
+        self.refs: Dict[Hashable, int] = {}
+
+    def intern(self, value: Any) -> Any:
+        """
+        Return the shared instance equal to ``value``, adopting ``value`` if it is new. None passes through.
+        """
+        shared = self.shared.get(value)
+        if shared is None:
+            if value is None:
+                return None
+            self.ref(value)
+            shared = value
+        return shared
+
+    def ref(self, value: Any) -> int:
+        ref = self.refs.get(value)
+        if ref is None:
+            ref = self.refs[value] = len(self.values)
+            self.values.append(value)
+            self.shared.setdefault(value, value)
+        return ref
+
+    def __getitem__(self, ref: int) -> Any:
+        return self.values[ref]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class Interning:
+    """
+    The process-wide pools: one per task detail field, plus project deadlines.
+
+    Pools only grow; a value no longer used by any entity keeps its reference, so
+    references handed out to a compact format stay valid for the whole session.
+    """
+    tables: Dict[str, InternTable] = {field: InternTable() for field in (*DETAIL_FIELDS.values(), "deadline")}
+    # Deadline text as stored in users.json, with its parsed, shared datetime
+    parsed_deadlines: Dict[str, datetime] = {}
+
+    @classmethod
+    def table(cls, field: str) -> InternTable:
+        """
+        The pool of ``field``, created on first use (e.g. for the detail field of a newly registered task type).
+        """
+        table = cls.tables.get(field)
+        if table is None:
+            table = cls.tables[field] = InternTable()
+        return table
+
+    @classmethod
+    def intern(cls, field: str, value: Any) -> Any:
+        return cls.table(field).intern(value)
+
+    @classmethod
+    def deadline(cls, value: Optional[str | datetime]) -> Optional[datetime]:
+        """
+        The shared datetime for a deadline given as ISO text or as a datetime; blank text gives None.
+        """
+        if isinstance(value, str):
+            parsed = cls.parsed_deadlines.get(value)
+            if parsed is None:
+                if not value.strip():
+                    return None
+                parsed = cls.parsed_deadlines[value] = cls.tables["deadline"].intern(datetime.fromisoformat(value))
+            return parsed
+        return cls.tables["deadline"].intern(value)
+
+    @classmethod
+    def report(cls, tasks: Iterable["Task"], projects: Iterable["Project"]) -> Dict[str, Dict[str, int]]:
+        """
+        For each interned field of ``tasks`` and ``projects``, compare the live objects with one copy per reference.
+
+        ``bytes_saved`` is the size of the copies that sharing avoids, counting each value's own object only.
+        """
+        references: Dict[str, List[Any]] = {field: [] for field in cls.tables}
+        for task in tasks:
+            field = DETAIL_FIELDS.get(task._type)
+            value = getattr(task, field, None) if field is not None else None
+            if value is not None:
+                references[field].append(value)
+        references["deadline"] = [project.deadline for project in projects if project.deadline is not None]
+
+        report: Dict[str, Dict[str, int]] = {}
+        for field, values in references.items():
+            objects = {id(value): value for value in values}
+            with_copies = sum(map(sys.getsizeof, values))
+            shared = sum(map(sys.getsizeof, objects.values()))
+            report[field] = {
+                "references": len(values),
+                "distinct_values": len(set(values)),
+                "objects": len(objects),
+                "bytes_saved": with_copies - shared
+            }
+        report["total"] = {key: sum(entry[key] for entry in report.values()) for key in
+                           ("references", "distinct_values", "objects", "bytes_saved")}
+        return report
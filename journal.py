@@ -0,0 +1,316 @@
+import json
+import os
+import shutil
+import threading
+import time
+from functools import partial
+from typing import Any, Callable, Dict, Optional, TextIO
+import sequencer
+from fsutil import atomic_write
+from registry import Registry
+from user import Users
+
+
+class Journal:
+    """
+    Append-only write-ahead journal of mutating operations.
+
+    Every create/update/remove appends one compact JSON line to ``path``. Lines are
+    flushed to the OS immediately and fsynced in batches. On start-up the journal is
+    replayed on top of the last snapshot, and once it grows past
+    ``compact_threshold`` records it is folded back into the snapshot and truncated.
+    Replaying a record twice has no further effect, so a crash between writing the
+    snapshot and truncating the journal is harmless.
+
+    A caller that groups operations (the server) can turn off ``autoflush`` and
+    ``autocompact``, then call ``flush`` once per group and ``compact`` when idle.
+    Turning off ``autosync`` as well leaves every fsync to explicit ``sync`` calls.
+
+    A snapshot can also be written off the main thread (see ``autosave.py``):
+    ``rotate`` sets the records so far aside in ``rotated_path()``, and
+    ``write_checkpoint`` later replaces the snapshot with the state they led to and
+    deletes them. Until then, replay reads the rotated records before the journal.
+    """
+    path: str = "data/journal.log"
+    snapshot_path: str = "data/users.json"
+    fsync_batch: int = 64
+    fsync_interval: float = 1.0
+    compact_threshold: int = 10000
+    autoflush: bool = True
+    autosync: bool = True
+    autocompact: bool = True
+    # Writes the current state as the new snapshot; storage backends with another layout replace it.
+    snapshot_writer: Optional[Callable[[], None]] = None
+
+    _file: Optional[TextIO] = None
+    _pending: int = 0
+    _last_sync: float = 0.0
+    record_count: int = 0
+    # Held while the snapshot is written; bumped by every compaction, so an older checkpoint is dropped
+    writer_lock = threading.Lock()
+    generation: int = 0
+
+    @classmethod
+    def open(cls) -> None:
+        if cls._file is not None:
+            return
+        directory = os.path.dirname(cls.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        cls._file = open(cls.path, 'a', encoding='utf-8')
+        cls._pending = 0
+        cls._last_sync = time.monotonic()
+
+    @classmethod
+    def append(cls, op: str, **fields: Any) -> None:
+        """
+        Record one operation; ``fields`` must be JSON-serializable.
+        """
+        if cls._file is None:
+            cls.open()
+        fields["op"] = op
+        cls._file.write(json.dumps(fields, separators=(',', ':')) + "\n")
+        if cls.autoflush:
+            cls._file.flush()
+        cls._pending += 1
+        cls.record_count += 1
+        if cls.autosync and (cls._pending >= cls.fsync_batch or time.monotonic() - cls._last_sync >= cls.fsync_interval):
+            cls.sync()
+        if cls.autocompact and cls.record_count >= cls.compact_threshold:
+            cls.compact()
+
+    @classmethod
+    def flush(cls) -> None:
+        """
+        Hand buffered records to the OS, without waiting for them to reach the disk.
+        """
+        if cls._file is not None:
+            cls._file.flush()
+
+    @classmethod
+    def sync(cls) -> None:
+        fsync = cls.prepare_sync()
+        if fsync is not None:
+            fsync()
+
+    @classmethod
+    def prepare_sync(cls) -> Optional[Callable[[], None]]:
+        """
+        Hand the records to the OS and return the fsync that makes them durable, or None if none are pending.
+
+        A caller can run the fsync on another thread, as long as the journal is not
+        closed or rotated before it returns.
+        """
+        if cls._file is None or not cls._pending:
+            return None
+        cls._file.flush()
+        cls._pending = 0
+        cls._last_sync = time.monotonic()
+        return partial(os.fsync, cls._file.fileno())
+
+    @classmethod
+    def close(cls) -> None:
+        if cls._file is None:
+            return
+        cls.sync()
+        cls._file.close()
+        cls._file = None
+
+    @classmethod
+    def compact(cls) -> None:
+        """
+        Write the in-memory state as the new snapshot and truncate the journal.
+        """
+        with cls.writer_lock:
+            reopen = cls._file is not None
+            cls.close()
+            (cls.snapshot_writer or cls.write_snapshot)()
+            with open(cls.path, 'w', encoding='utf-8') as file:
+                os.fsync(file.fileno())
+            if os.path.exists(cls.rotated_path()):
+                os.remove(cls.rotated_path())
+            cls.record_count = 0
+            cls.generation += 1
+            if reopen:
+                cls.open()
+
+    @classmethod
+    def discard(cls) -> None:
+        """
+        Delete the journal and any rotated records, once the snapshot they apply to has been replaced.
+        """
+        cls.close()
+        for path in (cls.path, cls.rotated_path()):
+            if os.path.exists(path):
+                os.remove(path)
+        cls.record_count = 0
+
+    @classmethod
+    def rotated_path(cls) -> str:
+        return cls.path + ".old"
+
+    @classmethod
+    def rotate(cls) -> int:
+        """
+        Move the records so far to ``rotated_path()`` and continue with an empty journal.
+
+        Records left there by a checkpoint that failed are kept, and the new ones are
+        appended after them. Returns the generation to pass to ``write_checkpoint``.
+        """
+        with cls.writer_lock:
+            reopen = cls._file is not None
+            cls.close()
+            rotated = cls.rotated_path()
+            if os.path.exists(cls.path):
+                if os.path.exists(rotated):
+                    with open(cls.path, 'rb') as source, open(rotated, 'ab') as target:
+                        shutil.copyfileobj(source, target)
+                        target.flush()
+                        os.fsync(target.fileno())
+                    os.remove(cls.path)
+                else:
+                    os.replace(cls.path, rotated)
+            cls.record_count = 0
+            if reopen:
+                cls.open()
+            return cls.generation
+
+    @classmethod
+    def write_checkpoint(cls, data: bytes, generation: int) -> bool:
+        """
+        Write ``data``, the state as of the last ``rotate``, as the snapshot and delete the rotated records.
+
+        Safe to call from another thread. Returns False without writing if a compaction
+        has written a newer snapshot since the rotation.
+        """
+        with cls.writer_lock:
+            if generation != cls.generation:
+                return False
+            atomic_write(cls.snapshot_path, data)
+            if os.path.exists(cls.rotated_path()):
+                os.remove(cls.rotated_path())
+            return True
+
+    @classmethod
+    def write_snapshot(cls) -> None:
+        atomic_write(cls.snapshot_path, Users.encode_users(Users.users))
+
+    @classmethod
+    def replay(cls) -> int:
+        """
+        Apply every complete record in the journal to the in-memory model.
+
+        Records rotated out by a checkpoint that did not finish are applied first. A
+        torn or malformed final line left by a crash mid-write is cut off, so records
+        appended after it are not lost on the next replay; a malformed line followed
+        by others is corruption and raises ValueError. Returns the number of records read.
+        """
+        count = 0
+        for path in (cls.rotated_path(), cls.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb+') as file:
+                end = 0
+                number = 0
+                while line := file.readline():
+                    number += 1
+                    record = _parse_record(line)
+                    if record is None:
+                        if file.read(1):
+                            raise ValueError(f"Corrupt journal record at line {number} of {path}")
+                        file.truncate(end)
+                        break
+                    handler = _HANDLERS.get(record.pop("op", None))
+                    if handler is None:
+                        raise ValueError(f"Unknown journal operation: {line.decode('utf-8', 'replace').strip()}")
+                    handler(record)
+                    end += len(line)
+                    count += 1
+        cls.record_count = count
+        return count
+
+
+def _parse_record(line: bytes) -> Optional[Dict[str, Any]]:
+    """
+    The record on ``line``, or None if the line is torn or not a JSON object.
+    """
+    if not line.endswith(b"\n"):
+        return None
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def _apply_create_user(record: Dict[str, Any]) -> None:
+    if Registry.get_user(record["user"]["id"]) is None:
+        Users.add_user(sequencer._deserialize_user(record["user"]))
+
+
+def _apply_update_user(record: Dict[str, Any]) -> None:
+    user = Registry.get_user(record["id"])
+    if user:
+        user.update_user(record.get("name"), record.get("surname"), record.get("email"))
+
+
+def _apply_remove_user(record: Dict[str, Any]) -> None:
+    user = Registry.get_user(record["id"])
+    if user:
+        Users.remove_user(user)
+
+
+def _apply_create_project(record: Dict[str, Any]) -> None:
+    user = Registry.get_user(record["user_id"])
+    if user and Registry.get_project(record["project"]["id"]) is None:
+        user.add_project(sequencer._deserialize_project(record["project"]))
+
+
+def _apply_update_project(record: Dict[str, Any]) -> None:
+    project = Registry.get_project(record["id"])
+    if project:
+        project.update_project(record.get("name"), record.get("description"), record.get("deadline"))
+
+
+def _apply_remove_project(record: Dict[str, Any]) -> None:
+    user = Registry.get_project_owner(record["id"])
+    if user:
+        user.remove_project(Registry.get_project(record["id"]))
+
+
+def _apply_create_task(record: Dict[str, Any]) -> None:
+    project = Registry.get_project(record["project_id"])
+    if project and Registry.get_task(record["task"]["id"]) is None:
+        project.add_task(sequencer._deserialize_task(record["task"]))
+
+
+def _apply_update_task(record: Dict[str, Any]) -> None:
+    task = Registry.get_task(record.pop("id"))
+    if task:
+        task.update_task(**record)
+
+
+def _apply_remove_task(record: Dict[str, Any]) -> None:
+    project = Registry.get_task_owner(record["id"])
+    if project:
+        project.remove_task(Registry.get_task(record["id"]))
+
+
+def _apply_change_task_status(record: Dict[str, Any]) -> None:
+    task = Registry.get_task(record["id"])
+    if task:
+        task.change_status(record["status"])
+
+
+_HANDLERS: Dict[str, Callable[[Dict[str, Any]], None]] = {
+    "create_user": _apply_create_user,
+    "update_user": _apply_update_user,
+    "remove_user": _apply_remove_user,
+    "create_project": _apply_create_project,
+    "update_project": _apply_update_project,
+    "remove_project": _apply_remove_project,
+    "create_task": _apply_create_task,
+    "update_task": _apply_update_task,
+    "remove_task": _apply_remove_task,
+    "change_task_status": _apply_change_task_status,
+}
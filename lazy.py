@@ -0,0 +1,388 @@
+"""
+Lazy loading: keep only user headers in memory and read each user's projects and tasks on demand.
+
+At start-up only the id, name, surname and email of every user are loaded, from a
+sidecar offset index (``users.json.idx``) that records where each user's object
+starts in ``users.json``. The index is rebuilt by one streaming pass whenever it
+is missing or older than the snapshot. The first access to ``user.projects``, or a
+Registry lookup of one of the user's projects or tasks, parses just that user's
+bytes. Loaded subtrees are kept in an LRU cache bounded by their size on disk.
+When the cache is over its cap, the least recently used users are dropped. A
+dropped user with unsaved changes is first written to a spill file
+(``users.json.spill``) for the rest of the session.
+"""
+import json
+import os
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+import codec
+import sequencer
+from enums import Priority, Status
+from fsutil import atomic_open, atomic_write
+from id_manager import IDManager
+from journal import Journal
+from project import Project
+from registry import Registry
+from storage import JsonStorage, PRIORITY_CODES
+from task import Task
+from user import User, Users
+
+
+INDEX_VERSION = 1
+
+# (path, offset, length) of a user's JSON object
+Location = Tuple[str, int, int]
+
+# The slot behind ``User.projects``; LazyUser shadows it with a property.
+_projects_slot = User.projects
+
+
+class LazyUser(User):
+    """
+    A user whose projects are read from the snapshot on first access.
+    """
+    __slots__ = ()
+    storage: Optional["LazyStorage"] = None
+
+    @classmethod
+    def header(cls, id: int, name: str, surname: str, email: str) -> "LazyUser":
+        """
+        Create a user whose projects have not been loaded yet.
+        """
+        user = cls(id, name, surname, email)
+        _projects_slot.__set__(user, None)
+        user._dirty = False
+        return user
+
+    @property
+    def projects(self) -> Set[Project]:
+        projects = _projects_slot.__get__(self, User)
+        if projects is None:
+            return self.storage.materialize(self)
+        self.storage.touch(self)
+        return projects
+
+    @projects.setter
+    def projects(self, projects: Optional[Set[Project]]) -> None:
+        _projects_slot.__set__(self, projects)
+
+    def is_resident(self) -> bool:
+        return _projects_slot.__get__(self, User) is not None
+
+    def resident_projects(self) -> Set[Project]:
+        projects = _projects_slot.__get__(self, User)
+        return set() if projects is None else projects
+
+
+class LazyStorage(JsonStorage):
+    """
+    ``users.json`` plus the journal, loading each user's subtree only when it is used.
+
+    ``cache_bytes`` caps the total serialized size of the subtrees kept in memory.
+    The users being worked on are always kept, even if they alone exceed the cap.
+    """
+    # Encoding every user for a snapshot would load them all
+    autosave = False
+    # Only the users in the cache are registered
+    partial = True
+
+    def __init__(
+        self,
+        snapshot_path: str = "data/users.json",
+        journal_path: str = "data/journal.log",
+        cache_bytes: int = 64 << 20
+    ):
+        super().__init__(snapshot_path, journal_path)
+        self.cache_bytes = cache_bytes
+        self.index_path = snapshot_path + ".idx"
+        self.spill_path = snapshot_path + ".spill"
+        self.locations: Dict[int, Location] = {}
+        # Sorted entity IDs with the owning user ID at the same position, as of the last scan or save
+        self.owners: Dict[str, Tuple[array, array]] = {"project": (array('i'), array('i')), "task": (array('i'), array('i'))}
+        # Owners of entities created since then, recorded when their user is dropped from memory
+        self.moved: Dict[str, Dict[int, int]] = {"project": {}, "task": {}}
+        # Loaded users from least to most recently used, with their size in bytes
+        self.resident: "OrderedDict[int, int]" = OrderedDict()
+        self.resident_bytes = 0
+        self._files: Dict[str, BinaryIO] = {}
+
+    def load(self) -> None:
+        Journal.snapshot_path = self.snapshot_path
+        Journal.path = self.journal_path
+        Journal.snapshot_writer = self.write_snapshot
+        LazyUser.storage = self
+        Users.set_users(self.read_headers())
+        Registry.loader = self.fault
+        Journal.replay()
+        Journal.open()
+
+    def close(self) -> None:
+        super().close()
+        Journal.snapshot_writer = None
+        Registry.loader = None
+        self._close_files()
+
+    def read_headers(self) -> Set[User]:
+        """
+        Build a header-only user for every user in the snapshot, using the offset index.
+        """
+        self._close_files()
+        if os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+        self.resident = OrderedDict()
+        self.resident_bytes = 0
+        self.moved = {"project": {}, "task": {}}
+        if not os.path.exists(self.snapshot_path):
+            return set()
+
+        index = self._read_index()
+        if index is None:
+            index = self._scan()
+            atomic_write(self.index_path, json.dumps(index, separators=(',', ':')).encode("ascii"))
+
+        users: Set[User] = set()
+        self.locations = {}
+        for user_id, name, surname, email, offset, length in index["users"]:
+            users.add(LazyUser.header(user_id, name, surname, email))
+            self.locations[user_id] = (self.snapshot_path, offset, length)
+            IDManager.validate_last_user_id(user_id)
+        for kind in self.owners:
+            ids = array('i', index[f"{kind}s"])
+            self.owners[kind] = (ids, array('i', index[f"{kind}_owners"]))
+            if ids:
+                IDManager.validate_id(f"last_{kind}_id", ids[-1])
+        return users
+
+    def materialize(self, user: LazyUser) -> Set[Project]:
+        """
+        Read the projects and tasks of ``user`` from disk and make them reachable through the Registry.
+        """
+        path, offset, length = self.locations[user.id]
+        data = json.loads(self._read(path, offset, length))
+        projects = {sequencer._deserialize_project(project) for project in data.get("projects", [])}
+        for project in projects:
+            project.clear_dirty()
+        user.projects = projects
+        if Registry.is_user_registered(user):
+            for project in projects:
+                Registry.register_project(project, user)
+        self.resident[user.id] = length
+        self.resident_bytes += length
+        self._evict()
+        return projects
+
+    def touch(self, user: LazyUser) -> None:
+        if user.id in self.resident:
+            self.resident.move_to_end(user.id)
+
+    def unload(self, user: LazyUser) -> None:
+        """
+        Drop the subtree of ``user`` from memory, spilling it first if it has unsaved changes.
+        """
+        projects = user.resident_projects()
+        if user._dirty:
+            fragment = Users.encode_user(user)
+            self.locations[user.id] = self._spill(fragment[4:])
+            for project in projects:
+                self._remember("project", project.id, user.id)
+                for task in project.tasks:
+                    self._remember("task", task.id, user.id)
+        for project in projects:
+            Registry.unregister_project(project)
+        user.projects = None
+        user._dirty = False
+        Users.fragments.pop(user.id, None)
+
+    def fault(self, kind: str, entity_id: int) -> bool:
+        """
+        Registry lookup-miss hook: load the user owning project or task ``entity_id``, if it is not loaded.
+        """
+        owner_id = self.moved[kind].get(entity_id)
+        if owner_id is None:
+            owner_id = self._indexed_owner(kind, entity_id)
+        user = Registry.get_user(owner_id) if owner_id is not None else None
+        if not isinstance(user, LazyUser) or user.is_resident():
+            return False
+        self.materialize(user)
+        return True
+
+    def write_snapshot(self) -> None:
+        """
+        Write a new ``users.json``, copying the bytes of unchanged users instead of re-encoding them.
+        """
+        users = list(Users.users)
+        locations: Dict[int, Location] = {}
+        with atomic_open(self.snapshot_path) as file:
+            file.write(b"[\n" if users else b"[]")
+            position = 2
+            for number, user in enumerate(users):
+                if number:
+                    file.write(b",\n")
+                    position += 2
+                if isinstance(user, LazyUser) and not user._dirty:
+                    data = self._read(*self.locations[user.id])
+                else:
+                    data = Users.encode_user(user)[4:]
+                    user.clear_dirty()
+                file.write(b"    ")
+                file.write(data)
+                locations[user.id] = (self.snapshot_path, position + 4, len(data))
+                position += 4 + len(data)
+            if users:
+                file.write(b"\n]")
+            # The old snapshot must not be open while the new one is renamed over it.
+            self._close_files()
+        self.locations = locations
+        if os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+        self._rebuild_owners(users)
+        atomic_write(self.index_path, json.dumps(self._index(users), separators=(',', ':')).encode("ascii"))
+
+    def query_task_groups(
+        self,
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None
+    ) -> Iterator[Tuple[str, List[Task]]]:
+        """
+        Match tasks of loaded users in memory and of the others straight from their bytes, without loading them.
+
+        Groups are produced as they are consumed, so a pager only reads the users behind
+        the pages it shows. Matches of unloaded users are decoded as detached, read-only
+        copies: nothing is registered or cached, so the filter never evicts a user.
+        """
+        status_value = status.value if status is not None else None
+        priority_code = PRIORITY_CODES[priority.value] if priority is not None else None
+        for user in list(Users.users):
+            if isinstance(user, LazyUser) and not user.is_resident():
+                data = json.loads(self._read(*self.locations[user.id]))
+                for project in data.get("projects", []):
+                    tasks = [codec.decode_task(task) for task in project.get("tasks", [])
+                             if (status_value is None or task["status"] == status_value)
+                             and (priority_code is None or task.get("priority", 2) == priority_code)]
+                    if tasks:
+                        yield f"{user.name} - {project['name']}", tasks
+            else:
+                for project in user.resident_projects():
+                    tasks = [task for task in project.tasks
+                             if (status is None or task.status == status) and (priority is None or task.priority == priority)]
+                    if tasks:
+                        yield f"{user.name} - {project.name}", tasks
+
+    def _evict(self) -> None:
+        while self.resident_bytes > self.cache_bytes and len(self.resident) > 1:
+            user_id, size = self.resident.popitem(last=False)
+            self.resident_bytes -= size
+            user = Registry.get_user(user_id)
+            if isinstance(user, LazyUser) and user.is_resident():
+                self.unload(user)
+
+    def _indexed_owner(self, kind: str, entity_id: int) -> Optional[int]:
+        ids, owners = self.owners[kind]
+        position = bisect_left(ids, entity_id)
+        if position < len(ids) and ids[position] == entity_id:
+            return owners[position]
+        return None
+
+    def _remember(self, kind: str, entity_id: int, user_id: int) -> None:
+        if self._indexed_owner(kind, entity_id) != user_id:
+            self.moved[kind][entity_id] = user_id
+
+    def _rebuild_owners(self, users: List[User]) -> None:
+        """
+        Recompute the sorted owner arrays for the users just written.
+        """
+        unloaded = {user.id for user in users if isinstance(user, LazyUser) and not user.is_resident()}
+        for kind, (ids, owners) in self.owners.items():
+            pairs = [(entity_id, owner) for entity_id, owner in zip(ids, owners) if owner in unloaded]
+            pairs.extend((entity_id, owner) for entity_id, owner in self.moved[kind].items() if owner in unloaded)
+            for user in users:
+                if user.id in unloaded:
+                    continue
+                for project in user.resident_projects():
+                    if kind == "project":
+                        pairs.append((project.id, user.id))
+                    else:
+                        pairs.extend((task.id, user.id) for task in project.tasks)
+            pairs.sort()
+            self.owners[kind] = (array('i', [pair[0] for pair in pairs]), array('i', [pair[1] for pair in pairs]))
+        self.moved = {"project": {}, "task": {}}
+
+    def _index(self, users: List[User]) -> Dict[str, Any]:
+        stat = os.stat(self.snapshot_path)
+        index: Dict[str, Any] = {
+            "version": INDEX_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "users": [[user.id, user.name, user.surname, user.email, *self.locations[user.id][1:]] for user in users]
+        }
+        for kind, (ids, owners) in self.owners.items():
+            index[f"{kind}s"] = ids.tolist()
+            index[f"{kind}_owners"] = owners.tolist()
+        return index
+
+    def _read_index(self) -> Optional[Dict[str, Any]]:
+        """
+        Return the sidecar index if it describes the current snapshot, else None.
+        """
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                index = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        stat = os.stat(self.snapshot_path)
+        if (index.get("version") != INDEX_VERSION or index.get("size") != stat.st_size
+                or index.get("mtime_ns") != stat.st_mtime_ns):
+            return None
+        return index
+
+    def _scan(self) -> Dict[str, Any]:
+        """
+        Build the offset index with one streaming pass over the snapshot.
+        """
+        stat = os.stat(self.snapshot_path)
+        users: List[List[Any]] = []
+        pairs: Dict[str, List[Tuple[int, int]]] = {"project": [], "task": []}
+        # latin-1 maps every byte to one character, so character offsets are byte offsets.
+        with open(self.snapshot_path, 'r', encoding='latin-1', newline='') as file:
+            for data, start, end in sequencer.iter_json_array_spans(file):
+                user_id = data["id"]
+                header = [data["name"], data["surname"], data["email"]]
+                if not all(value.isascii() for value in header):
+                    # Raw UTF-8 text was decoded as latin-1 above; decode this user properly.
+                    data = json.loads(self._read(self.snapshot_path, start, end - start))
+                    header = [data["name"], data["surname"], data["email"]]
+                users.append([user_id, *header, start, end - start])
+                for project in data.get("projects", []):
+                    pairs["project"].append((project["id"], user_id))
+                    pairs["task"].extend((task["id"], user_id) for task in project.get("tasks", []))
+        index: Dict[str, Any] = {"version": INDEX_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "users": users}
+        for kind, entries in pairs.items():
+            entries.sort()
+            index[f"{kind}s"] = [entry[0] for entry in entries]
+            index[f"{kind}_owners"] = [entry[1] for entry in entries]
+        return index
+
+    def _read(self, path: str, offset: int, length: int) -> bytes:
+        file = self._file(path)
+        file.seek(offset)
+        return file.read(length)
+
+    def _spill(self, data: bytes) -> Location:
+        file = self._file(self.spill_path)
+        offset = file.seek(0, os.SEEK_END)
+        file.write(data + b"\n")
+        file.flush()
+        return self.spill_path, offset, len(data)
+
+    def _file(self, path: str) -> BinaryIO:
+        file = self._files.get(path)
+        if file is None:
+            file = self._files[path] = open(path, 'a+b' if path == self.spill_path else 'rb')
+        return file
+
+    def _close_files(self) -> None:
+        for file in self._files.values():
+            file.close()
+        self._files = {}
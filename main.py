@@ -1,39 +1,27 @@
-import sequencer
-from user import User, Users
-from project import Project
-from task import DevTask, QATask, DocTask
+import argparse
+import os
+import sys
+from user import Users
 import atexit
-from enums import Priority, Status
-
-
-def filter_tasks_by_status(status: str):
-    tasks = {}
-    status = Status[status]
-    for user in Users.users:
-        for project in user.projects:
-            key = f"{user.name} - {project.name}"
-            tasks[key] = [task for task in project.tasks if task.status == status]
-            tasks[key].sort(key=lambda x: x.priority.value)
-            if not tasks[key]:
-                del tasks[key]
-    return tasks
-
-
-def filter_tasks_by_priority(priority: str):
-    tasks = {}
-    priority = Priority[priority]
-    for user in Users.users:
-        for project in user.projects:
-            key = f"{user.name} - {project.name}"
-            tasks[key] = [task for task in project.tasks if task.priority == priority]
-            tasks[key].sort(key=lambda x: x.priority.value)
-            if not tasks[key]:
-                del tasks[key]
-    return tasks
+import batch
+from autosave import Autosave
+import bulk
+from columnar import ColumnarTasks
+import core
+from core import iter_tasks_by_status, iter_tasks_by_priority
+from id_manager import IDManager
+from lazy import LazyStorage
+from registry import Registry
+from render import Pager, entity_lines, group_lines, page, state_lines, write_lines
+import server
+from shards import ShardedStorage, convert_to_shards, convert_from_shards
+from journal import Journal
+from snapshot import MappedSnapshot, is_newer
+from stats import Stats, Profiler
+from storage import Storage, JsonStorage, SqliteStorage, migrate_json_to_sqlite
 
 
 def filter_tasks():
-    tasks = {}
     while True:
         print("\nFilter Tasks:")
         print("1. By Status")
@@ -46,44 +34,40 @@ def filter_tasks():
                 print("Invalid status. Please try again.")
                 continue
             status = status.replace(" ", "_").upper()
-            tasks = filter_tasks_by_status(status)
+            groups = iter_tasks_by_status(status)
         elif choice == "2":
             priority = input("Enter priority (Low, Medium, High, Critical): ")
             if priority not in ["Low", "Medium", "High", "Critical"]:
                 print("Invalid priority. Please try again.")
                 continue
-            tasks = filter_tasks_by_priority(priority.upper())
+            groups = iter_tasks_by_priority(priority.upper())
         elif choice == "3":
             break
         else:
             print("Invalid option. Please try again.")
+            continue
 
         print("\nFiltered Tasks:")
 
-        if not tasks.items():
+        if not Pager(group_lines(groups)).run():
             print("No tasks found matching the criteria.")
 
-        for key, value in tasks.items():
-            print(f"{key}:")
-            for task in value:
-                print(f"\t{task}")
-
 
 def change_task_status():
     user_id = int(input("Enter User ID for the task: "))
-    user = next((u for u in Users.users if u.id == user_id), None)
+    user = Registry.get_user(user_id)
     if not user:
         print("User not found.")
         return
 
     project_id = int(input("Enter Project ID for the task: "))
-    project = next((p for p in user.projects if p.id == project_id), None)
+    project = Registry.get_project(project_id, owner=user)
     if not project:
         print("Project not found.")
         return
 
     task_id = int(input("Enter Task ID to change status: "))
-    task = next((t for t in project.tasks if t.id == task_id), None)
+    task = Registry.get_task(task_id, owner=project)
     if not task:
         print("Task not found.")
         return
@@ -93,14 +77,144 @@ def change_task_status():
         if new_status not in ["Not Started", "In Progress", "Completed"]:
             print("Invalid status. Please try again.")
         else:
-            task.change_status(new_status)
+            core.change_task_status(task.id, new_status, user.id, project.id)
             break
 
     print(f"Task {task_id} status changed successfully.")
 
 
+def print_deadlines(projects):
+    if not projects:
+        print("No projects found matching the criteria.")
+    for project in projects:
+        user = Registry.get_project_owner(project.id)
+        print(f"{project.deadline:%Y-%m-%d} - {user.name} - {project}")
+
+
+def overdue_projects():
+    projects = core.overdue_projects()
+    print("\nOverdue Projects:")
+    print_deadlines(projects)
+
+
+def projects_due_within():
+    try:
+        days = int(input("Enter number of days: "))
+    except ValueError:
+        print("Invalid number of days.")
+        return
+    projects = core.projects_due_within(days)
+    print(f"\nProjects due within {days} days:")
+    print_deadlines(projects)
+
+
+def projects_due_between():
+    start = input("Enter start date (YYYY-MM-DD): ")
+    end = input("Enter end date (YYYY-MM-DD): ")
+    try:
+        projects = core.projects_due_between(start, end)
+    except core.UnavailableError as e:
+        print(e)
+        return
+    except ValueError:
+        print("Invalid date. Please use YYYY-MM-DD.")
+        return
+    print(f"\nProjects due between {start} and {end}:")
+    print_deadlines(projects)
+
+
+def next_deadlines():
+    try:
+        count = int(input("Enter number of projects: ") or 5)
+    except ValueError:
+        print("Invalid number of projects.")
+        return
+    projects = core.next_deadlines(count)
+    print("\nNext Deadlines:")
+    print_deadlines(projects)
+
+
+def search():
+    query = input("Search for (words, OR, prefix*): ")
+    results = core.search(query)
+    if not results["projects"] and not results["tasks"]:
+        print("Nothing found.")
+        return
+    if results["projects"]:
+        print("\nProjects:")
+        for project in results["projects"]:
+            print(f"{Registry.get_project_owner(project.id).name} - {project}")
+    if results["tasks"]:
+        print("\nTasks:")
+        for task in results["tasks"]:
+            project = Registry.get_task_owner(task.id)
+            print(f"{Registry.get_project_owner(project.id).name} - {project.name} - {task}")
+
+
+def print_summary(label, summary, indent=""):
+    print(f"{indent}{label}: {summary['total']} tasks, {summary['completion']}% completed")
+    for group in ("by_status", "by_priority", "by_type"):
+        counts = ", ".join(f"{key}: {count}" for key, count in summary[group].items())
+        print(f"{indent}\t{counts}")
+
+
+def overall_summary():
+    print()
+    print_summary("All users", core.summary())
+
+
+def user_summary():
+    user_id = int(input("Enter User ID for the summary: "))
+    user = Registry.get_user(user_id)
+    if not user:
+        print("User not found.")
+        return
+
+    print()
+    print_summary(f"{user.name} {user.surname}", core.summary(user.id))
+    for project in user.projects:
+        print_summary(project.name, core.summary(user.id, project.id), "\t")
+
+
+def check_summary():
+    problems = core.check_summary()
+    for problem in problems:
+        print(f"Summary mismatch: {problem}")
+    if not problems:
+        print("Summary counters match a full recount.")
+
+
+def show_stats():
+    print(f"\n{'Interned field':<16} {'References':>10} {'Values':>7} {'Objects':>8} {'KiB saved':>10}")
+    for field, entry in core.interning_report().items():
+        print(f"{field:<16} {entry['references']:>10} {entry['distinct_values']:>7} {entry['objects']:>8} "
+              f"{entry['bytes_saved'] / 1024:>10.1f}")
+
+    if not Stats.enabled:
+        print("Stats are disabled; start with --stats or TMS_STATS=1 to record them.")
+        return
+    report = Stats.report()
+    if not report:
+        print("Nothing recorded yet.")
+        return
+    print(f"\n{'Operation':<40} {'Count':>7} {'Total ms':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, histogram in report.items():
+        print(f"{name:<40} {histogram['count']:>7} {histogram['total_ms']:>10.2f} "
+              f"{histogram['p50_ms']:>9.3f} {histogram['p95_ms']:>9.3f} {histogram['p99_ms']:>9.3f}")
+
+
 def save_data():
-    Users.save_to_file()
+    Autosave.stop()
+    Storage.close()
+
+
+def save_stats():
+    if Stats.enabled:
+        Stats.dump()
+        print(f"Stats written to {Stats.path}.")
+    path = Profiler.stop()
+    if path:
+        print(f"Profile written to {path}.")
 
 
 def display_state():
@@ -110,28 +224,20 @@ def display_state():
         return
 
     print("Users:")
-    for user in Users.users:
-        print(user)
-        print("\tProjects:")
-        for project in user.projects:
-            print(f"\t{project}")
-            print("\t\tTasks:")
-            for task in project.tasks:
-                print(f"\t\t{task}")
+    Pager(state_lines(Users.users)).run()
 
 
 def create_user():
     name = input("Enter User Name: ")
     surname = input("Enter User Surname: ")
     email = input("Enter User Email: ")
-    user = User(None, name, surname, email)
-    Users.add_user(user)
+    core.create_user(name, surname, email)
     print(f"User {name} created successfully.")
 
 
 def update_user():
     user_id = int(input("Enter User ID to update: "))
-    user = next((u for u in Users.users if u.id == user_id), None)
+    user = Registry.get_user(user_id)
     if not user:
         print("User not found.")
         return
@@ -140,24 +246,24 @@ def update_user():
     surname = input(f"Enter new surname (current: {user.surname}): ") or user.surname
     email = input(f"Enter new email (current: {user.email}): ") or user.email
 
-    user.update_user(name, surname, email)
+    core.update_user(user.id, name, surname, email)
     print(f"User {user_id} updated successfully.")
 
 
 def remove_user():
     user_id = int(input("Enter User ID to remove: "))
-    user = next((u for u in Users.users if u.id == user_id), None)
+    user = Registry.get_user(user_id)
     if not user:
         print("User not found.")
         return
 
-    Users.users.remove(user)
+    core.remove_user(user.id)
     print(f"User {user_id} removed successfully.")
 
 
 def create_project():
     user_id = int(input("Enter User ID for the project: "))
-    user = next((u for u in Users.users if u.id == user_id), None)
+    user = Registry.get_user(user_id)
     if not user:
         print("User not found.")
         return
@@ -166,20 +272,23 @@ def create_project():
     description = input("Enter Project Description: ")
     deadline = input("Enter Project Deadline (YYYY-MM-DD): ")
 
-    project = Project(None, name, description, [], deadline)
-    user.add_project(project)
+    try:
+        core.create_project(user.id, name, description, deadline)
+    except ValueError as e:
+        print(e)
+        return
     print(f"Project {name} created and assigned to user {user.name}.")
 
 
 def update_project():
     user_id = int(input("Enter User ID for the project: "))
-    user = next((u for u in Users.users if u.id == user_id), None)
+    user = Registry.get_user(user_id)
     if not user:
         print("User not found.")
         return
 
     project_id = int(input("Enter Project ID to update: "))
-    project = next((p for p in user.projects if p.id == project_id), None)
+    project = Registry.get_project(project_id, owner=user)
     if not project:
         print("Project not found.")
         return
@@ -188,36 +297,36 @@ def update_project():
     description = input(f"Enter new description (current: {project.description}): ") or project.description
     deadline = input(f"Enter new deadline (current: {project.deadline}): ") or project.deadline
 
-    project.update_project(name, description, deadline)
+    core.update_project(user.id, project.id, name, description, deadline)
     print(f"Project {project_id} updated successfully.")
 
 
 def remove_project():
     user_id = int(input("Enter User ID for the project: "))
-    user = next((u for u in Users.users if u.id == user_id), None)
+    user = Registry.get_user(user_id)
     if not user:
         print("User not found.")
         return
 
     project_id = int(input("Enter Project ID to remove: "))
-    project = next((p for p in user.projects if p.id == project_id), None)
+    project = Registry.get_project(project_id, owner=user)
     if not project:
         print("Project not found.")
         return
 
-    user.projects.remove(project)
+    core.remove_project(user.id, project.id)
     print(f"Project {project_id} removed successfully.")
 
 
 def create_task():
     user_id = int(input("Enter User ID for the task: "))
-    user = next((u for u in Users.users if u.id == user_id), None)
+    user = Registry.get_user(user_id)
     if not user:
         print("User not found.")
         return
 
     project_id = int(input("Enter Project ID for the task: "))
-    project = next((p for p in user.projects if p.id == project_id), None)
+    project = Registry.get_project(project_id, owner=user)
     if not project:
         print("Project not found.")
         return
@@ -231,37 +340,34 @@ def create_task():
         priority = input("Enter Task Priority (Low, Medium, High, Critical): ")
 
     if task_type == "DevTask":
-        language = input("Enter Programming Language: ")
-        task = DevTask(None, name, description, priority, language)
+        details = {"language": input("Enter Programming Language: ")}
     elif task_type == "QATask":
-        test_type = input("Enter Test Type: ")
-        task = QATask(None, name, description, priority, test_type)
+        details = {"test_type": input("Enter Test Type: ")}
     elif task_type == "DocTask":
-        document = input("Enter Document Type: ")
-        task = DocTask(None, name, description, priority, document)
+        details = {"document": input("Enter Document Type: ")}
     else:
         print("Invalid task type.")
         return
 
-    project.add_task(task)
+    core.create_task(user.id, project.id, task_type, name, description, priority, **details)
     print(f"{task_type} {name} created and assigned to project {project.name}.")
 
 
 def update_task():
     user_id = int(input("Enter User ID for the task: "))
-    user = next((u for u in Users.users if u.id == user_id), None)
+    user = Registry.get_user(user_id)
     if not user:
         print("User not found.")
         return
 
     project_id = int(input("Enter Project ID for the task: "))
-    project = next((p for p in user.projects if p.id == project_id), None)
+    project = Registry.get_project(project_id, owner=user)
     if not project:
         print("Project not found.")
         return
 
     task_id = int(input("Enter Task ID to update: "))
-    task = next((t for t in project.tasks if t.id == task_id), None)
+    task = Registry.get_task(task_id, owner=project)
     if not task:
         print("Task not found.")
         return
@@ -270,79 +376,156 @@ def update_task():
     description = input(f"Enter new description (current: {task.description}): ") or task.description
     priority = input(f"Enter new priority (current: {task.priority}): ") or task.priority
 
-    task.update_task(name=name, description=description, priority=priority)
+    core.update_task(task.id, name, description, priority, user.id, project.id)
     print(f"Task {task_id} updated successfully.")
 
 
 def remove_task():
     user_id = int(input("Enter User ID for the task: "))
-    user = next((u for u in Users.users if u.id == user_id), None)
+    user = Registry.get_user(user_id)
     if not user:
         print("User not found.")
         return
 
     project_id = int(input("Enter Project ID for the task: "))
-    project = next((p for p in user.projects if p.id == project_id), None)
+    project = Registry.get_project(project_id, owner=user)
     if not project:
         print("Project not found.")
         return
 
     task_id = int(input("Enter Task ID to remove: "))
-    task = next((t for t in project.tasks if t.id == task_id), None)
+    task = Registry.get_task(task_id, owner=project)
     if not task:
         print("Task not found.")
         return
 
-    project.tasks.remove(task)
+    core.remove_task(task.id, user.id, project.id)
     print(f"Task {task_id} removed successfully.")
 
 
 def list_users():
     print("\nUsers:")
-    for user in Users.users:
-        print(user)
+    Pager(entity_lines(Users.users)).run()
 
 
 def list_projects():
     user_id = int(input("Enter User ID to list projects: "))
-    user = next((u for u in Users.users if u.id == user_id), None)
+    user = Registry.get_user(user_id)
     if not user:
         print("User not found.")
         return
 
     print(f"\nProjects for User {user.name}:")
-    for project in user.projects:
-        print(project)
+    Pager(entity_lines(user.projects)).run()
 
 
 def list_tasks():
     user_id = int(input("Enter User ID for the task: "))
-    user = next((u for u in Users.users if u.id == user_id), None)
+    user = Registry.get_user(user_id)
     if not user:
         print("User not found.")
         return
 
     project_id = int(input("Enter Project ID for the task: "))
-    project = next((p for p in user.projects if p.id == project_id), None)
+    project = Registry.get_project(project_id, owner=user)
     if not project:
         print("Project not found.")
         return
 
     print(f"\nTasks for Project {project.name}:")
-    for task in project.tasks:
-        print(task)
+    Pager(entity_lines(project.tasks)).run()
+
+
+def inspect_snapshot(kind, entity_id, path="data/users.bin"):
+    """
+    Print one user, project or task from the binary snapshot without loading the rest of the data.
+
+    The binary snapshot is only rewritten by a full save, so it is refused while
+    ``users.json`` is newer or the journal holds changes it does not include.
+    """
+    refresh = "run a batch file (even an empty one) to save a current one"
+    if not os.path.exists(path):
+        print(f"No binary snapshot at {path}; {refresh}.")
+        return
+    pending = [journal for journal in (Journal.path, Journal.rotated_path())
+               if os.path.exists(journal) and os.path.getsize(journal)]
+    if not is_newer(path, Journal.snapshot_path) or pending:
+        print(f"The binary snapshot at {path} is older than the latest changes; {refresh}.")
+        return
+    with MappedSnapshot(path) as snapshot:
+        if kind == "user":
+            user = snapshot.get_user(entity_id)
+            if not user:
+                print("User not found.")
+                return
+            print(user)
+            print("\tProjects:")
+            for project in user.projects:
+                print(f"\t{project}")
+                print("\t\tTasks:")
+                for task in project.tasks:
+                    print(f"\t\t{task}")
+        elif kind == "project":
+            project = snapshot.get_project(entity_id)
+            if not project:
+                print("Project not found.")
+                return
+            print(f"\nTasks for Project {project.name}:")
+            for task in project.tasks:
+                print(task)
+        else:
+            task = snapshot.get_task(entity_id)
+            print(task if task else "Task not found.")
 
 
 def load_data():
-    users = None
+    """
+    Load the data, reporting rather than raising errors; returns whether the load succeeded.
+    """
     try:
-        users = sequencer.deserialize_from_file('data/users.json')
+        Storage.load()
     except Exception as e:
         print(f"Error loading data: {e}")
-    if users:
-        Users.users = users
-    else:
-        print("No data loaded.")
+        return False
+    finally:
+        if not Users.users:
+            print("No data loaded.")
+    return True
+
+
+def import_data(path, format=None, chunk_size=bulk.CHUNK_SIZE):
+    """
+    Import ``path`` into the loaded data and report the outcome; returns the number of failed rows.
+    """
+    Storage.load()
+    try:
+        result = bulk.import_file(path, format, chunk_size)
+    finally:
+        Storage.close()
+    for error in result["errors"]:
+        print(f"Line {error['line']}: {error['error']}")
+    created = result["created"]
+    print(f"Imported {result['rows']} rows ({created['users']} users, {created['projects']} projects, "
+          f"{created['tasks']} tasks created, {len(result['errors'])} rows failed) "
+          f"in {result['seconds']:.2f} s, {result['rows_per_sec']:,} rows/s.")
+    return len(result["errors"])
+
+
+def export_data(path, format=None):
+    Storage.load()
+    result = bulk.export_file(path, format)
+    Storage.close()
+    print(f"Exported {result['rows']} rows to {path} in {result['seconds']:.2f} s, {result['rows_per_sec']:,} rows/s.")
+
+
+def run_action(action):
+    """
+    Run a menu action, reporting a query the storage backend cannot answer instead of exiting.
+    """
+    try:
+        action()
+    except core.UnavailableError as e:
+        print(e)
 
 
 def main_menu():
@@ -371,14 +554,32 @@ def main_menu():
             "7": ("Back to Main Menu", None)
         }),
         "4": ("Display State", display_state),
-        "5": ("Exit", exit)
+        "5": ("Exit", exit),
+        "6": ("Deadlines", {
+            "1": ("Overdue Projects", overdue_projects),
+            "2": ("Projects Due Within N Days", projects_due_within),
+            "3": ("Projects Due Between Dates", projects_due_between),
+            "4": ("Next Deadlines", next_deadlines),
+            "5": ("Back to Main Menu", None)
+        }),
+        "7": ("Search", search),
+        "8": ("Summary", {
+            "1": ("Overall Summary", overall_summary),
+            "2": ("User Summary", user_summary),
+            "3": ("Check Summary Counters", check_summary),
+            "4": ("Back to Main Menu", None)
+        }),
+        "9": ("Stats", show_stats)
     }
 
     # Load data on start-up
-    load_data()
+    loaded = load_data()
 
     # Ensure data is saved on program exit
     atexit.register(save_data)
+    # A partial load must not be written over the snapshot in the background
+    if loaded:
+        Autosave.start()
 
     while True:
         print("\nMain Menu:")
@@ -405,10 +606,112 @@ def main_menu():
                 sub_desc, sub_function = sub_menu_or_function[sub_choice]
                 if sub_function is None:
                     break  # Go back to the main menu
-                sub_function()
+                with Autosave.lock, Stats.timer(f"menu.{sub_desc}"):
+                    run_action(sub_function)
         else:
-            sub_menu_or_function()
+            with Autosave.lock, Stats.timer(f"menu.{description}"):
+                run_action(sub_menu_or_function)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="OOP Task Management System")
+    parser.add_argument("--storage", choices=["json", "sqlite", "sharded", "lazy"], default="json",
+                        help="persistence backend (default: json)")
+    parser.add_argument("--cache-mb", type=int, default=64,
+                        help="with --storage lazy, size of the loaded users kept in memory, in MB of JSON")
+    parser.add_argument("--db", default="data/users.db", help="SQLite database path")
+    parser.add_argument("--shards", default="data/shards", help="directory of the sharded layout")
+    parser.add_argument("--migrate", action="store_true",
+                        help="copy data/users.json into the SQLite database and exit")
+    parser.add_argument("--convert-to-shards", action="store_true",
+                        help="split data/users.json into the sharded layout and exit")
+    parser.add_argument("--convert-from-shards", action="store_true",
+                        help="merge the sharded layout back into data/users.json and exit")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run the commands in FILE (JSONL or script lines) without prompts and exit")
+    parser.add_argument("--serve", nargs="?", const=server.DEFAULT_ADDRESS, metavar="ADDRESS",
+                        help="serve JSON requests on HOST:PORT or a Unix socket path "
+                             f"(default {server.DEFAULT_ADDRESS}) instead of prompting")
+    parser.add_argument("--columnar", action="store_true",
+                        help="answer status/priority filters and summaries from column arrays instead of the indexes")
+    parser.add_argument("--stats", nargs="?", const="", metavar="FILE",
+                        help="record operation latencies, shown by the Stats menu and written as JSON at exit "
+                             "(default data/stats.json; also enabled by TMS_STATS=1)")
+    parser.add_argument("--profile", nargs="?", const="", metavar="FILE",
+                        help="run the session under cProfile and write a .prof file at exit "
+                             "(default data/profile-<time>-<pid>.prof; also enabled by TMS_PROFILE=1)")
+    parser.add_argument("--import", dest="import_file", metavar="FILE",
+                        help="create the users, projects and tasks listed in a CSV or JSONL file and exit")
+    parser.add_argument("--export", dest="export_file", metavar="FILE",
+                        help="write every user, project and task to a CSV or JSONL file and exit")
+    parser.add_argument("--format", choices=["csv", "jsonl"],
+                        help="format of --import/--export files (default: from the extension)")
+    parser.add_argument("--chunk-size", type=int, default=bulk.CHUNK_SIZE, metavar="N",
+                        help=f"with --import, rows committed together (default {bulk.CHUNK_SIZE})")
+    parser.add_argument("--display", action="store_true",
+                        help="print the whole state, as Display State does, without prompting and exit")
+    parser.add_argument("--limit", type=int, metavar="N", help="with --display, print at most N lines")
+    parser.add_argument("--offset", type=int, default=0, metavar="N", help="with --display, skip the first N lines")
+    parser.add_argument("--page-size", type=int, default=Pager.page_size, metavar="N",
+                        help=f"lines per page of interactive listings (default {Pager.page_size})")
+    parser.add_argument("--autosave-interval", type=float, default=Autosave.interval, metavar="SECONDS",
+                        help="save in the background once changes are this old (0 disables autosave)")
+    parser.add_argument("--autosave-changes", type=int, default=Autosave.max_changes, metavar="N",
+                        help="save in the background once N changes are pending")
+    parser.add_argument("--inspect", nargs=2, metavar=("KIND", "ID"),
+                        help="print one user, project or task from the last saved binary snapshot and exit")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    main_menu()
+    args = parse_args()
+    if args.inspect:
+        kind, entity_id = args.inspect
+        if kind not in ("user", "project", "task"):
+            sys.exit("KIND must be user, project or task")
+        inspect_snapshot(kind, int(entity_id))
+    elif args.migrate:
+        count = migrate_json_to_sqlite('data/users.json', args.db)
+        print(f"Migrated {count} users to {args.db}.")
+    elif args.convert_to_shards:
+        count = convert_to_shards('data/users.json', args.shards)
+        print(f"Wrote {count} users to {args.shards}.")
+    elif args.convert_from_shards:
+        count = convert_from_shards(args.shards, 'data/users.json')
+        print(f"Wrote {count} users to data/users.json.")
+    else:
+        if args.stats is not None:
+            Stats.enable(args.stats)
+        if args.columnar:
+            ColumnarTasks.enable()
+        if args.profile is not None or os.environ.get("TMS_PROFILE"):
+            Profiler.start(args.profile)
+        # Registered before save_data, so it runs after it and includes the final save
+        atexit.register(save_stats)
+        IDManager.use_file('data/ids.json')
+        if args.storage == "sqlite":
+            Storage.use(SqliteStorage(args.db))
+        elif args.storage == "sharded":
+            Storage.use(ShardedStorage(args.shards))
+        elif args.storage == "lazy":
+            Storage.use(LazyStorage(cache_bytes=args.cache_mb << 20))
+        else:
+            Storage.use(JsonStorage())
+        if args.batch:
+            sys.exit(1 if batch.run_batch(args.batch) else 0)
+        if args.serve:
+            server.serve(args.serve)
+            sys.exit(0)
+        if args.import_file:
+            sys.exit(1 if import_data(args.import_file, args.format, args.chunk_size) else 0)
+        if args.export_file:
+            export_data(args.export_file, args.format)
+            sys.exit(0)
+        if args.display:
+            Storage.load()
+            write_lines(page(state_lines(Users.users), args.offset, args.limit))
+            sys.exit(0)
+        Pager.page_size = args.page_size
+        Autosave.interval = args.autosave_interval
+        Autosave.max_changes = args.autosave_changes
+        main_menu()
@@ -2,10 +2,15 @@ import os
 from typing import Set, Optional, Dict, Any
 from datetime import datetime, timedelta
 from id_manager import IDManager
+from interning import Interning
+from registry import Registry
+import codec
 import json
 
 
 class Project:
+    __slots__ = ('id', 'name', 'description', 'tasks', 'deadline', '_dirty')
+
     def __init__(
         self,
         id: Optional[int],
@@ -21,32 +26,65 @@ class Project:
 
         # Handle deadline
         self.deadline: Optional[datetime] = self._parse_deadline(deadline)
+        self._dirty: bool = True
+
+    def mark_dirty(self) -> None:
+        """
+        Flag this project, and the user that owns it, as needing re-serialization.
+        """
+        self._dirty = True
+        user = Registry.get_project_owner(self.id)
+        if user is not None and Registry.is_project_registered(self):
+            user.mark_dirty()
+
+    def clear_dirty(self) -> None:
+        self._dirty = False
+        for task in self.tasks:
+            task._dirty = False
 
     @staticmethod
     def _parse_deadline(deadline: Optional[str | datetime]) -> Optional[datetime]:
         if isinstance(deadline, str) and deadline.strip():
-            return datetime.fromisoformat(deadline)
+            return Interning.deadline(deadline)
         elif isinstance(deadline, datetime):
-            return deadline
+            return Interning.deadline(deadline)
         else:
             return datetime.now() + timedelta(days=30)  # Default to 30 days from now
 
     def add_task(self, task: "Task") -> None:
+        """
+        Add and register ``task``; a task equal to one the project already has is rejected.
+        """
+        if task in self.tasks:
+            raise ValueError(f"Project {self.id} already has task {task.name!r}.")
         self.tasks.add(task)
+        if Registry.is_project_registered(self):
+            Registry.register_task(task, self)
+        self.mark_dirty()
 
     def remove_task(self, task: "Task") -> None:
+        if task not in self.tasks:
+            raise ValueError(f"Task {task.id} does not belong to project {self.id}.")
+        Registry.unregister_task(task)
         self.tasks.discard(task)
+        self.mark_dirty()
 
     def set_deadline(self, deadline: str | datetime) -> None:
+        old_deadline = self.deadline
         self.deadline = self._parse_deadline(deadline)
+        self.mark_dirty()
+        Registry.project_changed(self, old_deadline)
 
     def update_project(self, name: Optional[str] = None, description: Optional[str] = None, deadline: Optional[str | datetime] = None) -> None:
+        old_deadline = self.deadline
         if name:
             self.name = name
         if description:
             self.description = description
         if deadline:
-            self.set_deadline(deadline)
+            self.deadline = self._parse_deadline(deadline)
+        self.mark_dirty()
+        Registry.project_changed(self, old_deadline)
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -75,13 +113,6 @@ class Project:
         return self.__str__()
 
 
-class ProjectEncoder(json.JSONEncoder):
-    def default(self, obj: Any) -> Any:
-        if isinstance(obj, Project):
-            return obj.to_dict()
-        return super().default(obj)
-
-
 class Projects:
     """
     Class to manage projects
@@ -103,8 +134,8 @@ class Projects:
     @classmethod
     def save_to_file(cls, filename: str = "data/projects.json") -> None:
         os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, 'w') as file:
-            json.dump([project.to_dict() for project in cls.projects], file, cls=ProjectEncoder, indent=4)
+        with open(filename, 'wb') as file:
+            file.write(codec.encode_projects(cls.projects))
 
     @classmethod
     def load_from_file(cls, filename: str = "data/projects.json") -> None:
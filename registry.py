@@ -0,0 +1,268 @@
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Type, TYPE_CHECKING
+from enums import Priority, Status
+from stats import timed
+
+if TYPE_CHECKING:
+    from user import User
+    from project import Project
+    from task import Task
+
+
+class RegistryListener:
+    """
+    Base class for secondary indexes kept in sync by the Registry.
+
+    Subclasses override the hooks they care about; every hook is a no-op by default.
+    """
+    @classmethod
+    def on_clear(cls) -> None:
+        pass
+
+    @classmethod
+    def on_rebuild(cls) -> None:
+        """
+        Called once after the Registry was repopulated in bulk; re-adds every project and task by default.
+        """
+        cls.on_clear()
+        for project, user in Registry.projects.values():
+            cls.on_project_added(project, user)
+        for task, project in Registry.tasks.values():
+            cls.on_task_added(task, project)
+
+    @classmethod
+    def on_project_added(cls, project: "Project", user: "User") -> None:
+        pass
+
+    @classmethod
+    def on_project_removed(cls, project: "Project", user: "User") -> None:
+        pass
+
+    @classmethod
+    def on_project_changed(cls, project: "Project", old_deadline: Optional[datetime]) -> None:
+        pass
+
+    @classmethod
+    def on_task_added(cls, task: "Task", project: "Project") -> None:
+        pass
+
+    @classmethod
+    def on_task_removed(cls, task: "Task", project: "Project") -> None:
+        pass
+
+    @classmethod
+    def on_task_changed(cls, task: "Task", old_status: Status, old_priority: Priority) -> None:
+        pass
+
+
+class Registry:
+    """
+    Central ID index for users, projects and tasks.
+
+    Every entity attached to ``Users`` is reachable in constant time by its ID,
+    together with its owner (the user of a project, the project of a task).
+    The index is maintained by ``Users``, ``User`` and ``Project`` mutators.
+
+    When users are loaded lazily, only the projects and tasks currently in memory
+    are registered. A lookup miss then calls ``loader("project" | "task", id)``,
+    which may load the owning user's subtree and returns whether it did.
+    """
+    users: Dict[int, "User"] = {}
+    projects: Dict[int, Tuple["Project", "User"]] = {}
+    tasks: Dict[int, Tuple["Task", "Project"]] = {}
+    listeners: List[Type[RegistryListener]] = []
+    loader: Optional[Callable[[str, int], bool]] = None
+
+    @classmethod
+    def subscribe(cls, listener: Type[RegistryListener]) -> None:
+        """
+        Attach a secondary index and feed it every task already registered.
+        """
+        if listener in cls.listeners:
+            return
+        cls.listeners.append(listener)
+        listener.on_rebuild()
+
+    @classmethod
+    def unsubscribe(cls, listener: Type[RegistryListener]) -> None:
+        if listener in cls.listeners:
+            cls.listeners.remove(listener)
+
+    @classmethod
+    def clear(cls) -> None:
+        cls.users = {}
+        cls.projects = {}
+        cls.tasks = {}
+        for listener in cls.listeners:
+            listener.on_clear()
+
+    @classmethod
+    def rebuild(cls, users: Iterable["User"]) -> None:
+        """
+        Drop the current index and register every user, project and task again.
+
+        Listeners are not notified per task; each gets a single ``on_rebuild`` instead.
+        """
+        listeners, cls.listeners = cls.listeners, []
+        try:
+            cls.clear()
+            for user in users:
+                cls.register_user(user)
+        finally:
+            cls.listeners = listeners
+        for listener in listeners:
+            listener.on_rebuild()
+
+    @classmethod
+    def register_user(cls, user: "User") -> None:
+        cls.users[user.id] = user
+        for project in user.resident_projects():
+            cls.register_project(project, user)
+
+    @classmethod
+    def unregister_user(cls, user: "User") -> None:
+        if cls.users.get(user.id) is not user:
+            return
+        for project in user.resident_projects():
+            cls.unregister_project(project)
+        del cls.users[user.id]
+
+    @classmethod
+    def register_project(cls, project: "Project", user: "User") -> None:
+        previous = cls.projects.get(project.id)
+        if previous is not None:
+            for listener in cls.listeners:
+                listener.on_project_removed(*previous)
+        cls.projects[project.id] = (project, user)
+        for listener in cls.listeners:
+            listener.on_project_added(project, user)
+        for task in project.tasks:
+            cls.register_task(task, project)
+
+    @classmethod
+    def unregister_project(cls, project: "Project") -> None:
+        if not cls.is_project_registered(project):
+            return
+        for task in project.tasks:
+            cls.unregister_task(task)
+        _, user = cls.projects.pop(project.id)
+        for listener in cls.listeners:
+            listener.on_project_removed(project, user)
+
+    @classmethod
+    def register_task(cls, task: "Task", project: "Project") -> None:
+        previous = cls.tasks.get(task.id)
+        if previous is not None:
+            for listener in cls.listeners:
+                listener.on_task_removed(*previous)
+        cls.tasks[task.id] = (task, project)
+        for listener in cls.listeners:
+            listener.on_task_added(task, project)
+
+    @classmethod
+    def unregister_task(cls, task: "Task") -> None:
+        if not cls.is_task_registered(task):
+            return
+        _, project = cls.tasks.pop(task.id)
+        for listener in cls.listeners:
+            listener.on_task_removed(task, project)
+
+    @classmethod
+    def task_changed(cls, task: "Task", old_status: Status, old_priority: Priority) -> None:
+        """
+        Notify secondary indexes that a registered task was mutated in place.
+        """
+        if not cls.listeners or not cls.is_task_registered(task):
+            return
+        for listener in cls.listeners:
+            listener.on_task_changed(task, old_status, old_priority)
+
+    @classmethod
+    def project_changed(cls, project: "Project", old_deadline: Optional[datetime]) -> None:
+        """
+        Notify secondary indexes that a registered project (its name, description or deadline) was changed in place.
+        """
+        if not cls.listeners or not cls.is_project_registered(project):
+            return
+        for listener in cls.listeners:
+            listener.on_project_changed(project, old_deadline)
+
+    @classmethod
+    def is_user_registered(cls, user: "User") -> bool:
+        return cls.users.get(user.id) is user
+
+    @classmethod
+    def is_project_registered(cls, project: "Project") -> bool:
+        entry = cls.projects.get(project.id)
+        return entry is not None and entry[0] is project
+
+    @classmethod
+    def is_task_registered(cls, task: "Task") -> bool:
+        entry = cls.tasks.get(task.id)
+        return entry is not None and entry[0] is task
+
+    @classmethod
+    @timed("registry.get_user")
+    def get_user(cls, user_id: int) -> Optional["User"]:
+        return cls.users.get(user_id)
+
+    @classmethod
+    @timed("registry.get_project")
+    def get_project(cls, project_id: int, owner: Optional["User"] = None) -> Optional["Project"]:
+        """
+        Return the project with the given ID, optionally only if it belongs to ``owner``.
+        """
+        entry = cls._project_entry(project_id)
+        if entry is None or (owner is not None and entry[1] is not owner):
+            return None
+        return entry[0]
+
+    @classmethod
+    @timed("registry.get_task")
+    def get_task(cls, task_id: int, owner: Optional["Project"] = None) -> Optional["Task"]:
+        """
+        Return the task with the given ID, optionally only if it belongs to ``owner``.
+        """
+        entry = cls._task_entry(task_id)
+        if entry is None or (owner is not None and entry[1] is not owner):
+            return None
+        return entry[0]
+
+    @classmethod
+    def get_project_owner(cls, project_id: int) -> Optional["User"]:
+        entry = cls._project_entry(project_id)
+        return entry[1] if entry else None
+
+    @classmethod
+    def get_task_owner(cls, task_id: int) -> Optional["Project"]:
+        entry = cls._task_entry(task_id)
+        return entry[1] if entry else None
+
+    @classmethod
+    @timed("registry.locate_task")
+    def locate_task(cls, task_id: int) -> Optional[Tuple["User", "Project", "Task"]]:
+        """
+        Resolve a task by ID alone, returning its user, project and the task itself.
+        """
+        entry = cls._task_entry(task_id)
+        if entry is None:
+            return None
+        task, project = entry
+        user = cls.get_project_owner(project.id)
+        if user is None:
+            return None
+        return user, project, task
+
+    @classmethod
+    def _project_entry(cls, project_id: int) -> Optional[Tuple["Project", "User"]]:
+        entry = cls.projects.get(project_id)
+        if entry is None and cls.loader is not None and cls.loader("project", project_id):
+            entry = cls.projects.get(project_id)
+        return entry
+
+    @classmethod
+    def _task_entry(cls, task_id: int) -> Optional[Tuple["Task", "Project"]]:
+        entry = cls.tasks.get(task_id)
+        if entry is None and cls.loader is not None and cls.loader("task", task_id):
+            entry = cls.tasks.get(task_id)
+        return entry
@@ -0,0 +1,142 @@
+"""
+Text rendering for the CLI: generators that turn entities into output lines, a
+buffered writer, and a pager that pulls only the lines of the pages it shows.
+"""
+import sys
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from user import User
+    from project import Project
+    from task import Task
+
+
+# Lines joined into a single write() call
+CHUNK_LINES: int = 512
+
+
+def state_lines(users: Iterable["User"]) -> Iterator[str]:
+    """
+    Every user with their projects and tasks, as printed by Display State.
+    """
+    for user in users:
+        yield str(user)
+        yield "\tProjects:"
+        for project in user.projects:
+            yield f"\t{project}"
+            yield "\t\tTasks:"
+            for task in project.tasks:
+                yield f"\t\t{task}"
+
+
+def entity_lines(entities: Iterable["User | Project | Task"]) -> Iterator[str]:
+    return map(str, entities)
+
+
+def group_lines(groups: Iterable[Tuple[str, List["Task"]]]) -> Iterator[str]:
+    """
+    Filter results: each "user - project" label followed by its tasks.
+    """
+    for label, tasks in groups:
+        yield f"{label}:"
+        for task in tasks:
+            yield f"\t{task}"
+
+
+def page(lines: Iterable[str], offset: int = 0, limit: Optional[int] = None) -> Iterator[str]:
+    """
+    The ``limit`` lines after the first ``offset``; nothing past them is rendered.
+    """
+    return islice(lines, offset, None if limit is None else offset + limit)
+
+
+def write_lines(lines: Iterable[str], out: Optional[TextIO] = None, chunk_lines: int = CHUNK_LINES) -> int:
+    """
+    Write ``lines`` to ``out`` (default stdout) in chunks of ``chunk_lines``, one write per chunk.
+
+    Returns the number of lines written.
+    """
+    out = out or sys.stdout
+    lines = iter(lines)
+    count = 0
+    while True:
+        chunk = list(islice(lines, chunk_lines))
+        if not chunk:
+            break
+        out.write("\n".join(chunk) + "\n")
+        count += len(chunk)
+    out.flush()
+    return count
+
+
+class Pager:
+    """
+    Interactive paging over a stream of lines.
+
+    Pages are rendered on first visit and kept, so going back does not re-render;
+    lines past the furthest page visited are never pulled (beyond one line of look-ahead).
+    """
+    page_size: int = 20
+
+    def __init__(self, lines: Iterable[str], page_size: Optional[int] = None):
+        self.size = page_size or Pager.page_size
+        self.pages: List[List[str]] = []
+        self._lines = iter(lines)
+        self._ahead: Optional[str] = None
+        self._done = False
+
+    def page(self, number: int) -> List[str]:
+        """
+        Lines of page ``number`` (from 0), or an empty list past the end.
+        """
+        while len(self.pages) <= number and self._peek():
+            chunk = [self._ahead]
+            self._ahead = None
+            chunk.extend(islice(self._lines, self.size - 1))
+            self.pages.append(chunk)
+        return self.pages[number] if number < len(self.pages) else []
+
+    def is_last(self, number: int) -> bool:
+        self.page(number)
+        return number >= len(self.pages) - 1 and not self._peek()
+
+    def run(self, out: Optional[TextIO] = None, prompt: Callable[[str], str] = input) -> int:
+        """
+        Show the first page, then follow next/previous/jump/quit choices; a single page is shown without prompting.
+
+        Returns the number of lines on the first page, so callers can report an empty result.
+        """
+        number = 0
+        while True:
+            lines = self.page(number)
+            write_lines(lines, out)
+            if self.is_last(number) and number == 0:
+                return len(lines)
+            last = self.is_last(number)
+            choice = prompt(
+                f"-- Page {number + 1}{' (last)' if last else ''} -- "
+                "[Enter/n]ext, [p]revious, page number, [q]uit: "
+            ).strip().lower()
+            if choice in ("", "n"):
+                if last:
+                    break
+                number += 1
+            elif choice == "p":
+                number = max(0, number - 1)
+            elif choice.isdigit() and int(choice) >= 1:
+                if self.page(int(choice) - 1):
+                    number = int(choice) - 1
+                else:
+                    print(f"There are only {len(self.pages)} pages.")
+            elif choice == "q":
+                break
+            else:
+                print("Invalid option. Please try again.")
+        return len(self.pages[0]) if self.pages else 0
+
+    def _peek(self) -> bool:
+        if self._ahead is None and not self._done:
+            self._ahead = next(self._lines, None)
+            self._done = self._ahead is None
+        return self._ahead is not None
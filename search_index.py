@@ -0,0 +1,306 @@
+import json
+import os
+import re
+from bisect import bisect_left, insort
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
+from enums import Priority, Status
+from fsutil import atomic_write
+from registry import Registry, RegistryListener
+
+if TYPE_CHECKING:
+    from user import User
+    from project import Project
+    from task import Task
+
+
+FORMAT_VERSION = 1
+DETAIL_FIELDS = ("language", "test_type", "document")
+# Compact once this many edited entities have postings that may be out of date
+STALE_LIMIT = 1024
+
+_words = re.compile(r"\w+").findall
+
+
+def tokenize(text: str) -> Set[str]:
+    return set(_words(text.lower()))
+
+
+def task_tokens(task: "Task") -> Set[str]:
+    """
+    Tokens of a task's name, description and type-specific detail field.
+    """
+    detail = next((getattr(task, field) for field in DETAIL_FIELDS if hasattr(task, field)), "")
+    return tokenize(f"{task.name} {task.description} {detail}")
+
+
+def project_tokens(project: "Project") -> Set[str]:
+    return tokenize(f"{project.name} {project.description}")
+
+
+class Postings:
+    """
+    Token -> entity ID sets for one kind of entity, with a sorted vocabulary for prefix lookups.
+
+    The hooks see tasks and projects only after an in-place edit, so the tokens
+    an edited entity was indexed under are unknown. Its ID is kept in ``stale``
+    instead: its old postings stay until ``compact`` and are filtered out of
+    query results by re-tokenizing the entity.
+    """
+    def __init__(self):
+        self.postings: Dict[str, Set[int]] = {}
+        self.vocabulary: List[str] = []
+        self.stale: Set[int] = set()
+
+    def add(self, entity_id: int, tokens: Iterable[str]) -> None:
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                self.postings[token] = ids = set()
+                insort(self.vocabulary, token)
+            ids.add(entity_id)
+
+    def discard(self, entity_id: int, tokens: Iterable[str]) -> None:
+        for token in tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(entity_id)
+            if not ids:
+                self._drop(token)
+
+    def lookup(self, term: str, prefix: bool = False) -> Set[int]:
+        """
+        IDs indexed under ``term``, or under any token starting with it when ``prefix`` is set.
+        """
+        if not prefix:
+            return set(self.postings.get(term, ()))
+        ids: Set[int] = set()
+        index = bisect_left(self.vocabulary, term)
+        while index < len(self.vocabulary) and self.vocabulary[index].startswith(term):
+            ids |= self.postings[self.vocabulary[index]]
+            index += 1
+        return ids
+
+    def compact(self, current_tokens: Callable[[int], Optional[Set[str]]]) -> None:
+        """
+        Drop every posting of the stale IDs, then re-add the tokens ``current_tokens`` gives for them.
+        """
+        if not self.stale:
+            return
+        stale, self.stale = self.stale, set()
+        for token in list(self.postings):
+            ids = self.postings[token]
+            ids -= stale
+            if not ids:
+                self._drop(token)
+        for entity_id in stale:
+            tokens = current_tokens(entity_id)
+            if tokens is not None:
+                self.add(entity_id, tokens)
+
+    def to_json(self) -> Dict[str, List[int]]:
+        return {token: sorted(ids) for token, ids in self.postings.items()}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, List[int]]) -> "Postings":
+        postings = cls()
+        postings.postings = {token: set(ids) for token, ids in data.items()}
+        postings.vocabulary = sorted(postings.postings)
+        return postings
+
+    def _drop(self, token: str) -> None:
+        del self.postings[token]
+        index = bisect_left(self.vocabulary, token)
+        if index < len(self.vocabulary) and self.vocabulary[index] == token:
+            del self.vocabulary[index]
+
+
+class SearchIndex(RegistryListener):
+    """
+    Inverted full-text index over registered tasks and projects.
+
+    Tasks are indexed by name, description and detail field, projects by name and
+    description. ``search`` takes whitespace-separated terms that must all match,
+    ``OR`` between groups of terms, and ``term*`` for a prefix match.
+
+    ``save`` writes the postings next to the snapshot, tagged with the snapshot's
+    size and modification time; ``restore`` reads them back so the next bulk load
+    can skip re-tokenizing everything when the snapshot has not changed since.
+    With lazy storage the postings would cover the cached users only, so
+    ``core.search`` refuses to run.
+    """
+    tasks: Postings = Postings()
+    projects: Postings = Postings()
+    # Postings read by ``restore``, consumed by the next ``on_rebuild``
+    restored: Optional[Tuple[Postings, Postings]] = None
+
+    @classmethod
+    def on_clear(cls) -> None:
+        cls.tasks = Postings()
+        cls.projects = Postings()
+
+    @classmethod
+    def on_rebuild(cls) -> None:
+        if cls.restored is not None:
+            (cls.tasks, cls.projects), cls.restored = cls.restored, None
+            return
+        super().on_rebuild()
+
+    @classmethod
+    def on_project_added(cls, project: "Project", user: "User") -> None:
+        cls.projects.add(project.id, project_tokens(project))
+
+    @classmethod
+    def on_project_removed(cls, project: "Project", user: "User") -> None:
+        cls.projects.discard(project.id, project_tokens(project))
+
+    @classmethod
+    def on_project_changed(cls, project: "Project", old_deadline: Any) -> None:
+        cls._changed(cls.projects, project.id, project_tokens(project), cls._project_tokens)
+
+    @classmethod
+    def on_task_added(cls, task: "Task", project: "Project") -> None:
+        cls.tasks.add(task.id, task_tokens(task))
+
+    @classmethod
+    def on_task_removed(cls, task: "Task", project: "Project") -> None:
+        cls.tasks.discard(task.id, task_tokens(task))
+
+    @classmethod
+    def on_task_changed(cls, task: "Task", old_status: Status, old_priority: Priority) -> None:
+        if task.status is not old_status:
+            # A status change; update_task never changes status, and the indexed text is untouched
+            return
+        cls._changed(cls.tasks, task.id, task_tokens(task), cls._task_tokens)
+
+    @classmethod
+    def search(cls, query: str) -> Tuple[List["Task"], List["Project"]]:
+        """
+        Return the tasks and the projects matching ``query``, each sorted by ID.
+        """
+        groups = [group.split() for group in re.split(r"\s+OR\s+", query.strip())]
+        task_ids = cls._match(cls.tasks, groups, cls._task_tokens)
+        project_ids = cls._match(cls.projects, groups, cls._project_tokens)
+        return (
+            [Registry.tasks[task_id][0] for task_id in sorted(task_ids) if task_id in Registry.tasks],
+            [Registry.projects[project_id][0] for project_id in sorted(project_ids) if project_id in Registry.projects]
+        )
+
+    @classmethod
+    def compact(cls) -> None:
+        cls.tasks.compact(cls._task_tokens)
+        cls.projects.compact(cls._project_tokens)
+
+    @classmethod
+    def save(cls, path: str, snapshot_path: str) -> None:
+        """
+        Write the postings to ``path``, tagged with the current state of ``snapshot_path``.
+        """
+        cls.compact()
+        stat = os.stat(snapshot_path)
+        data = {
+            "version": FORMAT_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "tasks": cls.tasks.to_json(),
+            "projects": cls.projects.to_json()
+        }
+        atomic_write(path, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def restore(cls, path: str, snapshot_path: str) -> bool:
+        """
+        Read postings saved for the current ``snapshot_path``, to be used by the next rebuild.
+
+        Returns False, and leaves the next rebuild to re-tokenize, if there are none
+        or they were written for a different snapshot.
+        """
+        cls.restored = None
+        try:
+            stat = os.stat(snapshot_path)
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return False
+        if (data.get("version"), data.get("size"), data.get("mtime_ns")) != (
+                FORMAT_VERSION, stat.st_size, stat.st_mtime_ns):
+            return False
+        cls.restored = (Postings.from_json(data["tasks"]), Postings.from_json(data["projects"]))
+        return True
+
+    @classmethod
+    def verify(cls, users: Iterable["User"]) -> List[str]:
+        """
+        Compare the postings against a brute-force scan of ``users`` and return any mismatches.
+        """
+        cls.compact()
+        expected_tasks = Postings()
+        expected_projects = Postings()
+        for user in users:
+            for project in user.projects:
+                expected_projects.add(project.id, project_tokens(project))
+                for task in project.tasks:
+                    expected_tasks.add(task.id, task_tokens(task))
+        problems: List[str] = []
+        for label, expected, actual in (("task", expected_tasks, cls.tasks), ("project", expected_projects, cls.projects)):
+            for token in sorted(set(expected.postings) | set(actual.postings)):
+                missing = expected.postings.get(token, set()) - actual.postings.get(token, set())
+                extra = actual.postings.get(token, set()) - expected.postings.get(token, set())
+                for entity_id in sorted(missing):
+                    problems.append(f"{label} {entity_id} missing from postings of {token!r}")
+                for entity_id in sorted(extra):
+                    problems.append(f"{label} {entity_id} indexed under {token!r} but not found by scan")
+            if actual.vocabulary != sorted(actual.postings):
+                problems.append(f"{label} vocabulary out of sync with postings")
+        return problems
+
+    @classmethod
+    def _changed(cls, postings: Postings, entity_id: int, tokens: Set[str],
+                 current_tokens: Callable[[int], Optional[Set[str]]]) -> None:
+        postings.add(entity_id, tokens)
+        postings.stale.add(entity_id)
+        if len(postings.stale) >= STALE_LIMIT:
+            postings.compact(current_tokens)
+
+    @staticmethod
+    def _match(postings: Postings, groups: List[List[str]],
+               current_tokens: Callable[[int], Optional[Set[str]]]) -> Set[int]:
+        matches: Set[int] = set()
+        for group in groups:
+            terms = []
+            for word in group:
+                tokens = _words(word.lower())
+                terms += [(token, False) for token in tokens[:-1]]
+                # ``term*`` only makes the last token of the word a prefix
+                terms += [(token, word.endswith("*")) for token in tokens[-1:]]
+            if not terms:
+                continue
+            ids = None
+            # Intersect the rarest terms first
+            for token, prefix in sorted(terms, key=lambda term: len(postings.postings.get(term[0], ()))):
+                found = postings.lookup(token, prefix)
+                ids = found if ids is None else ids & found
+                if not ids:
+                    break
+            for entity_id in ids & postings.stale if ids else ():
+                tokens = current_tokens(entity_id)
+                if tokens is None or not all(
+                    any(current.startswith(token) for current in tokens) if prefix else token in tokens
+                    for token, prefix in terms
+                ):
+                    ids.discard(entity_id)
+            matches |= ids or set()
+        return matches
+
+    @staticmethod
+    def _task_tokens(task_id: int) -> Optional[Set[str]]:
+        entry = Registry.tasks.get(task_id)
+        return task_tokens(entry[0]) if entry else None
+
+    @staticmethod
+    def _project_tokens(project_id: int) -> Optional[Set[str]]:
+        entry = Registry.projects.get(project_id)
+        return project_tokens(entry[0]) if entry else None
+
+
+Registry.subscribe(SearchIndex)
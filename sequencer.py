@@ -1,39 +1,39 @@
 import json
-from typing import Set, List, Dict, Any
-from enums import Priority, Status
+from typing import Set, List, Dict, Any, Iterable, Iterator, TextIO, Tuple
+import codec
 from user import User
 from project import Project
-from task import DevTask, QATask, DocTask
+from task import Task
 from id_manager import IDManager
+from stats import timed
 
 
-class CustomEncoder(json.JSONEncoder):
-    """
-    Custom JSON encoder for serializing User, Project, and Task objects.
-    """
-    def default(self, obj: Any) -> Any:
-        if isinstance(obj, (User, Project, DevTask, QATask, DocTask)):
-            return obj.to_dict()
-        if isinstance(obj, (Priority, Status)):
-            return obj.value
-        return super().default(obj)
+STREAM_CHUNK_SIZE: int = 1 << 16
+_SKIPPED = frozenset(" \t\r\n,")
 
 
-def serialize_to_file(data: Any, filename: str) -> None:
+def serialize_to_file(users: Iterable[User], filename: str, compact: bool = False) -> None:
     """
-    Serialize data to a JSON file.
+    Serialize users to a JSON file, indented unless ``compact`` is set.
     """
-    with open(filename, 'w') as file:
-        json.dump(data, file, cls=CustomEncoder, indent=4)
+    with open(filename, 'wb') as file:
+        file.write(codec.encode_users(users, compact))
 
 
-def deserialize_from_file(filename: str) -> Set[User]:
+@timed("sequencer.deserialize_from_file")
+def deserialize_from_file(filename: str, streaming: bool = True) -> Set[User]:
     """
     Deserialize data from a JSON file into User objects.
+
+    By default the top-level user array is streamed one element at a time, so only
+    a single user's dict tree is alive next to the objects built so far. Pass
+    ``streaming=False`` to parse the whole document with ``json.load`` first.
     """
     try:
         with open(filename, 'r') as file:
             try:
+                if streaming:
+                    return {_deserialize_user(user_data) for user_data in iter_json_array(file)}
                 data = json.load(file)
                 if data and isinstance(data, list) and isinstance(data[0], dict):
                     return _deserialize_users(data)
@@ -45,30 +45,101 @@ def deserialize_from_file(filename: str) -> Set[User]:
         return set()
 
 
+def iter_json_array(file: TextIO, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the elements of a top-level JSON array of objects one at a time.
+
+    The file is read in chunks and each element is decoded with ``raw_decode``
+    as soon as it is complete, so memory is bounded by the largest element.
+    Iteration stops at the first value that is not an object.
+    """
+    for element, _, _ in iter_json_array_spans(file, chunk_size):
+        yield element
+
+
+def iter_json_array_spans(file: TextIO, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Tuple[Dict[str, Any], int, int]]:
+    """
+    Like ``iter_json_array``, but also yield the start and end character offset of each element in the file.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    # File offset of buffer[0]
+    base = 0
+    started = False
+
+    def fill(size: int) -> bool:
+        nonlocal buffer, pos, base
+        chunk = file.read(size)
+        if not chunk:
+            return False
+        buffer = buffer[pos:] + chunk
+        base += pos
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _SKIPPED:
+            pos += 1
+        if pos >= len(buffer):
+            if fill(chunk_size):
+                continue
+            if started:
+                raise json.JSONDecodeError("Unterminated array", buffer, pos)
+            return
+
+        char = buffer[pos]
+        if not started:
+            if char != '[':
+                raise json.JSONDecodeError("Expecting '['", buffer, pos)
+            started = True
+            pos += 1
+            continue
+        if char != '{':
+            return
+
+        while True:
+            try:
+                start = pos
+                element, pos = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                # Grow geometrically so a very large element is not re-parsed once per chunk.
+                if not fill(max(chunk_size, len(buffer) - pos)):
+                    raise
+        yield element, base + start, base + pos
+
+
 def _deserialize_users(data: List[Dict[str, Any]]) -> Set[User]:
     """
     Deserialize a list of user dictionaries into a set of User objects.
     """
-    users: Set[User] = set()
-    for user_data in data:
-        projects = {_deserialize_project(proj) for proj in user_data.get("projects", [])}
-        user = User(
-            user_data["id"],
-            user_data["name"],
-            user_data["surname"],
-            user_data["email"],
-            projects
-        )
-        IDManager.validate_last_user_id(user.id)
-        users.add(user)
-    return users
+    return {_deserialize_user(user_data) for user_data in data}
+
+
+def _deserialize_user(data: Dict[str, Any]) -> User:
+    """
+    Deserialize a user dictionary, including its projects and tasks, into a User object.
+    """
+    projects = {_deserialize_project(proj) for proj in data.get("projects", [])}
+    user = User(
+        data["id"],
+        data["name"],
+        data["surname"],
+        data["email"],
+        projects
+    )
+    IDManager.validate_last_user_id(user.id)
+    return user
 
 
 def _deserialize_project(data: Dict[str, Any]) -> Project:
     """
     Deserialize a project dictionary into a Project object.
     """
-    tasks = {_deserialize_task(task) for task in data.get("tasks", [])}
+    tasks = {codec.decode_task(task) for task in data.get("tasks", [])}
+    if tasks:
+        IDManager.validate_last_task_id(max(task.id for task in tasks))
     IDManager.validate_last_project_id(data.get("id", 0))
     return Project(
         data.get("id"),
@@ -79,20 +150,10 @@ def _deserialize_project(data: Dict[str, Any]) -> Project:
     )
 
 
-def _deserialize_task(data: Dict[str, Any]) -> Any:
+def _deserialize_task(data: Dict[str, Any]) -> Task:
     """
-    Deserialize a task dictionary into a specific Task object (DevTask, QATask, or DocTask).
+    Deserialize a task dictionary into the Task subclass named by its ``_type``.
     """
-    task_type = data.pop('_type', None)
-    priority_map = {1: "Low", 2: "Medium", 3: "High", 4: "Critical"}
-    data['priority'] = priority_map.get(data.get("priority", 2), "Medium")
-    IDManager.validate_last_task_id(data.get("id", 0))
-
-    if task_type == 'DevTask':
-        return DevTask(**data)
-    elif task_type == 'QATask':
-        return QATask(**data)
-    elif task_type == 'DocTask':
-        return DocTask(**data)
-
-    raise ValueError(f"Unknown task type: {task_type}")
+    task = codec.decode_task(data)
+    IDManager.validate_last_task_id(task.id)
+    return task
@@ -0,0 +1,202 @@
+"""
+Server mode: the batch-mode commands as JSON requests over a local TCP or Unix socket.
+
+Each request is one line holding a JSON object such as
+``{"id": 1, "cmd": "change_task_status", "task_id": 12, "status": "Completed"}``,
+or a JSON array of such objects. Every request line gets exactly one response
+line, in order: ``{"id": 1, "ok": true, "result": ...}`` (or ``"ok": false`` with
+an ``"error"``), or an array of them for an array request. Clients may pipeline
+any number of requests without waiting for the responses.
+
+All requests run on the event loop thread, so the model has a single writer and
+needs no locks. Lines that arrive together are executed as one batch: their
+journal records are flushed to the OS once, just before the batch's responses
+are written. A background task fsyncs the journal every ``flush_interval``
+seconds on a worker thread. Once the journal is long enough, it folds it into the
+snapshot like autosave does: the fragments are captured and the journal rotated
+on the loop, then the snapshot is written on a worker thread. The sharded and
+lazy layouts write their snapshot from the live model, so they still compact on
+the loop.
+"""
+import asyncio
+import json
+import os
+import signal
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+import batch
+from journal import Journal
+from storage import Storage
+from user import Users
+
+
+READ_SIZE: int = 1 << 16
+MAX_LINE: int = 16 << 20
+DEFAULT_ADDRESS: str = "127.0.0.1:8765"
+
+
+def parse_address(address: str) -> Tuple[Optional[str], Optional[int], Optional[str]]:
+    """
+    Split ``host:port`` into (host, port, None), or a Unix socket path into (None, None, path).
+
+    ``unix:PATH`` and anything containing a ``/`` are Unix socket paths.
+    """
+    if address.startswith("unix:"):
+        return None, None, address[len("unix:"):]
+    if "/" in address:
+        return None, None, address
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port), None
+
+
+def handle_request(request: Any) -> Dict[str, Any]:
+    request_id = None
+    try:
+        if not isinstance(request, dict):
+            raise ValueError("A request must be a JSON object")
+        args = dict(request)
+        request_id = args.pop("id", None)
+        name = args.pop("cmd", None)
+        return {"id": request_id, "ok": True, "result": batch.run_command(name, args)}
+    except Exception as e:
+        return {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+def handle_line(line: bytes) -> bytes:
+    """
+    Run one request line (an object or an array of objects) and return its encoded response line.
+    """
+    try:
+        request = json.loads(line)
+    except ValueError as e:
+        response: Any = {"id": None, "ok": False, "error": f"JSONDecodeError: {e}"}
+    else:
+        if isinstance(request, list):
+            response = [handle_request(item) for item in request]
+        else:
+            response = handle_request(request)
+    return json.dumps(response).encode("utf-8") + b"\n"
+
+
+class Server:
+    """
+    The asyncio server; ``run`` serves until interrupted, then closes the storage.
+    """
+    # Users re-encoded between two turns of the event loop before a compaction
+    slice_size: int = 256
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, flush_interval: float = 1.0):
+        self.address = address
+        self.flush_interval = flush_interval
+        self.requests = 0
+        self.checkpoints = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def run(self) -> None:
+        Storage.load()
+        flags = Journal.autoflush, Journal.autosync, Journal.autocompact
+        Journal.autoflush = Journal.autosync = Journal.autocompact = False
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        host, port, path = parse_address(self.address)
+        if path is not None:
+            if os.path.exists(path):
+                os.remove(path)
+            self._server = await asyncio.start_unix_server(self.handle, path)
+        else:
+            self._server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving on {self.address}", flush=True)
+        flusher = asyncio.create_task(self.flush_periodically(stop))
+        try:
+            await stop.wait()
+        finally:
+            stop.set()
+            # Let an fsync or snapshot write in progress finish before the journal is closed
+            await flusher
+            self._server.close()
+            await self._server.wait_closed()
+            Journal.autoflush, Journal.autosync, Journal.autocompact = flags
+            if self.checkpoints:
+                # Bring the binary snapshot and search postings up to date with users.json again
+                Storage.save()
+            Storage.close()
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        pending = b""
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                *lines, pending = (pending + data).split(b"\n")
+                if len(pending) > MAX_LINE:
+                    error = {"id": None, "ok": False, "error": f"Request line longer than {MAX_LINE} bytes"}
+                    writer.write(json.dumps(error).encode("utf-8") + b"\n")
+                    break
+                if not lines:
+                    continue
+                responses: List[bytes] = [handle_line(line) for line in lines if line.strip()]
+                self.requests += len(responses)
+                # Group commit: the batch's journal records reach the OS before any response is sent.
+                Journal.flush()
+                writer.write(b"".join(responses))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def flush_periodically(self, stop: asyncio.Event) -> None:
+        """
+        Until ``stop`` is set, fsync the journal every ``flush_interval`` and fold it into the snapshot once it is long enough.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(stop.wait(), self.flush_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                fsync = Journal.prepare_sync()
+                if fsync is not None:
+                    await loop.run_in_executor(None, fsync)
+                if Journal.record_count >= Journal.compact_threshold:
+                    await self.compact(loop)
+            except Exception as e:
+                # Rotated records are kept, so the next compaction covers them too.
+                print(f"Background flush failed: {type(e).__name__}: {e}", file=sys.stderr)
+
+    async def compact(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Fold the journal into the snapshot, writing it on a worker thread when the backend allows.
+        """
+        if not Storage.backend.autosave:
+            Storage.save()
+            return
+        # Re-encode changed users a slice at a time, so requests are served in between
+        users = [user for user in Users.users if user._dirty or user.id not in Users.fragments]
+        for start in range(0, len(users), self.slice_size):
+            for user in users[start:start + self.slice_size]:
+                if user in Users.users:
+                    Users.fragment(user)
+            await asyncio.sleep(0)
+        parts = [Users.fragment(user) for user in Users.users]
+        generation = Journal.rotate()
+        self.checkpoints += await loop.run_in_executor(
+            None, lambda: Journal.write_checkpoint(Users.join_fragments(parts), generation)
+        )
+
+
+def serve(address: str = DEFAULT_ADDRESS) -> None:
+    try:
+        asyncio.run(Server(address).run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,241 @@
+"""
+Sharded on-disk layout: users spread over hash-bucket files plus a small manifest.
+
+::
+
+    data/shards/manifest.json        {"version": 1, "buckets": 64, "shards": {"7": "bucket-0007.json", ...}}
+    data/shards/bucket-0007.json     a users.json-style array of the users with id % 64 == 7
+
+    data/shards/journal.log          the write-ahead journal of the sharded layout
+
+Shards are parsed in parallel worker processes, which hand back compact tuples
+instead of dicts. Only buckets whose users changed are rewritten on save. The
+write-ahead journal still records every operation in between. It is kept next to
+the shards, apart from the journal of ``users.json``, so switching backends never
+replays one layout's operations on top of the other's snapshot.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+import sequencer
+from enums import Priority
+from fsutil import atomic_write
+from id_manager import IDManager
+from interning import DETAIL_FIELDS
+from journal import Journal
+from project import Project
+from storage import JsonStorage
+from task import DevTask, QATask, DocTask
+from user import User, Users
+
+
+MANIFEST = "manifest.json"
+JOURNAL = "journal.log"
+FORMAT_VERSION = 1
+TASK_CLASSES = {"DevTask": DevTask, "QATask": QATask, "DocTask": DocTask}
+PRIORITIES = {1: Priority.LOW, 2: Priority.MEDIUM, 3: Priority.HIGH, 4: Priority.CRITICAL}
+
+# (id, type, name, description, status, priority code, type-specific detail)
+TaskRecord = Tuple[int, str, str, str, str, int, str]
+# (id, name, description, deadline, tasks)
+ProjectRecord = Tuple[int, str, str, Optional[str], List[TaskRecord]]
+# (id, name, surname, email, projects)
+UserRecord = Tuple[int, str, str, str, List[ProjectRecord]]
+
+
+def bucket_of(user_id: int, buckets: int) -> int:
+    return user_id % buckets
+
+
+def parse_shard(path: str) -> Tuple[List[UserRecord], Tuple[int, int, int]]:
+    """
+    Parse one shard file into compact records; runs in a worker process.
+
+    Also returns the highest user, project and task IDs seen, so the parent can
+    update IDManager once per shard instead of once per entity.
+    """
+    max_user = max_project = max_task = 0
+    users: List[UserRecord] = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for data in sequencer.iter_json_array(file):
+            projects: List[ProjectRecord] = []
+            for project in data.get("projects", []):
+                tasks: List[TaskRecord] = []
+                for task in project.get("tasks", []):
+                    task_type = task["_type"]
+                    tasks.append((
+                        task["id"], task_type, task["name"], task["description"], task["status"],
+                        task.get("priority", 2), task[DETAIL_FIELDS[task_type]]
+                    ))
+                    max_task = max(max_task, task["id"])
+                projects.append((
+                    project["id"], project.get("name", "Untitled Project"), project.get("description", ""),
+                    project.get("deadline"), tasks
+                ))
+                max_project = max(max_project, project["id"])
+            users.append((data["id"], data["name"], data["surname"], data["email"], projects))
+            max_user = max(max_user, data["id"])
+    return users, (max_user, max_project, max_task)
+
+
+def build_user(record: UserRecord) -> User:
+    """
+    Turn a compact user record back into a User with its projects and tasks.
+    """
+    user_id, name, surname, email, project_records = record
+    projects = set()
+    for project_id, project_name, description, deadline, task_records in project_records:
+        tasks = {
+            TASK_CLASSES[task_type](task_id, task_name, task_description, PRIORITIES.get(priority, Priority.MEDIUM),
+                                    detail, status)
+            for task_id, task_type, task_name, task_description, status, priority, detail in task_records
+        }
+        projects.add(Project(project_id, project_name, description, tasks, deadline))
+    return User(user_id, name, surname, email, projects)
+
+
+class ShardedStorage(JsonStorage):
+    """
+    Storage backend keeping users in hash-bucket shard files under ``directory``.
+    """
+    autosave = False
+
+    def __init__(
+        self,
+        directory: str = "data/shards",
+        journal_path: Optional[str] = None,
+        buckets: int = 64,
+        workers: Optional[int] = None
+    ):
+        super().__init__(os.path.join(directory, MANIFEST), journal_path or os.path.join(directory, JOURNAL))
+        self.directory = directory
+        self.buckets = buckets
+        self.workers = workers or os.cpu_count() or 1
+        # User IDs stored in each bucket file as of the last load or save
+        self.members: Dict[int, Set[int]] = {}
+
+    def load(self) -> None:
+        Journal.path = self.journal_path
+        Journal.snapshot_writer = self.write_snapshot
+        Users.set_users(self.read_users())
+        Journal.replay()
+        Journal.open()
+
+    def read_users(self) -> Set[User]:
+        manifest = self._read_manifest()
+        if manifest is None:
+            return set()
+        self.buckets = manifest["buckets"]
+        shards = {int(bucket): os.path.join(self.directory, name) for bucket, name in manifest["shards"].items()}
+        paths = list(shards.values())
+        if self.workers > 1 and len(paths) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(paths))) as pool:
+                results = list(pool.map(parse_shard, paths))
+        else:
+            results = [parse_shard(path) for path in paths]
+
+        users: Set[User] = set()
+        self.members = {}
+        for bucket, (records, (max_user, max_project, max_task)) in zip(shards, results):
+            IDManager.validate_last_user_id(max_user)
+            IDManager.validate_last_project_id(max_project)
+            IDManager.validate_last_task_id(max_task)
+            self.members[bucket] = {record[0] for record in records}
+            for record in records:
+                user = build_user(record)
+                # Freshly read users match their shard file; only later changes should rewrite it.
+                user.clear_dirty()
+                users.add(user)
+        return users
+
+    def write_snapshot(self) -> None:
+        """
+        Rewrite only the bucket files whose membership or users changed, then the manifest.
+        """
+        grouped: Dict[int, List[User]] = {}
+        for user in Users.users:
+            grouped.setdefault(bucket_of(user.id, self.buckets), []).append(user)
+
+        emptied: List[str] = []
+        for bucket in set(grouped) | set(self.members):
+            users = grouped.get(bucket, [])
+            ids = {user.id for user in users}
+            path = os.path.join(self.directory, self._shard_name(bucket))
+            if not users:
+                emptied.append(path)
+                self.members.pop(bucket, None)
+                continue
+            if ids == self.members.get(bucket) and not any(user._dirty for user in users) and os.path.exists(path):
+                continue
+            atomic_write(path, Users.encode_users(sorted(users, key=lambda user: user.id)))
+            self.members[bucket] = ids
+
+        manifest = {
+            "version": FORMAT_VERSION,
+            "buckets": self.buckets,
+            "shards": {str(bucket): self._shard_name(bucket) for bucket in sorted(self.members)}
+        }
+        atomic_write(self.snapshot_path, json.dumps(manifest, indent=4).encode("ascii"))
+        # Only drop files once the manifest no longer references them.
+        for path in emptied:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def close(self) -> None:
+        super().close()
+        Journal.snapshot_writer = None
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as file:
+                manifest = json.load(file)
+        except FileNotFoundError:
+            return None
+        if manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported shard manifest version: {manifest.get('version')}")
+        return manifest
+
+    @staticmethod
+    def _shard_name(bucket: int) -> str:
+        return f"bucket-{bucket:04d}.json"
+
+
+def convert_to_shards(
+    json_path: str = "data/users.json",
+    directory: str = "data/shards",
+    buckets: int = 64,
+    journal_path: str = "data/journal.log"
+) -> int:
+    """
+    Split a single-file ``users.json``, with its pending journal records, into the sharded layout.
+
+    Any journal left in ``directory`` belonged to the shards being replaced and is deleted.
+    Returns the number of users written.
+    """
+    JsonStorage(json_path, journal_path).load()
+    Journal.close()
+    target = ShardedStorage(directory, buckets=buckets)
+    target.write_snapshot()
+    Journal.path = target.journal_path
+    Journal.discard()
+    return len(Users.users)
+
+
+def convert_from_shards(
+    directory: str = "data/shards",
+    json_path: str = "data/users.json",
+    journal_path: str = "data/journal.log"
+) -> int:
+    """
+    Merge the sharded layout, with its pending journal records, back into a single ``users.json``.
+
+    The journal at ``journal_path`` belonged to the ``users.json`` being replaced and is deleted.
+    Returns the number of users written.
+    """
+    ShardedStorage(directory).load()
+    Journal.close()
+    atomic_write(json_path, Users.encode_users(Users.users))
+    Journal.path = journal_path
+    Journal.discard()
+    return len(Users.users)
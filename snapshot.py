@@ -0,0 +1,502 @@
+"""
+Versioned binary snapshot of the user graph, for fast start-up and for reading single entities.
+
+Layout (all integers little-endian)::
+
+    header         "TMSB", version u16, string, user, project and task counts u32,
+                   offset of the ID index u64
+    string table   u32 byte offset of the end of each string, u32 byte length of the blob,
+                   then the strings as UTF-8, separated by NUL characters
+    user records   per user: u32 record length, then
+                       id, name, surname, email, project count
+                       per project: id, name, description, deadline, task count
+    task columns   one array per field, with a row per task in the order the
+                   projects appear above: id, name, description, detail (i32),
+                   then type, status, priority (u8)
+    ID index       sorted user IDs with the offset of their record (i64),
+                   sorted project IDs with the offset of their entry (i64), first task row and user ID,
+                   sorted task IDs with their row and project ID
+
+Strings are references into the string table (-1 for a missing deadline), and
+type, status and priority are small integer codes. Tasks are stored column by
+column so they can be built with a handful of C-level passes instead of a
+Python loop per task. The ID index lets ``MappedSnapshot`` decode any single
+user, project or task straight from a memory-mapped file.
+"""
+import gc
+import mmap
+import os
+import struct
+import sys
+import weakref
+from array import array
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+from itertools import repeat
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from enums import Priority, Status
+from fsutil import atomic_open
+from id_manager import IDManager
+from interning import Interning
+from project import Project
+from task import Task, DevTask, QATask, DocTask
+from user import User
+
+
+MAGIC = b"TMSB"
+FORMAT_VERSION = 2
+
+HEADER = struct.Struct("<4sHIIIIQ")
+LENGTH = struct.Struct("<I")
+USER = struct.Struct("<iiiiI")
+PROJECT = struct.Struct("<iiiiI")
+# Task columns in file order, with their array type codes
+TASK_COLUMNS: List[Tuple[str, str]] = [
+    ("id", "i"), ("name", "i"), ("description", "i"), ("detail", "i"),
+    ("type", "B"), ("status", "B"), ("priority", "B"),
+]
+# ID index arrays in file order: (name, type code, entity whose count gives the length)
+INDEX_COLUMNS: List[Tuple[str, str, str]] = [
+    ("user_ids", "i", "user"), ("user_offsets", "q", "user"),
+    ("project_ids", "i", "project"), ("project_offsets", "q", "project"),
+    ("project_rows", "I", "project"), ("project_users", "i", "project"),
+    ("task_ids", "i", "task"), ("task_rows", "I", "task"), ("task_projects", "i", "task"),
+]
+
+TASK_CLASSES = [DevTask, QATask, DocTask]
+DETAIL_FIELDS = ["language", "test_type", "document"]
+STATUSES = list(Status)
+PRIORITIES = [None, Priority.LOW, Priority.MEDIUM, Priority.HIGH, Priority.CRITICAL]
+
+TYPE_CODES = {cls: code for code, cls in enumerate(TASK_CLASSES)}
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+PRIORITY_CODES = {priority: code for code, priority in enumerate(PRIORITIES) if priority is not None}
+# Above this many distinct detail strings the column is not low-cardinality, and is left uninterned
+MAX_INTERNED_DETAILS = 256
+
+_consume = deque(maxlen=0).extend
+
+
+class StringTable:
+    """
+    Assigns each distinct string a reference, in order of first use.
+    """
+    def __init__(self) -> None:
+        self.refs: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def ref(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        ref = self.refs.get(value)
+        if ref is None:
+            ref = self.refs[value] = len(self.strings)
+            self.strings.append(value)
+        return ref
+
+    def encode(self) -> bytes:
+        encoded = [value.encode("utf-8") for value in self.strings]
+        ends = array('I')
+        end = -1
+        for value in encoded:
+            end += len(value) + 1
+            ends.append(end)
+        blob = b"\0".join(encoded)
+        return _little_endian(ends) + LENGTH.pack(len(blob)) + blob
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_snapshot(path: str, users: Set[User]) -> None:
+    """
+    Write ``users`` to ``path`` in the binary format, atomically.
+    """
+    table = StringTable()
+    ref = table.ref
+    columns = {field: array(typecode) for field, typecode in TASK_COLUMNS}
+    ids, names, descriptions, details = columns["id"], columns["name"], columns["description"], columns["detail"]
+    types, statuses, priorities = columns["type"], columns["status"], columns["priority"]
+    records: List[bytes] = []
+    # (user ID, offset of the record from the first record)
+    user_entries: List[Tuple[int, int]] = []
+    # (project ID, offset of its entry from the first record, first task row, user ID)
+    project_entries: List[Tuple[int, int, int, int]] = []
+    # (task ID, row, project ID)
+    task_entries: List[Tuple[int, int, int]] = []
+    offset = 0
+    for user in users:
+        record = bytearray(USER.pack(user.id, ref(user.name), ref(user.surname), ref(user.email), len(user.projects)))
+        for project in user.projects:
+            deadline = project.deadline.strftime('%Y-%m-%d') if project.deadline else None
+            project_entries.append((project.id, offset + LENGTH.size + len(record), len(ids), user.id))
+            record += PROJECT.pack(project.id, ref(project.name), ref(project.description), ref(deadline), len(project.tasks))
+            for task in project.tasks:
+                code = TYPE_CODES[type(task)]
+                task_entries.append((task.id, len(ids), project.id))
+                ids.append(task.id)
+                names.append(ref(task.name))
+                descriptions.append(ref(task.description))
+                details.append(ref(getattr(task, DETAIL_FIELDS[code])))
+                types.append(code)
+                statuses.append(STATUS_CODES[task.status])
+                priorities.append(PRIORITY_CODES[task.priority])
+        user_entries.append((user.id, offset))
+        records.append(LENGTH.pack(len(record)) + record)
+        offset += LENGTH.size + len(record)
+
+    strings = table.encode()
+    records_start = HEADER.size + len(strings)
+    index_offset = records_start + offset + sum(column.itemsize * len(column) for column in columns.values())
+    user_entries.sort()
+    project_entries.sort()
+    task_entries.sort()
+    index = {
+        "user_ids": array('i', [entry[0] for entry in user_entries]),
+        "user_offsets": array('q', [records_start + entry[1] for entry in user_entries]),
+        "project_ids": array('i', [entry[0] for entry in project_entries]),
+        "project_offsets": array('q', [records_start + entry[1] for entry in project_entries]),
+        "project_rows": array('I', [entry[2] for entry in project_entries]),
+        "project_users": array('i', [entry[3] for entry in project_entries]),
+        "task_ids": array('i', [entry[0] for entry in task_entries]),
+        "task_rows": array('I', [entry[1] for entry in task_entries]),
+        "task_projects": array('i', [entry[2] for entry in task_entries]),
+    }
+
+    with atomic_open(path) as file:
+        file.write(HEADER.pack(
+            MAGIC, FORMAT_VERSION, len(table.strings), len(records), len(project_entries), len(ids), index_offset
+        ))
+        file.write(strings)
+        for record in records:
+            file.write(record)
+        for field, _ in TASK_COLUMNS:
+            file.write(_little_endian(columns[field]))
+        for name, _, _ in INDEX_COLUMNS:
+            file.write(_little_endian(index[name]))
+
+
+def read_snapshot(path: str) -> Set[User]:
+    """
+    Read a binary snapshot written by ``write_snapshot``.
+
+    Tasks are built without going through ``Task.__init__``: their enums come
+    straight from the code tables, so there is nothing left to parse or validate.
+    Raises ValueError if the file is not a snapshot of a supported version.
+    """
+    with open(path, 'rb') as file:
+        data = memoryview(file.read())
+    # Nothing built here can form a reference cycle, so collections during the build are pure overhead.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _read_users(path, data)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _read_header(path: str, data: memoryview) -> Tuple[int, int, int, int, int]:
+    """
+    Check the header and return the string, user, project and task counts and the index offset.
+    """
+    if len(data) < HEADER.size:
+        raise ValueError(f"Truncated snapshot: {path}")
+    magic, version, *counts = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"Not a binary snapshot: {path}")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {version}")
+    return tuple(counts)
+
+
+def _read_users(path: str, data: memoryview) -> Set[User]:
+    string_count, user_count, project_count, task_count, index_offset = _read_header(path, data)
+
+    position = HEADER.size
+    ends = _read_column(data, position, 'I', string_count)
+    position += ends.itemsize * string_count
+    (blob_length,) = LENGTH.unpack_from(data, position)
+    position += LENGTH.size
+    blob = data[position:position + blob_length]
+    position += blob_length
+    strings = str(blob, "utf-8").split("\0") if string_count else []
+    if len(strings) != string_count:
+        # Some string contains a NUL itself; fall back to the stored offsets.
+        strings = [str(blob[start:end], "utf-8") for start, end in zip([0] + [end + 1 for end in ends], ends)]
+
+    # User and project records; task rows are attached afterwards, in the same order.
+    headers: List[Tuple[int, int, int, int, List[Tuple[int, int, int, int, int]]]] = []
+    for _ in range(user_count):
+        (length,) = LENGTH.unpack_from(data, position)
+        position += LENGTH.size
+        record_end = position + length
+        user_id, name, surname, email, projects = USER.unpack_from(data, position)
+        position += USER.size
+        project_rows = list(PROJECT.iter_unpack(data[position:position + PROJECT.size * projects]))
+        position += PROJECT.size * projects
+        if position != record_end:
+            raise ValueError(f"Corrupt record for user {user_id} in {path}")
+        headers.append((user_id, name, surname, email, project_rows))
+
+    columns: Dict[str, array] = {}
+    for field, typecode in TASK_COLUMNS:
+        columns[field] = _read_column(data, position, typecode, task_count)
+        position += columns[field].itemsize * task_count
+    if position != index_offset:
+        raise ValueError(f"Corrupt task columns in {path}")
+    _intern_details(columns, strings)
+    tasks = _build_tasks(columns, strings)
+
+    deadlines: Dict[int, Optional[datetime]] = {-1: None}
+    users: Set[User] = set()
+    start = 0
+    for user_id, name, surname, email, project_rows in headers:
+        projects = set()
+        for project_id, project_name, description, deadline, count in project_rows:
+            if deadline not in deadlines:
+                deadlines[deadline] = Interning.deadline(strings[deadline])
+            projects.add(Project(project_id, strings[project_name], strings[description], set(tasks[start:start + count]),
+                                 deadlines[deadline]))
+            start += count
+        users.add(User(user_id, strings[name], strings[surname], strings[email], projects))
+
+    if headers:
+        IDManager.validate_last_user_id(max(header[0] for header in headers))
+        IDManager.validate_last_project_id(max((row[0] for header in headers for row in header[4]), default=0))
+    if tasks:
+        IDManager.validate_last_task_id(max(columns["id"]))
+    return users
+
+
+def _build_tasks(columns: Dict[str, Sequence[int]], strings: Sequence[str]) -> List[Task]:
+    """
+    Build every task from the columns, one field at a time across all rows.
+    """
+    lookup = strings.__getitem__
+    types = columns["type"]
+    tasks = list(map(object.__new__, map(TASK_CLASSES.__getitem__, types)))
+    _consume(map(setattr, tasks, repeat("id"), columns["id"]))
+    _consume(map(setattr, tasks, repeat("name"), map(lookup, columns["name"])))
+    _consume(map(setattr, tasks, repeat("description"), map(lookup, columns["description"])))
+    _consume(map(setattr, tasks, repeat("status"), map(STATUSES.__getitem__, columns["status"])))
+    _consume(map(setattr, tasks, repeat("priority"), map(PRIORITIES.__getitem__, columns["priority"])))
+    _consume(map(setattr, tasks, repeat("_dirty"), repeat(True)))
+    _consume(map(setattr, tasks, map(DETAIL_FIELDS.__getitem__, types), map(lookup, columns["detail"])))
+    return tasks
+
+
+def _intern_details(columns: Dict[str, Sequence[int]], strings: List[str]) -> None:
+    """
+    Swap each detail string in ``strings`` for the pooled instance of its field, so loaded tasks share them.
+    """
+    details, types = columns["detail"], columns["type"]
+    refs = set(details)
+    if len(refs) > MAX_INTERNED_DETAILS:
+        return
+    for ref in refs:
+        # The field is that of the first task using the string.
+        strings[ref] = Interning.intern(DETAIL_FIELDS[types[details.index(ref)]], strings[ref])
+
+
+def _read_column(data: memoryview, position: int, typecode: str, count: int) -> array:
+    column = array(typecode)
+    column.frombytes(data[position:position + column.itemsize * count])
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+class MappedSnapshot:
+    """
+    Read-only access to single users, projects and tasks of a binary snapshot, without loading it.
+
+    The file is memory-mapped and only the requested entities are decoded, so
+    opening a snapshot costs the same for ten tasks as for ten million. The
+    returned objects are detached copies: they are not registered in the
+    Registry, and changing them does not change the file. ``raw_user`` and
+    ``raw_string`` return zero-copy slices of the mapping, which stay valid
+    until ``close``. ``close`` releases them, so using one afterwards raises ValueError.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._data = memoryview(self._mmap)
+        self._views: List[Sequence[int]] = []
+        # Slices handed to callers, released on close so the mapping can be closed
+        self._exported: "weakref.WeakSet[memoryview]" = weakref.WeakSet()
+        string_count, self.user_count, self.project_count, self.task_count, index_offset = _read_header(path, self._data)
+
+        position = HEADER.size
+        self._string_ends = self._column(position, 'I', string_count)
+        position += 4 * string_count
+        self._blob_start = position + LENGTH.size
+
+        # The task columns end where the index starts.
+        self._columns: Dict[str, Sequence[int]] = {}
+        position = index_offset - sum(array(typecode).itemsize for _, typecode in TASK_COLUMNS) * self.task_count
+        for field, typecode in TASK_COLUMNS:
+            self._columns[field] = self._column(position, typecode, self.task_count)
+            position += array(typecode).itemsize * self.task_count
+        counts = {"user": self.user_count, "project": self.project_count, "task": self.task_count}
+        self._index: Dict[str, Sequence[int]] = {}
+        for name, typecode, entity in INDEX_COLUMNS:
+            self._index[name] = self._column(position, typecode, counts[entity])
+            position += array(typecode).itemsize * counts[entity]
+        if position != len(self._data):
+            raise ValueError(f"Corrupt index in {path}")
+
+    def __enter__(self) -> "MappedSnapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for view in list(self._exported):
+            view.release()
+        self._exported.clear()
+        for view in self._views:
+            if isinstance(view, memoryview):
+                view.release()
+        self._views = []
+        self._data.release()
+        self._mmap.close()
+        self._file.close()
+
+    def raw_string(self, ref: int) -> Optional[memoryview]:
+        """
+        The UTF-8 bytes of string ``ref`` as a slice of the mapping, or None for a missing value.
+        """
+        return self._export(self._raw_string(ref))
+
+    def string(self, ref: int) -> Optional[str]:
+        raw = self._raw_string(ref)
+        if raw is None:
+            return None
+        with raw:
+            return str(raw, "utf-8")
+
+    def raw_user(self, user_id: int) -> Optional[memoryview]:
+        """
+        The encoded record of ``user_id`` (user and project entries, without tasks) as a slice of the mapping.
+        """
+        return self._export(self._raw_user(user_id))
+
+    def user_ids(self) -> Sequence[int]:
+        return self._index["user_ids"]
+
+    def get_user(self, user_id: int, with_projects: bool = True) -> Optional[User]:
+        """
+        Decode one user, with its projects and their tasks unless ``with_projects`` is False.
+        """
+        record = self._raw_user(user_id)
+        if record is None:
+            return None
+        with record:
+            _, name, surname, email, project_count = USER.unpack_from(record, 0)
+            project_ids = [PROJECT.unpack_from(record, position)[0]
+                           for position in range(USER.size, USER.size + PROJECT.size * project_count, PROJECT.size)]
+        projects = {self.get_project(project_id) for project_id in project_ids} if with_projects else set()
+        return User(user_id, self.string(name), self.string(surname), self.string(email), projects)
+
+    def get_project(self, project_id: int) -> Optional[Project]:
+        """
+        Decode one project and its tasks.
+        """
+        position = self._position("project", project_id)
+        if position is None:
+            return None
+        offset = self._index["project_offsets"][position]
+        first_row = self._index["project_rows"][position]
+        _, name, description, deadline, task_count = PROJECT.unpack_from(self._data, offset)
+        tasks = set(self._tasks(range(first_row, first_row + task_count)))
+        return Project(project_id, self.string(name), self.string(description), tasks, self.string(deadline))
+
+    def get_task(self, task_id: int) -> Optional[Task]:
+        position = self._position("task", task_id)
+        if position is None:
+            return None
+        return self._tasks([self._index["task_rows"][position]])[0]
+
+    def get_project_owner(self, project_id: int) -> Optional[int]:
+        """
+        The ID of the user owning ``project_id``.
+        """
+        position = self._position("project", project_id)
+        return None if position is None else self._index["project_users"][position]
+
+    def get_task_owner(self, task_id: int) -> Optional[int]:
+        """
+        The ID of the project owning ``task_id``.
+        """
+        position = self._position("task", task_id)
+        return None if position is None else self._index["task_projects"][position]
+
+    def list_projects(self, user_id: int) -> List[Project]:
+        user = self.get_user(user_id)
+        return [] if user is None else list(user.projects)
+
+    def list_tasks(self, project_id: int) -> List[Task]:
+        project = self.get_project(project_id)
+        return [] if project is None else list(project.tasks)
+
+    def _tasks(self, rows: Sequence[int]) -> List[Task]:
+        columns = {field: [column[row] for row in rows] for field, column in self._columns.items()}
+        refs = {ref for field in ("name", "description", "detail") for ref in columns[field]}
+        strings = dict(zip(refs, map(self.string, refs)))
+        return _build_tasks(columns, strings)
+
+    def _position(self, kind: str, entity_id: int) -> Optional[int]:
+        ids = self._index[f"{kind}_ids"]
+        position = bisect_left(ids, entity_id)
+        if position < len(ids) and ids[position] == entity_id:
+            return position
+        return None
+
+    def _find(self, kind: str, entity_id: int) -> Optional[int]:
+        position = self._position(kind, entity_id)
+        return None if position is None else self._index[f"{kind}_offsets"][position]
+
+    def _raw_string(self, ref: int) -> Optional[memoryview]:
+        if ref < 0:
+            return None
+        start = self._string_ends[ref - 1] + 1 if ref else 0
+        return self._data[self._blob_start + start:self._blob_start + self._string_ends[ref]]
+
+    def _raw_user(self, user_id: int) -> Optional[memoryview]:
+        offset = self._find("user", user_id)
+        if offset is None:
+            return None
+        (length,) = LENGTH.unpack_from(self._data, offset)
+        return self._data[offset + LENGTH.size:offset + LENGTH.size + length]
+
+    def _export(self, view: Optional[memoryview]) -> Optional[memoryview]:
+        if view is not None:
+            self._exported.add(view)
+        return view
+
+    def _column(self, position: int, typecode: str, count: int) -> Sequence[int]:
+        """
+        A typed view of ``count`` values at ``position``; zero-copy on little-endian machines.
+        """
+        if sys.byteorder == "big":
+            return _read_column(self._data, position, typecode, count)
+        view = self._data[position:position + array(typecode).itemsize * count].cast(typecode)
+        self._views.append(view)
+        return view
+
+
+def is_newer(binary_path: str, json_path: str) -> bool:
+    """
+    Whether the binary snapshot exists and is at least as recent as the JSON one.
+    """
+    if not os.path.exists(binary_path):
+        return False
+    return not os.path.exists(json_path) or os.path.getmtime(binary_path) >= os.path.getmtime(json_path)
@@ -0,0 +1,183 @@
+"""
+Opt-in latency histograms and cProfile capture.
+
+Set ``TMS_STATS`` (or pass ``--stats``) to time the functions decorated with
+``timed`` and the menu actions; the histograms are printed by the Stats menu and
+written as JSON at exit. Set ``TMS_PROFILE`` (or pass ``--profile``) to run the
+whole session under cProfile and write a ``.prof`` file at exit. While disabled,
+a timed function costs one extra call and a flag check.
+"""
+import cProfile
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+from fsutil import atomic_write
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Four buckets per power of two, so a percentile is within ~19% of the true value.
+SUB_BUCKETS = 4
+
+
+class Histogram:
+    """
+    Log-bucketed distribution of durations in nanoseconds.
+    """
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.buckets: Dict[int, int] = {}
+
+    def record(self, ns: int) -> None:
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+        if ns < SUB_BUCKETS:
+            bucket = ns
+        else:
+            shift = ns.bit_length() - 3
+            bucket = SUB_BUCKETS + (shift << 2 | (ns >> shift) & 3)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, fraction: float) -> int:
+        """
+        Upper bound of the bucket holding the given fraction of the samples, capped at the maximum.
+        """
+        rank = max(1, round(fraction * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.max, self._upper_bound(bucket))
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        ms = 1e-6
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * ms, 3),
+            "mean_ms": round(self.total / self.count * ms, 4) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50) * ms, 4),
+            "p95_ms": round(self.percentile(0.95) * ms, 4),
+            "p99_ms": round(self.percentile(0.99) * ms, 4),
+            "max_ms": round(self.max * ms, 4)
+        }
+
+    @staticmethod
+    def _upper_bound(bucket: int) -> int:
+        if bucket < SUB_BUCKETS:
+            return bucket
+        shift, sub = (bucket - SUB_BUCKETS) >> 2, (bucket - SUB_BUCKETS) & 3
+        return ((SUB_BUCKETS + sub + 1) << shift) - 1
+
+
+class Stats:
+    """
+    Named latency histograms, recorded only while ``enabled``.
+    """
+    enabled: bool = bool(os.environ.get("TMS_STATS"))
+    path: str = os.environ.get("TMS_STATS_FILE", "data/stats.json")
+    histograms: Dict[str, Histogram] = {}
+
+    @classmethod
+    def enable(cls, path: Optional[str] = None) -> None:
+        cls.enabled = True
+        if path:
+            cls.path = path
+
+    @classmethod
+    def record(cls, name: str, ns: int) -> None:
+        histogram = cls.histograms.get(name)
+        if histogram is None:
+            histogram = cls.histograms[name] = Histogram()
+        histogram.record(ns)
+
+    @classmethod
+    @contextmanager
+    def timer(cls, name: str) -> Iterator[None]:
+        if not cls.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            cls.record(name, time.perf_counter_ns() - start)
+
+    @classmethod
+    def report(cls) -> Dict[str, Dict[str, Any]]:
+        return {name: cls.histograms[name].to_dict() for name in sorted(cls.histograms)}
+
+    @classmethod
+    def dump(cls, path: Optional[str] = None) -> None:
+        """
+        Write the report as JSON to ``path`` (default ``Stats.path``).
+        """
+        path = path or cls.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        atomic_write(path, json.dumps(cls.report(), indent=4).encode("utf-8"))
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.histograms = {}
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """
+    Record the latency of every call of the decorated function under ``name`` while stats are enabled.
+    """
+    def decorate(function: F) -> F:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not Stats.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                Stats.record(name, time.perf_counter_ns() - start)
+        return wrapper
+    return decorate
+
+
+class Profiler:
+    """
+    Whole-session cProfile capture, written to one ``.prof`` file per session.
+    """
+    profile: Optional[cProfile.Profile] = None
+    path: Optional[str] = None
+
+    @classmethod
+    def start(cls, path: Optional[str] = None) -> str:
+        """
+        Start profiling; ``path`` defaults to a timestamped file under ``data/``. Returns the path.
+        """
+        cls.path = path or time.strftime(f"data/profile-%Y%m%d-%H%M%S-{os.getpid()}.prof")
+        cls.profile = cProfile.Profile()
+        cls.profile.enable()
+        return cls.path
+
+    @classmethod
+    def stop(cls) -> Optional[str]:
+        """
+        Stop profiling and write the ``.prof`` file; returns its path, or None if not profiling.
+        """
+        if cls.profile is None:
+            return None
+        cls.profile.disable()
+        directory = os.path.dirname(cls.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        cls.profile.dump_stats(cls.path)
+        cls.profile = None
+        return cls.path
@@ -0,0 +1,442 @@
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+import struct
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, TYPE_CHECKING
+import sequencer
+import snapshot
+from enums import Priority, Status
+from journal import Journal
+from search_index import SearchIndex
+from stats import timed
+from user import User, Users
+
+if TYPE_CHECKING:
+    from task import Task
+
+
+PRIORITY_CODES: Dict[str, int] = {"Low": 1, "Medium": 2, "High": 3, "Critical": 4}
+
+
+class StorageBackend(ABC):
+    """
+    Base class for persistence backends.
+
+    A backend loads the whole model into ``Users`` on start-up, persists each
+    mutating operation as it happens (using the same ``op`` records as the
+    journal), and may answer task filters without scanning Python objects.
+    """
+    # Whether the snapshot is the users.json array of ``Users.fragments``, which autosave can write in the background
+    autosave: bool = False
+    # Whether only part of the model is registered at a time, so the Registry listeners see only that part
+    partial: bool = False
+
+    @abstractmethod
+    def load(self) -> None:
+        """
+        Read the persisted state into ``Users``.
+        """
+
+    @abstractmethod
+    def record(self, op: str, **fields: Any) -> None:
+        """
+        Persist one mutating operation.
+        """
+
+    @abstractmethod
+    def save(self) -> None:
+        """
+        Persist the complete in-memory state.
+        """
+
+    def close(self) -> None:
+        pass
+
+    def begin(self) -> None:
+        """
+        Start a chunk: operations recorded until ``commit`` may be persisted together.
+        """
+
+    def commit(self) -> None:
+        """
+        Make every operation recorded since ``begin`` durable.
+        """
+
+    def query_task_ids(self, status: Optional[Status] = None, priority: Optional[Priority] = None) -> Optional[List[int]]:
+        """
+        Return IDs of tasks matching the filters, or None if the backend cannot push the query down.
+        """
+        return None
+
+    def query_task_groups(
+        self,
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None
+    ) -> Optional[Iterator[Tuple[str, List["Task"]]]]:
+        """
+        Yield matching tasks as ("user - project", tasks) groups without resolving them through the Registry,
+        or return None to let the caller resolve ``query_task_ids`` or scan the task index.
+        """
+        return None
+
+
+class JsonStorage(StorageBackend):
+    """
+    The ``users.json`` snapshot plus the write-ahead journal.
+
+    Unless ``binary_path`` is empty, every snapshot is also written in the binary
+    format of ``snapshot.py`` (``users.bin`` by default), and start-up reads that
+    copy instead of the JSON while it is at least as new. The full-text search
+    postings are saved next to it (``users.json.search``) so they need not be
+    rebuilt on start-up.
+    """
+    autosave = True
+
+    def __init__(
+        self,
+        snapshot_path: str = "data/users.json",
+        journal_path: str = "data/journal.log",
+        binary_path: Optional[str] = None
+    ):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.binary_path = os.path.splitext(snapshot_path)[0] + ".bin" if binary_path is None else binary_path
+        self.search_path = snapshot_path + ".search"
+
+    def load(self) -> None:
+        Journal.snapshot_path = self.snapshot_path
+        Journal.path = self.journal_path
+        Journal.snapshot_writer = self.write_snapshot
+        SearchIndex.restore(self.search_path, self.snapshot_path)
+        Users.set_users(self.read_users())
+        Journal.replay()
+        Journal.open()
+
+    def read_users(self) -> Set[User]:
+        if self.binary_path and snapshot.is_newer(self.binary_path, self.snapshot_path):
+            try:
+                return snapshot.read_snapshot(self.binary_path)
+            except (ValueError, struct.error) as e:
+                print(f"Ignoring binary snapshot {self.binary_path}: {e}")
+        return sequencer.deserialize_from_file(self.snapshot_path)
+
+    def write_snapshot(self) -> None:
+        Journal.write_snapshot()
+        if self.binary_path:
+            snapshot.write_snapshot(self.binary_path, Users.users)
+        SearchIndex.save(self.search_path, self.snapshot_path)
+
+    def record(self, op: str, **fields: Any) -> None:
+        Journal.append(op, **fields)
+
+    def save(self) -> None:
+        Journal.compact()
+
+    def close(self) -> None:
+        if Journal.record_count >= Journal.compact_threshold:
+            Journal.compact()
+        Journal.close()
+
+    def begin(self) -> None:
+        # A chunk's records are buffered and fsynced once; compaction waits until the chunk is committed.
+        self._journal_flags = Journal.autoflush, Journal.autosync, Journal.autocompact
+        Journal.autoflush = Journal.autosync = Journal.autocompact = False
+
+    def commit(self) -> None:
+        Journal.sync()
+        Journal.autoflush, Journal.autosync, Journal.autocompact = self._journal_flags
+        if Journal.autocompact and Journal.record_count >= Journal.compact_threshold:
+            Journal.compact()
+
+
+class SqliteStorage(StorageBackend):
+    """
+    Normalized users/projects/tasks tables in a SQLite database.
+
+    Each operation is written in its own transaction, and status/priority filters
+    are answered from indexed columns.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            surname TEXT NOT NULL,
+            email TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS projects (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            deadline TEXT
+        );
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+            type TEXT NOT NULL,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            status TEXT NOT NULL,
+            priority INTEGER NOT NULL,
+            language TEXT,
+            test_type TEXT,
+            document TEXT
+        );
+        CREATE INDEX IF NOT EXISTS projects_user ON projects(user_id);
+        CREATE INDEX IF NOT EXISTS projects_deadline ON projects(deadline);
+        CREATE INDEX IF NOT EXISTS tasks_project ON tasks(project_id);
+        CREATE INDEX IF NOT EXISTS tasks_status ON tasks(status);
+        CREATE INDEX IF NOT EXISTS tasks_priority ON tasks(priority);
+        CREATE INDEX IF NOT EXISTS tasks_type ON tasks(type);
+    """
+
+    def __init__(self, path: str = "data/users.db"):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(self.SCHEMA)
+        self.in_chunk = False
+
+    def load(self) -> None:
+        Users.set_users({sequencer._deserialize_user(data) for data in self._iter_user_dicts()})
+
+    def _iter_user_dicts(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield users in the ``users.json`` dict shape, merging three ordered cursors
+        so only one user's rows are held at a time.
+        """
+        projects = _Peekable(self.conn.execute(
+            "SELECT user_id, id, name, description, deadline FROM projects ORDER BY user_id, id"
+        ))
+        tasks = _Peekable(self.conn.execute(
+            "SELECT p.user_id, t.project_id, t.id, t.type, t.name, t.description, t.status, t.priority, "
+            "t.language, t.test_type, t.document "
+            "FROM tasks t JOIN projects p ON p.id = t.project_id ORDER BY p.user_id, t.project_id"
+        ))
+        for user_id, name, surname, email in self.conn.execute("SELECT id, name, surname, email FROM users ORDER BY id"):
+            user_projects = []
+            while projects.peek() is not None and projects.peek()[0] == user_id:
+                _, project_id, project_name, description, deadline = next(projects)
+                project_tasks = []
+                while tasks.peek() is not None and tasks.peek()[:2] == (user_id, project_id):
+                    project_tasks.append(_task_row_to_dict(next(tasks)[2:]))
+                user_projects.append({
+                    "id": project_id,
+                    "name": project_name,
+                    "description": description,
+                    "tasks": project_tasks,
+                    "deadline": deadline
+                })
+            yield {"id": user_id, "name": name, "surname": surname, "email": email, "projects": user_projects}
+
+    def record(self, op: str, **fields: Any) -> None:
+        if self.in_chunk:
+            getattr(self, f"_op_{op}")(**fields)
+            return
+        with self.conn:
+            getattr(self, f"_op_{op}")(**fields)
+
+    def begin(self) -> None:
+        # Operations of a chunk share one transaction instead of one each.
+        self.in_chunk = True
+
+    def commit(self) -> None:
+        self.in_chunk = False
+        self.conn.commit()
+
+    def save(self) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM users")
+            for user in Users.users:
+                self._insert_user(user.to_dict())
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def query_task_ids(self, status: Optional[Status] = None, priority: Optional[Priority] = None) -> Optional[List[int]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status.value)
+        if priority is not None:
+            clauses.append("priority = ?")
+            params.append(PRIORITY_CODES[priority.value])
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return [row[0] for row in self.conn.execute(f"SELECT id FROM tasks{where}", params)]
+
+    def _insert_user(self, data: Dict[str, Any]) -> None:
+        self.conn.execute(
+            "INSERT INTO users (id, name, surname, email) VALUES (?, ?, ?, ?)",
+            (data["id"], data["name"], data["surname"], data["email"])
+        )
+        for project in data.get("projects", []):
+            self._insert_project(data["id"], project)
+
+    def _insert_project(self, user_id: int, data: Dict[str, Any]) -> None:
+        self.conn.execute(
+            "INSERT INTO projects (id, user_id, name, description, deadline) VALUES (?, ?, ?, ?, ?)",
+            (data["id"], user_id, data["name"], data["description"], data.get("deadline"))
+        )
+        for task in data.get("tasks", []):
+            self._insert_task(data["id"], task)
+
+    def _insert_task(self, project_id: int, data: Dict[str, Any]) -> None:
+        self.conn.execute(
+            "INSERT INTO tasks (id, project_id, type, name, description, status, priority, language, test_type, document) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                data["id"], project_id, data["_type"], data["name"], data["description"], data["status"],
+                data["priority"], data.get("language"), data.get("test_type"), data.get("document")
+            )
+        )
+
+    def _op_create_user(self, user: Dict[str, Any]) -> None:
+        self._insert_user(user)
+
+    def _op_update_user(self, id: int, name: str, surname: str, email: str) -> None:
+        self.conn.execute("UPDATE users SET name = ?, surname = ?, email = ? WHERE id = ?", (name, surname, email, id))
+
+    def _op_remove_user(self, id: int) -> None:
+        self.conn.execute("DELETE FROM users WHERE id = ?", (id,))
+
+    def _op_create_project(self, user_id: int, project: Dict[str, Any]) -> None:
+        self._insert_project(user_id, project)
+
+    def _op_update_project(self, id: int, name: str, description: str, deadline: Optional[str]) -> None:
+        self.conn.execute(
+            "UPDATE projects SET name = ?, description = ?, deadline = ? WHERE id = ?",
+            (name, description, deadline[:10] if deadline else None, id)
+        )
+
+    def _op_remove_project(self, id: int) -> None:
+        self.conn.execute("DELETE FROM projects WHERE id = ?", (id,))
+
+    def _op_create_task(self, project_id: int, task: Dict[str, Any]) -> None:
+        self._insert_task(project_id, task)
+
+    def _op_update_task(self, id: int, **fields: Any) -> None:
+        if "priority" in fields and fields["priority"] is not None:
+            fields["priority"] = PRIORITY_CODES[str(fields["priority"])]
+        columns = {key: value for key, value in fields.items() if value is not None}
+        if columns:
+            assignments = ", ".join(f"{column} = ?" for column in columns)
+            self.conn.execute(f"UPDATE tasks SET {assignments} WHERE id = ?", (*columns.values(), id))
+
+    def _op_remove_task(self, id: int) -> None:
+        self.conn.execute("DELETE FROM tasks WHERE id = ?", (id,))
+
+    def _op_change_task_status(self, id: int, status: str) -> None:
+        self.conn.execute("UPDATE tasks SET status = ? WHERE id = ?", (status, id))
+
+
+class _Peekable:
+    def __init__(self, rows: Iterator[Tuple[Any, ...]]):
+        self._rows = rows
+        self._next: Optional[Tuple[Any, ...]] = next(rows, None)
+
+    def peek(self) -> Optional[Tuple[Any, ...]]:
+        return self._next
+
+    def __next__(self) -> Tuple[Any, ...]:
+        row = self._next
+        self._next = next(self._rows, None)
+        return row
+
+
+def _task_row_to_dict(row: Tuple[Any, ...]) -> Dict[str, Any]:
+    task_id, task_type, name, description, status, priority, language, test_type, document = row
+    data: Dict[str, Any] = {
+        "id": task_id,
+        "name": name,
+        "description": description,
+        "status": status,
+        "_type": task_type,
+        "priority": priority
+    }
+    if task_type == "DevTask":
+        data["language"] = language
+    elif task_type == "QATask":
+        data["test_type"] = test_type
+    elif task_type == "DocTask":
+        data["document"] = document
+    return data
+
+
+class Storage:
+    """
+    The active persistence backend used by the CLI.
+
+    While ``recording`` is False, per-operation writes are skipped; the caller is
+    then responsible for a full ``save()``.
+    """
+    backend: StorageBackend = JsonStorage()
+    recording: bool = True
+
+    @classmethod
+    def use(cls, backend: StorageBackend) -> None:
+        cls.backend = backend
+
+    @classmethod
+    @timed("Storage.load")
+    def load(cls) -> None:
+        cls.backend.load()
+
+    @classmethod
+    def record(cls, op: str, **fields: Any) -> None:
+        if cls.recording:
+            cls.backend.record(op, **fields)
+
+    @classmethod
+    @timed("Storage.save")
+    def save(cls) -> None:
+        cls.backend.save()
+
+    @classmethod
+    @timed("Storage.close")
+    def close(cls) -> None:
+        cls.backend.close()
+
+    @classmethod
+    @contextmanager
+    def chunk(cls) -> Iterator[None]:
+        """
+        Group the operations recorded inside the block into one commit of the backend.
+        """
+        cls.backend.begin()
+        try:
+            yield
+        finally:
+            cls.backend.commit()
+
+    @classmethod
+    def query_task_ids(cls, status: Optional[Status] = None, priority: Optional[Priority] = None) -> Optional[List[int]]:
+        return cls.backend.query_task_ids(status, priority)
+
+    @classmethod
+    def query_task_groups(
+        cls,
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None
+    ) -> Optional[Iterator[Tuple[str, List["Task"]]]]:
+        return cls.backend.query_task_groups(status, priority)
+
+
+def migrate_json_to_sqlite(json_path: str = "data/users.json", db_path: str = "data/users.db") -> int:
+    """
+    Copy a ``users.json`` snapshot (and any pending journal) into a SQLite database.
+
+    Existing rows in the database are replaced. Returns the number of users migrated.
+    """
+    JsonStorage(json_path, os.path.join(os.path.dirname(json_path), "journal.log")).load()
+    Journal.close()
+    target = SqliteStorage(db_path)
+    try:
+        target.save()
+    finally:
+        target.close()
+    return len(Users.users)
@@ -1,9 +1,24 @@
 from typing import Optional, Dict, Any
 from enums import Priority, Status
 from id_manager import IDManager
+from interning import DETAIL_FIELDS, Interning
+from registry import Registry
+
+
+# Priorities are serialized as 1..4; unknown codes load as Medium.
+PRIORITY_CODES: Dict[Priority, int] = {Priority.LOW: 1, Priority.MEDIUM: 2, Priority.HIGH: 3, Priority.CRITICAL: 4}
+PRIORITIES_BY_CODE: Dict[int, Priority] = {code: priority for priority, code in PRIORITY_CODES.items()}
+# Small integer codes for the compact in-memory and on-disk layouts
+STATUS_CODES: Dict[Status, int] = {status: code for code, status in enumerate(Status)}
+TYPE_CODES: Dict[str, int] = {task_type: code for code, task_type in enumerate(DETAIL_FIELDS)}
 
 
 class Task:
+    __slots__ = ('id', 'name', 'description', 'priority', 'status', '_dirty')
+
+    # Serialized type tag; a class-level constant rather than a per-instance field.
+    _type: Optional[str] = None
+
     def __init__(
         self,
         id: Optional[int],
@@ -27,10 +42,19 @@ class Task:
         else:
             raise ValueError("Invalid status value")
 
-        self.id: int = IDManager.get_new_user_id() if id is None else id
+        self.id: int = IDManager.get_new_task_id() if id is None else id
         self.name: str = name
         self.description: str = description
-        self._type: Optional[str] = _type
+        self._dirty: bool = True
+
+    def mark_dirty(self) -> None:
+        """
+        Flag this task, and the project and user that own it, as needing re-serialization.
+        """
+        self._dirty = True
+        project = Registry.get_task_owner(self.id)
+        if project is not None and Registry.is_task_registered(self):
+            project.mark_dirty()
 
     def update_task(
         self,
@@ -39,6 +63,7 @@ class Task:
         priority: Optional[Priority | str] = None,
         **kwargs: Any
     ) -> None:
+        old_status, old_priority = self.status, self.priority
         if name is not None:
             self.name = name
         if description is not None:
@@ -50,14 +75,19 @@ class Task:
                 self.priority = Priority(priority)
             else:
                 raise ValueError("Invalid priority value")
+        self.mark_dirty()
+        Registry.task_changed(self, old_status, old_priority)
 
     def change_status(self, status: Status | str) -> None:
+        old_status = self.status
         if isinstance(status, Status):
             self.status = status
         elif isinstance(status, str):
             self.status = Status(status)
         else:
             raise ValueError("Invalid status value")
+        self.mark_dirty()
+        Registry.task_changed(self, old_status, self.priority)
 
     def to_dict(self) -> Dict[str, Any]:
         task_dict: Dict[str, Any] = {
@@ -65,14 +95,17 @@ class Task:
             'name': self.name,
             'description': self.description,
             'status': self.status.value,
-            '_type': self._type
+            '_type': self._type,
+            'priority': PRIORITY_CODES[self.priority]
         }
-        priority_map = {"Low": 1, "Medium": 2, "High": 3, "Critical": 4}
-        task_dict['priority'] = priority_map.get(self.priority.value, 2)
         return task_dict
 
 
 class DevTask(Task):
+    __slots__ = ('language',)
+
+    _type = 'DevTask'
+
     def __init__(
         self,
         id: Optional[int],
@@ -82,8 +115,8 @@ class DevTask(Task):
         language: str,
         status: Status = Status.NOT_STARTED
     ):
-        super().__init__(id, name, description, priority, status, 'DevTask')
-        self.language: str = language
+        super().__init__(id, name, description, priority, status)
+        self.language: str = Interning.intern("language", language)
 
     def to_dict(self) -> Dict[str, Any]:
         data: Dict[str, Any] = super().to_dict()
@@ -103,12 +136,16 @@ class DevTask(Task):
         priority: Optional[Priority | str] = None,
         language: Optional[str] = None
     ) -> None:
-        super().update_task(name=name, description=description, priority=priority)
         if language is not None:
-            self.language = language
+            self.language = Interning.intern("language", language)
+        super().update_task(name=name, description=description, priority=priority)
 
 
 class QATask(Task):
+    __slots__ = ('test_type',)
+
+    _type = 'QATask'
+
     def __init__(
         self,
         id: Optional[int],
@@ -118,8 +155,8 @@ class QATask(Task):
         test_type: str,
         status: Status = Status.NOT_STARTED
     ):
-        super().__init__(id, name, description, priority, status, 'QATask')
-        self.test_type: str = test_type
+        super().__init__(id, name, description, priority, status)
+        self.test_type: str = Interning.intern("test_type", test_type)
 
     def to_dict(self) -> Dict[str, Any]:
         data: Dict[str, Any] = super().to_dict()
@@ -139,12 +176,16 @@ class QATask(Task):
         priority: Optional[Priority | str] = None,
         test_type: Optional[str] = None
     ) -> None:
-        super().update_task(name=name, description=description, priority=priority)
         if test_type is not None:
-            self.test_type = test_type
+            self.test_type = Interning.intern("test_type", test_type)
+        super().update_task(name=name, description=description, priority=priority)
 
 
 class DocTask(Task):
+    __slots__ = ('document',)
+
+    _type = 'DocTask'
+
     def __init__(
         self,
         id: Optional[int],
@@ -154,8 +195,8 @@ class DocTask(Task):
         document: str,
         status: Status = Status.NOT_STARTED
     ):
-        super().__init__(id, name, description, priority, status, 'DocTask')
-        self.document: str = document
+        super().__init__(id, name, description, priority, status)
+        self.document: str = Interning.intern("document", document)
 
     def to_dict(self) -> Dict[str, Any]:
         data: Dict[str, Any] = super().to_dict()
@@ -175,6 +216,6 @@ class DocTask(Task):
         priority: Optional[Priority | str] = None,
         document: Optional[str] = None
     ) -> None:
-        super().update_task(name=name, description=description, priority=priority)
         if document is not None:
-            self.document = document
+            self.document = Interning.intern("document", document)
+        super().update_task(name=name, description=description, priority=priority)
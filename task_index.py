@@ -0,0 +1,83 @@
+import os
+from typing import Dict, Iterable, List, Set, TYPE_CHECKING
+from enums import Priority, Status
+from registry import Registry, RegistryListener
+
+if TYPE_CHECKING:
+    from user import User
+    from project import Project
+    from task import Task
+
+
+class TaskIndex(RegistryListener):
+    """
+    Secondary indexes bucketing registered tasks by Status and by Priority.
+
+    Buckets are updated in place from the Registry hooks, so a filter query only
+    touches the tasks it returns.
+    """
+    by_status: Dict[Status, Set["Task"]] = {status: set() for status in Status}
+    by_priority: Dict[Priority, Set["Task"]] = {priority: set() for priority in Priority}
+    verify_mode: bool = bool(os.environ.get("TMS_VERIFY_INDEXES"))
+
+    @classmethod
+    def on_clear(cls) -> None:
+        cls.by_status = {status: set() for status in Status}
+        cls.by_priority = {priority: set() for priority in Priority}
+
+    @classmethod
+    def on_task_added(cls, task: "Task", project: "Project") -> None:
+        cls.by_status[task.status].add(task)
+        cls.by_priority[task.priority].add(task)
+
+    @classmethod
+    def on_task_removed(cls, task: "Task", project: "Project") -> None:
+        cls.by_status[task.status].discard(task)
+        cls.by_priority[task.priority].discard(task)
+
+    @classmethod
+    def on_task_changed(cls, task: "Task", old_status: Status, old_priority: Priority) -> None:
+        if task.status is not old_status:
+            cls.by_status[old_status].discard(task)
+            cls.by_status[task.status].add(task)
+        if task.priority is not old_priority:
+            cls.by_priority[old_priority].discard(task)
+            cls.by_priority[task.priority].add(task)
+
+    @classmethod
+    def tasks_with_status(cls, status: Status) -> Set["Task"]:
+        return cls.by_status[status]
+
+    @classmethod
+    def tasks_with_priority(cls, priority: Priority) -> Set["Task"]:
+        return cls.by_priority[priority]
+
+    @classmethod
+    def verify(cls, users: Iterable["User"]) -> List[str]:
+        """
+        Compare the buckets against a brute-force scan of ``users`` and return any mismatches.
+        """
+        expected_status: Dict[Status, Set["Task"]] = {status: set() for status in Status}
+        expected_priority: Dict[Priority, Set["Task"]] = {priority: set() for priority in Priority}
+        for user in users:
+            for project in user.projects:
+                for task in project.tasks:
+                    expected_status[task.status].add(task)
+                    expected_priority[task.priority].add(task)
+
+        problems: List[str] = []
+        for status, expected in expected_status.items():
+            cls._compare(f"status {status}", expected, cls.by_status[status], problems)
+        for priority, expected in expected_priority.items():
+            cls._compare(f"priority {priority}", expected, cls.by_priority[priority], problems)
+        return problems
+
+    @staticmethod
+    def _compare(label: str, expected: Set["Task"], actual: Set["Task"], problems: List[str]) -> None:
+        for task in expected - actual:
+            problems.append(f"{label}: task {task.id} missing from index")
+        for task in actual - expected:
+            problems.append(f"{label}: task {task.id} indexed but not found by scan")
+
+
+Registry.subscribe(TaskIndex)
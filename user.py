@@ -1,10 +1,14 @@
-import json
 import os
-from typing import Set, Dict, Optional
+from typing import Set, Dict, Iterable, List, Optional
+import codec
 from id_manager import IDManager
+from registry import Registry
+from stats import timed
 
 
 class User:
+    __slots__ = ('id', 'name', 'surname', 'email', 'projects', '_dirty')
+
     def __init__(
         self,
         id: Optional[int],
@@ -18,9 +22,46 @@ class User:
         self.surname: str = surname
         self.email: str = email
         self.projects: Set["Project"] = projects or set()
+        self._dirty: bool = True
+
+    def mark_dirty(self) -> None:
+        self._dirty = True
+
+    def clear_dirty(self) -> None:
+        """
+        Reset the dirty flag on this user and on every project and task it owns.
+        """
+        self._dirty = False
+        for project in self.resident_projects():
+            project.clear_dirty()
+
+    def resident_projects(self) -> Set["Project"]:
+        """
+        Projects currently held in memory; the same as ``projects`` unless they are loaded lazily.
+        """
+        return self.projects
 
     def add_project(self, project: "Project") -> None:
+        """
+        Add and register ``project``; a project equal to one the user already has is rejected.
+        """
+        if project in self.projects:
+            raise ValueError(f"User {self.id} already has a project named {project.name!r} with this description.")
         self.projects.add(project)
+        self._dirty = True
+        if Registry.is_user_registered(self):
+            Registry.register_project(project, self)
+
+    def remove_project(self, project: "Project") -> None:
+        """
+        Remove ``project`` by identity, since an update may have changed the fields it is hashed on.
+        """
+        remaining = {owned for owned in self.projects if owned is not project}
+        if len(remaining) == len(self.projects):
+            raise ValueError(f"Project {project.id} does not belong to user {self.id}.")
+        Registry.unregister_project(project)
+        self.projects = remaining
+        self._dirty = True
 
     def to_dict(self) -> Dict[str, any]:
         return {
@@ -42,6 +83,7 @@ class User:
             self.surname = surname
         if email:
             self.email = email
+        self._dirty = True
 
     def __hash__(self) -> int:
         return hash(self.id)
@@ -62,22 +104,75 @@ class User:
 
 class Users:
     users: Set[User] = set()
+    # Encoded JSON of each user as it appears in users.json, reused while the user is clean
+    fragments: Dict[int, bytes] = {}
 
     @classmethod
     def add_user(cls, user: User) -> None:
         cls.users.add(user)
+        Registry.register_user(user)
 
     @classmethod
-    def save_to_file(cls, filename: str = "data/users.json") -> None:
+    @timed("Users.save_to_file")
+    def save_to_file(cls, filename: str = "data/users.json", compact: bool = False) -> None:
+        """
+        Write all users to ``filename``, re-encoding only users whose subtree is dirty.
+
+        The output is byte-for-byte what ``json.dump(..., indent=4)`` would produce, or
+        ``separators=(",", ":")`` with ``compact``.
+        """
         # Ensure the directory exists
         os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, 'w') as file:
-            json.dump([user.to_dict() for user in cls.users], file, indent=4)
+        with open(filename, 'wb') as file:
+            file.write(cls.encode_users(cls.users, compact))
+
+    @classmethod
+    def encode_users(cls, users: Iterable[User], compact: bool = False) -> bytes:
+        """
+        Encode ``users`` as an indented JSON array, reusing cached fragments of clean users.
+
+        ``compact`` output has no whitespace and bypasses the (indented) fragment cache.
+        """
+        if compact:
+            return codec.encode_users(users, compact=True)
+        return cls.join_fragments([cls.fragment(user) for user in users])
+
+    @staticmethod
+    def join_fragments(parts: List[bytes]) -> bytes:
+        """
+        The indented users.json array holding the encoded users ``parts``.
+        """
+        return b"[\n" + b",\n".join(parts) + b"\n]" if parts else b"[]"
+
+    @classmethod
+    def fragment(cls, user: User) -> bytes:
+        """
+        Return the cached fragment of ``user``, re-encoding it first if its subtree is dirty.
+        """
+        fragment = cls.fragments.get(user.id)
+        if fragment is None or user._dirty:
+            fragment = cls.encode_user(user)
+            cls.fragments[user.id] = fragment
+            user.clear_dirty()
+        return fragment
+
+    @staticmethod
+    def encode_user(user: User) -> bytes:
+        """
+        Encode one user as an element of the indented top-level array.
+        """
+        out = ["    "]
+        codec.user_encoder(1)(user, out)
+        return "".join(out).encode("ascii")
 
     @classmethod
     def set_users(cls, users: Set[User]) -> None:
         cls.users = users
+        cls.fragments = {}
+        Registry.rebuild(users)
 
     @classmethod
     def remove_user(cls, user: User) -> None:
+        Registry.unregister_user(user)
         cls.users.discard(user)
+        cls.fragments.pop(user.id, None)